@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/3.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
+import copy
 import logging
 from logging.config import dictConfig
 from pathlib import Path
@@ -59,6 +60,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'telegram_bot.db_router.ReplicaPinMiddleware',  # Чтение своих записей с основной БД (при DB_REPLICA_HOST)
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -84,6 +86,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'mp_bot.wsgi.application'
+ASGI_APPLICATION = 'mp_bot.asgi.application'
 
 
 # Database
@@ -100,6 +103,48 @@ DATABASES = {
     }
 }
 
+# Соединения с PostgreSQL: off — новое соединение на каждый запрос API, persistent — постоянные соединения
+# (CONN_MAX_AGE), pool — пул соединений psycopg 3 в каждом процессе (размеры пулов бота и воркера API задаются отдельно)
+DB_POOL_MODE = config('DB_POOL_MODE', default='pool').lower()
+DB_CONN_MAX_AGE = int(config('DB_CONN_MAX_AGE', default=300))  # Время жизни постоянного соединения (сек., persistent)
+# Проверка соединения перед использованием (лишний запрос на соединение, зато обрыв не приводит к ошибке запроса)
+DB_HEALTH_CHECKS = bool(int(config('DB_HEALTH_CHECKS', default=1)))
+DB_POOL_MIN_SIZE = int(config('DB_POOL_MIN_SIZE', default=1))  # Соединений, открытых в пуле постоянно
+DB_POOL_MAX_SIZE_WEB = int(config('DB_POOL_MAX_SIZE_WEB', default=4))  # Размер пула каждого воркера API
+DB_POOL_MAX_SIZE_BOT = int(config('DB_POOL_MAX_SIZE_BOT', default=10))  # Размер пула процесса бота
+DB_POOL_TIMEOUT = float(config('DB_POOL_TIMEOUT', default=10))  # Ожидание свободного соединения из пула (сек.)
+
+if DB_POOL_MODE == 'persistent':
+    DATABASES['default'].update(CONN_MAX_AGE=DB_CONN_MAX_AGE, CONN_HEALTH_CHECKS=DB_HEALTH_CHECKS)
+elif DB_POOL_MODE == 'pool':
+    DATABASES['default'].update(CONN_HEALTH_CHECKS=DB_HEALTH_CHECKS, OPTIONS={
+        'pool': {
+            'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE_WEB),
+            # Процесс бота заменяет размер на DB_POOL_MAX_SIZE_BOT (telegram_bot.tools.db_pool.configure_process)
+            'max_size': DB_POOL_MAX_SIZE_WEB,
+            'timeout': DB_POOL_TIMEOUT,
+        },
+    })
+
+# Реплика PostgreSQL для чтения (необязательно): запросы чтения моделей telegram_bot уходят на неё
+# (telegram_bot.db_router), кроме чтений пользователя в течение DB_REPLICA_PIN_SECONDS после его записи
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+DB_REPLICA_PORT = config('DB_REPLICA_PORT', default=DATABASES['default']['PORT'])
+# Должно превышать максимальное отставание реплики
+DB_REPLICA_PIN_SECONDS = int(config('DB_REPLICA_PIN_SECONDS', default=5))
+
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': DB_REPLICA_PORT,
+        # Свой пул соединений: словарь настроек пула не общий с основной БД
+        'OPTIONS': copy.deepcopy(DATABASES['default'].get('OPTIONS', {})),
+        # В тестах реплика — та же тестовая БД
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['telegram_bot.db_router.ReplicaRouter']
+
 ADMIN_USER_ID = os.getenv('ADMIN_USER_ID', '0')
 
 # Password validation
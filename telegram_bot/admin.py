@@ -1,5 +1,5 @@
 from django.contrib import admin, messages
-from .models import User, CommissionInfo, Appeal, Notification, AdminRequest
+from .models import User, CommissionInfo, Appeal, Notification, AdminRequest, AttachmentBlob
 from .tools.main_logger import logger
 
 
@@ -21,6 +21,13 @@ class AppealAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'appeal_text')
     list_filter = ('status', 'created_at')
 
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'ref_count', 'created_at')
+    search_fields = ('sha256',)
+    # Счётчик ссылок ведёт хранилище вложений, вручную его менять нельзя
+    readonly_fields = ('sha256', 'size', 'ref_count', 'created_at')
+
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'appeal', 'message_preview', 'sent', 'created_at')
@@ -1,11 +1,10 @@
-from asgiref.sync import async_to_sync
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from ....models import AdminRequest
 from ....serializers import AdminRequestSerializer
-from ....tools.check_admin_status import is_user_admin
+from ....tools.check_admin_status import is_user_admin_sync
 
 
 class AdminRequestListView(APIView):
@@ -24,7 +23,7 @@ class UpdateAdminRequestStatusView(APIView):
         if not user_id:
             raise ValidationError("user_id is required in the request body.")
 
-        if not async_to_sync(is_user_admin)(user_id):
+        if not is_user_admin_sync(user_id):
             raise PermissionDenied("Только администраторы могут изменять статус заявок.")
 
         try:
@@ -53,7 +52,7 @@ class DeleteAdminRequestView(APIView):
         if not user_id:
             raise ValidationError("user_id is required in the request body.")
 
-        if not is_user_admin(user_id):
+        if not is_user_admin_sync(user_id):
             raise PermissionDenied("Только администраторы могут удалять заявки.")
 
         try:
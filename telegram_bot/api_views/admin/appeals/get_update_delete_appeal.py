@@ -1,21 +1,87 @@
-from asgiref.sync import async_to_sync
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware, now
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ....models import Appeal
+from ....models import Appeal, Notification, StatusChoices
+from ....pagination import KeysetPagination
 from ....serializers import AppealSerializerForAdmin
-from ....tools.check_admin_status import is_user_admin
+from ....tools.check_admin_status import is_user_admin_sync
+from ....tools.main_logger import logger
+from ....tools.notification_messages import build_appeal_status_message
 
 
 class AppealListForAdminView(APIView):
+    """
+    Список обращений для администратора с курсорной пагинацией по (created_at, id).
+    Фильтры: status, commission_id, user_id, created_from, created_to.
+    Параметр fields=id,status,... ограничивает набор возвращаемых полей.
+    """
+    pagination_class = KeysetPagination
 
     def get(self, request):
-
-        # Загрузка всех обращений с оптимизацией запроса
-        appeals = Appeal.objects.select_related('commission').all()
-        serializer = AppealSerializerForAdmin(appeals, many=True)
-        return Response(serializer.data, status=200)
+        params = request.query_params
+        appeals = Appeal.objects.all()
+
+        status = params.get('status')
+        if status:
+            if status not in dict(StatusChoices.APPEAL_STATUSES):
+                raise ValidationError("Недопустимый статус обращения.")
+            appeals = appeals.filter(status=status)
+
+        for param in ('commission_id', 'user_id'):
+            value = params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError(f"{param} must be an integer.")
+                appeals = appeals.filter(**{param: int(value)})
+
+        for param, lookup in (('created_from', 'created_at__gte'), ('created_to', 'created_at__lte')):
+            value = params.get(param)
+            if value:
+                created_at = parse_datetime(value)
+                if created_at is None:
+                    date = parse_date(value)
+                    if date is None:
+                        raise ValidationError(f"{param} must be an ISO 8601 date or datetime.")
+                    # Для даты без времени граница created_to включает весь день
+                    created_at = datetime.combine(
+                        date + timedelta(days=1) if param == 'created_to' else date, time.min
+                    )
+                    if param == 'created_to':
+                        lookup = 'created_at__lt'
+                if is_naive(created_at):
+                    created_at = make_aware(created_at)
+                appeals = appeals.filter(**{lookup: created_at})
+
+        fields = params.get('fields')
+        if fields:
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+            unknown_fields = set(fields) - set(AppealSerializerForAdmin().fields)
+            if unknown_fields:
+                raise ValidationError(f"Неизвестные поля: {', '.join(sorted(unknown_fields))}.")
+
+            # Загружаем из БД только нужные колонки (id и created_at нужны для курсора)
+            model_fields = {field.name for field in Appeal._meta.concrete_fields}
+            only_fields = {'id', 'created_at'} | (set(fields) & model_fields)
+            if 'commission_name' in fields:
+                appeals = appeals.select_related('commission')
+                only_fields.add('commission__name')
+            if 'download_url' in fields:
+                only_fields |= {'file_path', 'file_name'}
+            appeals = appeals.only(*only_fields)
+        else:
+            fields = None
+            appeals = appeals.select_related('commission')
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(appeals, request, view=self)
+        serializer = AppealSerializerForAdmin(page, many=True, fields=fields, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
 class UpdateAppealStatusView(APIView):
 
@@ -26,7 +92,7 @@ class UpdateAppealStatusView(APIView):
             raise ValidationError("user_id is required in the request body.")
 
         # Проверяем, является ли пользователь администратором
-        if not async_to_sync(is_user_admin)(user_id):
+        if not is_user_admin_sync(user_id):
             raise PermissionDenied("Только администраторы могут изменять статус обращения.")
 
         try:
@@ -42,6 +108,103 @@ class UpdateAppealStatusView(APIView):
         appeal.save()
         return Response({"message": "Статус успешно обновлен."}, status=200)
 
+class BulkUpdateAppealStatusView(APIView):
+    """
+    Массовое изменение статуса обращений.
+    Принимает список appeal_ids или фильтр (filter: {status, commission_id}) и новый статус.
+    Статусы меняются одним UPDATE, уведомления создаются одним bulk_create в той же транзакции.
+    """
+
+    def post(self, request):
+        # Получаем user_id из тела запроса
+        user_id = request.data.get('user_id')
+        if not user_id:
+            raise ValidationError("user_id is required in the request body.")
+
+        # Проверяем, является ли пользователь администратором
+        if not is_user_admin_sync(user_id):
+            raise PermissionDenied("Только администраторы могут изменять статус обращения.")
+
+        new_status = request.data.get('status')
+        if not new_status:
+            raise ValidationError("status is required in the request body.")
+        if new_status not in dict(StatusChoices.APPEAL_STATUSES):
+            raise ValidationError("Недопустимый статус обращения.")
+
+        appeal_ids = request.data.get('appeal_ids')
+        appeal_filter = request.data.get('filter')
+        if appeal_ids is not None:
+            # bool — подкласс int: JSON true иначе изменил бы обращение №1
+            if not isinstance(appeal_ids, list) or not all(
+                    isinstance(appeal_id, int) and not isinstance(appeal_id, bool) for appeal_id in appeal_ids
+            ):
+                raise ValidationError("appeal_ids must be a list of integers.")
+            if not appeal_ids:
+                raise ValidationError("appeal_ids must not be empty.")
+            appeals = Appeal.objects.filter(id__in=appeal_ids)
+        elif isinstance(appeal_filter, dict) and appeal_filter:
+            appeals = Appeal.objects.filter(**self.parse_filter(appeal_filter))
+        else:
+            raise ValidationError("appeal_ids or filter is required in the request body.")
+
+        with transaction.atomic():
+            # Блокируем изменяемые обращения, чтобы параллельный запрос не создал дублирующих уведомлений
+            changed_appeals = list(
+                appeals.exclude(status=new_status)
+                .select_related('commission')
+                .select_for_update(of=('self',))
+                .only('id', 'user_id', 'status', 'created_at', 'commission__name')
+            )
+            if not changed_appeals:
+                return Response({"message": "Нет обращений для изменения статуса.", "updated": 0}, status=200)
+
+            updated_at = now()
+            changed_ids = [appeal.id for appeal in changed_appeals]
+            Appeal.objects.filter(id__in=changed_ids).update(status=new_status, updated_at=updated_at)
+
+            # Сигнал pre_save при UPDATE не срабатывает, поэтому уведомления формируем здесь
+            notifications = []
+            for appeal in changed_appeals:
+                appeal.status = new_status
+                appeal.updated_at = updated_at
+                notifications.append(Notification(
+                    user_id=appeal.user_id,
+                    appeal_id=appeal.id,
+                    message=build_appeal_status_message(appeal),
+                    sent=False
+                ))
+            Notification.objects.bulk_create(notifications)
+
+        logger.info(f"Статус {len(changed_ids)} обращений изменен на '{new_status}', создано {len(notifications)} уведомлений.")
+        return Response(
+            {"message": "Статусы успешно обновлены.", "updated": len(changed_ids), "appeal_ids": changed_ids},
+            status=200
+        )
+
+    @staticmethod
+    def parse_filter(appeal_filter: dict) -> dict:
+        """
+        Проверяет фильтр массового изменения: неизвестный ключ (например, опечатка) иначе изменил бы все обращения.
+        :return: Условия для Appeal.objects.filter().
+        """
+        unknown_keys = set(appeal_filter) - {'status', 'commission_id'}
+        if unknown_keys:
+            raise ValidationError(f"Неизвестные условия фильтра: {', '.join(sorted(unknown_keys))}.")
+
+        conditions = {}
+        if 'status' in appeal_filter:
+            if appeal_filter['status'] not in dict(StatusChoices.APPEAL_STATUSES):
+                raise ValidationError("Недопустимый статус обращения в фильтре.")
+            conditions['status'] = appeal_filter['status']
+        if 'commission_id' in appeal_filter:
+            commission_id = appeal_filter['commission_id']
+            if not isinstance(commission_id, int) or isinstance(commission_id, bool):
+                raise ValidationError("commission_id in filter must be an integer.")
+            conditions['commission_id'] = commission_id
+        if not conditions:
+            raise ValidationError("filter must contain status or commission_id.")
+        return conditions
+
 class DeleteAppealForAdminView(APIView):
 
     def delete(self, request, appeal_id):
@@ -51,7 +214,7 @@ class DeleteAppealForAdminView(APIView):
             raise ValidationError("user_id is required in the request body.")
 
         # Проверяем, является ли пользователь администратором
-        if not is_user_admin(user_id):
+        if not is_user_admin_sync(user_id):
             raise PermissionDenied("Только администраторы могут удалять обращения.")
 
         try:
@@ -59,16 +222,7 @@ class DeleteAppealForAdminView(APIView):
         except Appeal.DoesNotExist:
             raise NotFound("Обращение с указанным ID не найдено.")
 
-        # Удаляем связанный файл, если он существует
-        if appeal.file_path:
-            try:
-                # Удаляем файл с диска
-                appeal.file_path.delete(save=False)
-            except Exception as e:
-                # Логируем ошибку, но продолжаем выполнение
-                print(f"Ошибка при удалении файла: {e}")
-
-        # Удаляем обращение из базы данных
+        # Удаляем обращение из базы данных (ссылка на файл снимается сигналом post_delete)
         appeal.delete()
 
         return Response({"message": "Обращение успешно удалено."}, status=200)
\ No newline at end of file
@@ -1,10 +1,9 @@
-from asgiref.sync import async_to_sync
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, NotFound, ParseError
 from rest_framework.exceptions import PermissionDenied, NotFound
 from ....models import CommissionInfo
-from ....tools.check_admin_status import is_user_admin
+from ....tools.check_admin_status import is_user_admin_sync
 
 
 class DeleteCommissionView(APIView):
@@ -19,7 +18,7 @@ class DeleteCommissionView(APIView):
             raise ParseError("Invalid request body.")
 
         # Проверяем, является ли пользователь администратором
-        if not async_to_sync(is_user_admin)(user_id):
+        if not is_user_admin_sync(user_id):
             raise PermissionDenied("Только администраторы могут удалять комиссии.")
 
         # Ищем комиссию по ID
@@ -1,10 +1,8 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from ....models import CommissionInfo
-from ....serializers import CommissionInfoSerializer
+from ...async_view import AsyncAPIView
+from ....tools.commission_cache import catalogue_response, commission_cache
 
-class CommissionListView(APIView):
-    def get(self, request):
-        commissions = CommissionInfo.objects.all()
-        serializer = CommissionInfoSerializer(commissions, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+class CommissionListView(AsyncAPIView):
+    async def get(self, request):
+        # Готовый JSON из кеша каталога; при совпадении ETag — 304 без тела
+        catalogue = await commission_cache.aget()
+        return catalogue_response(request, catalogue.list_json, catalogue.list_etag)
\ No newline at end of file
@@ -1,4 +1,3 @@
-from asgiref.sync import async_to_sync
 from rest_framework import status
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.exceptions import ParseError
@@ -6,21 +5,22 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.utils import IntegrityError
 
+from ...async_view import AsyncAPIView, json_response
 from ....models import CommissionInfo
-from ....serializers import CommissionInfoSerializer, CommissionInfoWriteSerializer
-from ....tools.check_admin_status import is_user_admin
+from ....serializers import CommissionInfoWriteSerializer
+from ....tools.check_admin_status import is_user_admin_sync
+from ....tools.commission_cache import catalogue_response, commission_cache
 
 
-class CommissionDetailView(APIView):
+class CommissionDetailView(AsyncAPIView):
 
-    def get(self, request, commission_id):
-        try:
-            commission = CommissionInfo.objects.get(id=commission_id)
-        except CommissionInfo.DoesNotExist:
-            raise NotFound("Комиссия с указанным ID не найдена.")
+    async def get(self, request, commission_id):
+        detail = (await commission_cache.aget()).details.get(commission_id)
+        if detail is None:
+            return json_response({"detail": "Комиссия с указанным ID не найдена."}, status=404)
 
-        serializer = CommissionInfoSerializer(commission)
-        return Response(serializer.data)
+        content, etag = detail
+        return catalogue_response(request, content, etag)
 
 
 class UpdateCommissionView(APIView):
@@ -46,7 +46,7 @@ class UpdateCommissionView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not async_to_sync(is_user_admin)(user_id):
+        if not is_user_admin_sync(user_id):
             return Response(
                 {
                     "status": "error",
@@ -0,0 +1,43 @@
+import json
+
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+
+class AsyncAPIView(View):
+    """
+    Базовый класс асинхронных представлений API.
+
+    DRF APIView не поддерживает async-обработчики, поэтому часто вызываемые эндпоинты чтения
+    построены на django.views.View с async def get()/post(). Под ASGI такие представления
+    выполняются прямо в event loop воркера (без отдельного потока на запрос),
+    к БД обращаются через асинхронный ORM (aget, afirst, aexists).
+    Ответы совпадают по формату с ответами соответствующих представлений DRF.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Как и APIView: API не использует сессионную авторизацию, CSRF-токен не передаётся
+        return csrf_exempt(super().as_view(**initkwargs))
+
+
+def json_response(data, status: int = 200) -> JsonResponse:
+    # Формат как у JSONRenderer DRF: компактно, без экранирования кириллицы
+    return JsonResponse(
+        data, status=status, safe=False, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def parse_json_body(request) -> dict | None:
+    """
+    Разбирает тело запроса (JSON или форма).
+    :return: Словарь или None, если тело не удалось разобрать.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except (UnicodeDecodeError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
@@ -1,24 +1,17 @@
-from django.http import FileResponse, HttpResponseNotFound
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 
 from ...models import Appeal
+from ...tools.file_serving import serve_signed_file
 
 
-class DownloadFileView(APIView):
-    permission_classes = [AllowAny]  # Разрешаем доступ без аутентификации
+class SignedDownloadFileView(APIView):
+    """
+    Скачивание файла по подписанной ссылке (download_url из API обращений).
+    Подпись и срок действия проверяются без запросов к БД, ответ кешируется до окончания срока ссылки.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []  # Аутентификация не нужна: доступ определяется подписью ссылки
 
-    def get(self, request, appeal_id):
-        try:
-            # Находим обращение по ID
-            appeal = Appeal.objects.get(id=appeal_id)
-
-            # Проверяем, существует ли файл
-            if appeal.file_path and appeal.file_path.storage.exists(appeal.file_path.name):
-                # Возвращаем файл как ответ
-                return FileResponse(appeal.file_path.open('rb'), as_attachment=True)
-            else:
-                # Если файл не найден, возвращаем ошибку 404
-                return HttpResponseNotFound("Файл не найден.")
-        except Appeal.DoesNotExist:
-            return HttpResponseNotFound("Обращение не найдено.")
\ No newline at end of file
+    def get(self, request, token):
+        return serve_signed_file(request, Appeal._meta.get_field('file_path').storage, token)
@@ -1,35 +1,39 @@
-from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework import status
+from ..async_view import AsyncAPIView, json_response, parse_json_body
 from ...models import User
 from ...serializers import UserSerializer
 
 
-class UserDataView(APIView):
-    def post(self, request):
+class UserDataView(AsyncAPIView):
+    async def post(self, request):
         """
         Возвращает данные пользователя по Telegram ID, переданному в теле запроса.
         """
+        data = parse_json_body(request)
+        if data is None:
+            return json_response(
+                {"error": "Неверный запрос.", "message": "Тело запроса должно быть JSON-объектом."},
+                status=400
+            )
 
         # Извлекаем telegram_id из тела запроса
-        telegram_id = request.data.get('telegramId')
+        telegram_id = data.get('telegramId')
 
         # Проверяем, что telegram_id присутствует
         if not telegram_id:
-            return Response(
+            return json_response(
                 {"error": "Неверный запрос.", "message": "Поле 'telegramId' обязательно."},
-                status=status.HTTP_400_BAD_REQUEST
+                status=400
             )
 
         # Пытаемся найти пользователя в базе данных
         try:
-            user = User.objects.get(telegram_id=telegram_id)
-        except User.DoesNotExist:
-            return Response(
+            user = await User.objects.aget(telegram_id=telegram_id)
+        except (User.DoesNotExist, ValueError):
+            return json_response(
                 {"error": "Пользователь не найден.", "message": "Пользователь с указанным Telegram ID не существует."},
-                status=status.HTTP_404_NOT_FOUND
+                status=404
             )
 
         # Сериализуем данные пользователя
         serializer = UserSerializer(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return json_response(serializer.data)
\ No newline at end of file
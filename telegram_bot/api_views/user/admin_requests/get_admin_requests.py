@@ -1,25 +1,23 @@
-from rest_framework.response import Response
-from rest_framework.views import APIView
-
+from ...async_view import AsyncAPIView, json_response
 from ....models import AdminRequest, User, StatusChoices
 from ....tools.main_logger import logger
 
 
-class CheckPendingRejectedAcceptedRequest(APIView):
+class CheckPendingRejectedAcceptedRequest(AsyncAPIView):
     """
     Проверяет, есть ли у пользователя активная или отклонённая заявка на получение админ-прав.
     """
 
-    def get(self, request, user_id, *args, **kwargs):
+    async def get(self, request, user_id, *args, **kwargs):
         try:
             # Получаем пользователя
-            user = User.objects.filter(id=user_id).first()
+            user = await User.objects.filter(id=user_id).afirst()
             if not user:
-                return Response({'detail': 'Пользователь не найден.'}, status=404)
+                return json_response({'detail': 'Пользователь не найден.'}, status=404)
 
             # Если пользователь уже администратор, возвращаем соответствующий ответ
             if user.is_admin:
-                return Response({
+                return json_response({
                     'has_pending_request': False,
                     'last_rejected_request': None,
                     'is_admin': True,
@@ -27,14 +25,14 @@ class CheckPendingRejectedAcceptedRequest(APIView):
                 })
 
             # Проверяем наличие активной (pending) заявки
-            has_pending_request = AdminRequest.objects.filter(user_id=user_id, status=StatusChoices.PENDING).exists()
+            has_pending_request = await AdminRequest.objects.filter(user_id=user_id, status=StatusChoices.PENDING).aexists()
 
             # Получаем последнюю отклонённую (rejected) заявку
-            rejected_request = (
+            rejected_request = await (
                 AdminRequest.objects
                 .filter(user_id=user_id, status=StatusChoices.REJECTED)
                 .order_by('-created_at')  # Берём самую последнюю
-                .first()
+                .afirst()
             )
 
             # Формируем ответ
@@ -50,8 +48,8 @@ class CheckPendingRejectedAcceptedRequest(APIView):
                     'comment': rejected_request.comment,
                 }
 
-            return Response(response_data)
+            return json_response(response_data)
 
         except Exception as e:
             logger.error(f"Ошибка при проверке заявки: {e}")
-            return Response({'detail': 'Произошла ошибка.'}, status=500)
\ No newline at end of file
+            return json_response({'detail': 'Произошла ошибка.'}, status=500)
\ No newline at end of file
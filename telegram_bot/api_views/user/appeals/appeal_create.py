@@ -4,6 +4,7 @@ from rest_framework import status
 from django.core.exceptions import ObjectDoesNotExist
 from ....models import User, CommissionInfo, Appeal
 from ....serializers import AppealSerializer
+from ....tools.attachment_variants import queue_variants
 
 from ....tools.main_logger import logger
 
@@ -60,7 +61,10 @@ class CreateAppealView(APIView):
             # Валидируем данные через сериализатор
             serializer = AppealSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
+                appeal = serializer.save()
+                if appeal.file_path:
+                    # Миниатюра и превью для изображений создаются в фоне, в пуле процессов
+                    queue_variants(appeal.file_path.storage, appeal.file_path.name, appeal.attachment_name)
                 return Response({"message": "Обращение успешно создано."}, status=status.HTTP_201_CREATED)
             else:
                 # Возвращаем ошибки валидации в ожидаемом формате
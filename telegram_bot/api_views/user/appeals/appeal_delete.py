@@ -25,20 +25,7 @@ class DeleteAppealView(APIView):
             except Appeal.DoesNotExist:
                 return Response({"error": "Обращение не найдено."}, status=404)
 
-            # Удаляем связанный файл, если он существует
-            if appeal.file_path:
-                try:
-                    # Удаляем файл через метод delete() FileField
-                    appeal.file_path.delete(save=False)
-                except Exception as e:
-                    logger.error(f"Ошибка при удалении файла: {str(e)}")
-                    # Можно игнорировать ошибку или вернуть предупреждение
-                    return Response({
-                        "message": "Обращение удалено, но файл не был удален.",
-                        "details": str(e)
-                    })
-
-            # Удаляем обращение из базы данных
+            # Удаляем обращение из базы данных (ссылка на файл снимается сигналом post_delete)
             appeal.delete()
 
             return Response({"message": "Обращение успешно удалено."})
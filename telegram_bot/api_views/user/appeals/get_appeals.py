@@ -1,17 +1,20 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
+from ...async_view import AsyncAPIView, json_response
 from ....models import Appeal
 from ....serializers import AppealSerializer
 
-class AppealListView(APIView):
+class AppealListView(AsyncAPIView):
 
-    def get(self, request):
+    async def get(self, request):
         # Получаем user_id из query-параметров
-        user_id = request.query_params.get('user_id')
+        user_id = request.GET.get('user_id')
         if not user_id:
-            return Response({"error": "user_id is required"}, status=400)
+            return json_response({"error": "user_id is required"}, status=400)
+        if not user_id.isdigit():
+            return json_response({"error": "user_id must be an integer"}, status=400)
 
         # Получаем все заявки для указанного пользователя с использованием select_related
-        appeals = Appeal.objects.filter(user_id=user_id).select_related('commission')
-        serializer = AppealSerializer(appeals, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        appeals = [
+            appeal async for appeal in Appeal.objects.filter(user_id=user_id).select_related('commission')
+        ]
+        serializer = AppealSerializer(appeals, many=True, context={'request': request})
+        return json_response(serializer.data)
\ No newline at end of file
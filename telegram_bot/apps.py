@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
 from django.db.models.signals import post_migrate
 from django.contrib.auth import get_user_model
 from django.conf import settings
@@ -37,4 +38,8 @@ class TelegramBotConfig(AppConfig):
             logger.error(f"Ошибка при импорте сигналов: {e}")
 
         # Подключаем сигнал post_migrate для создания суперпользователя
-        post_migrate.connect(create_superuser, sender=self)
\ No newline at end of file
+        post_migrate.connect(create_superuser, sender=self)
+
+        # Метрики соединений с БД воркеров API (раз в DB_POOL_STATS_INTERVAL секунд после запроса)
+        from .tools.db_pool import report_stats_if_due
+        request_finished.connect(report_stats_if_due)
\ No newline at end of file
@@ -1,5 +1,4 @@
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 import asyncio
 from django.conf import settings
 
@@ -17,21 +16,28 @@ from telegram_bot.handlers.admin_commands.manage_appeals import router as manage
 from telegram_bot.handlers.admin_commands.delete_user import router as manage_users_router
 from telegram_bot.handlers.general.web_app_enter import router as web_app_enter_router
 from .middlewares.auth_middleware import CheckUserRegisteredMiddleware
+from .middlewares.db_scope_middleware import DatabaseScopeMiddleware
 from .middlewares.is_admin_middleware import CheckAdminMiddleware
 
+from .tools.db_pool import DB_POOL_STATS_INTERVAL, report_stats_periodically
+from .tools.fsm_storage import create_fsm_storage
 from .tools.notifier_func import start_notification_task
 
 from .tools.main_logger import logger
 from .tools.notifs_deleter_func import start_notification_cleanup_task
+from .tools.user_cache import USER_CACHE_ENABLED, user_cache
+from .tools.update_polling import run_polling
+from .tools.webhook_server import run_webhook
 
 # === ХРАНИЛИЩЕ СОСТОЯНИЙ ===
-storage = MemoryStorage()  # Инициализация хранилища состояний
+storage = create_fsm_storage()  # MemoryStorage или Redis (FSM_STORAGE)
 
 # === ИНИЦИАЛИЗАЦИЯ БОТА И ДИСПЕТЧЕРА ===
 bot = Bot(token=settings.TELEGRAM_API_TOKEN)
 dp = Dispatcher(storage=storage)  # Передаем storage в Dispatcher
 
 # === РЕГИСТРАЦИЯ MIDDLEWARE ===
+dp.update.outer_middleware(DatabaseScopeMiddleware())  # Соединение с БД на время обработки апдейта
 dp.message.middleware(CheckUserRegisteredMiddleware())  # Для всех сообщений
 dp.callback_query.middleware(CheckUserRegisteredMiddleware())  # Для всех колбэков
 
@@ -65,26 +71,37 @@ dp.include_router(other_router)
 
 
 # === МЕТОД ДЛЯ ЗАПУСКА БОТА ===
-async def start_bot():
+async def start_bot(webhook: bool = False):
     """
     Основной метод для запуска бота и фоновых задач.
+    :param webhook: Принимать апдейты через вебхук (aiohttp) вместо long polling.
     """
     try:
-        # 1. Сначала сбрасываем все pending updates
-        await bot.delete_webhook(drop_pending_updates=True)
-        await asyncio.sleep(1)  # Необязательно, но снижает риск пропустить апдейты
+        if not webhook:
+            # 1. Отключаем вебхук, не сбрасывая накопившиеся апдейты: polling продолжит с сохранённого offset
+            await bot.delete_webhook(drop_pending_updates=False)
 
         # 2. Запускаем фоновые задачи
         notification_task = asyncio.create_task(start_notification_task(bot))
         cleanup_task = asyncio.create_task(start_notification_cleanup_task())
+        background_tasks = [notification_task, cleanup_task]
+        if USER_CACHE_ENABLED:
+            # Сброс кеша пользователей, изменённых в других процессах (админка, API)
+            background_tasks.append(asyncio.create_task(user_cache.listen_invalidations()))
+        if DB_POOL_STATS_INTERVAL:
+            # Метрики соединений с БД в журнал и Redis (manage.py dbpoolstats)
+            background_tasks.append(asyncio.create_task(report_stats_periodically()))
 
         try:
-            # 3. Запускаем бота с двойной страховкой (webhook + polling)
-            await dp.start_polling(bot, skip_updates=True)
+            # 3. Запускаем приём апдейтов
+            if webhook:
+                await run_webhook(bot, dp)
+            else:
+                await run_polling(bot, dp)
         finally:
             # 4. Корректная остановка фоновых задач
-            notification_task.cancel()
-            cleanup_task.cancel()
+            for task in background_tasks:
+                task.cancel()
 
             try:
                 await notification_task
@@ -96,6 +113,8 @@ async def start_bot():
             except asyncio.CancelledError:
                 logger.info("Задача очистки уведомлений отменена.")
 
+            await asyncio.gather(*background_tasks[2:], return_exceptions=True)
+
     except Exception as e:
         logger.error(f"Произошла критическая ошибка при запуске бота: {e}")
         raise
\ No newline at end of file
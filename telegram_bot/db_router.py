@@ -0,0 +1,197 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .api_views.async_view import parse_json_body
+from .tools.main_logger import logger
+from .tools.redis_client import cache_key, get_sync_redis
+
+# Маршрутизация чтения на реплику (settings.DB_REPLICA_HOST).
+# Запросы чтения моделей telegram_bot выполняются на реплике, записи и транзакции — на основной БД.
+# Чтобы пользователь сразу видел свои изменения (например, только что созданное обращение), запись
+# закрепляет его чтения за основной БД на DB_REPLICA_PIN_SECONDS: ключи пользователя (tg:<telegram_id>
+# для бота, user:<id> для API) сохраняются в Redis и видны всем процессам бота и воркерам API.
+
+REPLICA_DB_ALIAS = 'replica'
+REPLICA_ENABLED = bool(settings.DB_REPLICA_HOST)
+
+# Пути, запросы к которым всегда читают с основной БД (админка Django)
+PRIMARY_ONLY_PATHS = ('/admin/',)
+
+# Параметры запросов API, по которым определяется пользователь
+REQUEST_PIN_FIELDS = (('user_id', 'user'), ('admin_id', 'user'), ('telegramId', 'tg'))
+
+
+class PinState:
+    """
+    Закрепление чтений текущего апдейта бота или запроса API.
+    """
+
+    def __init__(self, keys: tuple[str, ...], pinned: bool | None = None):
+        """
+        :param keys: Ключи пользователя, от имени которого выполняется работа.
+        :param pinned: True — читать с основной БД, None — проверить закрепление в Redis при первом чтении.
+        """
+        self.keys = keys
+        self.pinned = pinned
+        self.recorded = set()
+
+
+_pin_state: ContextVar[PinState | None] = ContextVar('replica_pin_state', default=None)
+
+
+def pin_key(key: str) -> str:
+    return cache_key('replica_pin', key)
+
+
+@contextmanager
+def read_your_writes(*keys: str, primary: bool = False):
+    """
+    Рамка работы от имени пользователя: после его записи чтения идут на основную БД.
+    :param keys: Ключи пользователя ('tg:<telegram_id>', 'user:<id>').
+    :param primary: Все чтения рамки — с основной БД.
+    """
+    if not REPLICA_ENABLED:
+        yield
+        return
+    token = _pin_state.set(PinState(keys, pinned=True if primary else None))
+    try:
+        yield
+    finally:
+        _pin_state.reset(token)
+
+
+def instance_pin_keys(instance) -> tuple[str, ...]:
+    """
+    Ключи владельца изменяемого объекта: запись администратора закрепляет и чтения пользователя,
+    чьи данные он изменил (кеш пользователей перечитает их с основной БД).
+    """
+    if instance is None:
+        return ()
+    if instance._meta.model_name == 'user':
+        return f'user:{instance.pk}', f'tg:{instance.telegram_id}'
+    user_id = getattr(instance, 'user_id', None)
+    return (f'user:{user_id}',) if user_id else ()
+
+
+def record_pin(keys: tuple[str, ...]):
+    try:
+        with get_sync_redis().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(pin_key(key), 1, ex=settings.DB_REPLICA_PIN_SECONDS)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось закрепить чтения {keys} за основной БД: {e}")
+
+
+def is_pinned(state: PinState) -> bool:
+    if state.pinned is None:
+        try:
+            state.pinned = any(get_sync_redis().mget([pin_key(key) for key in state.keys]))
+        except Exception as e:
+            # Без Redis нельзя узнать о недавней записи: читаем с основной БД
+            logger.warning(f"Не удалось проверить закрепление чтений {state.keys}: {e}")
+            state.pinned = True
+    return state.pinned
+
+
+class ReplicaRouter:
+    """
+    Чтение моделей telegram_bot — с реплики, кроме чтений внутри транзакции и закреплённых после записи;
+    запись и модели остальных приложений (пользователи админки, сессии) — на основной БД.
+    """
+
+    @staticmethod
+    def _routed(model) -> bool:
+        return model._meta.app_label == 'telegram_bot'
+
+    def db_for_read(self, model, **hints):
+        if not self._routed(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются из той же БД, что и объект
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _pin_state.get()
+        if state is not None and (state.pinned or state.keys) and is_pinned(state):
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if self._routed(model):
+            state = _pin_state.get()
+            keys = set(instance_pin_keys(hints.get('instance')))
+            if state is not None:
+                state.pinned = True
+                keys.update(state.keys)
+                keys.difference_update(state.recorded)
+                state.recorded.update(keys)
+            if keys:
+                record_pin(tuple(keys))
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная БД
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема реплики обновляется репликацией
+        return db != REPLICA_DB_ALIAS
+
+
+def request_pin_keys(request) -> tuple[str, ...]:
+    """
+    Ключи пользователя запроса API из query-параметров и тела запроса (user_id, admin_id, telegramId).
+    """
+    sources = [request.GET]
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        data = parse_json_body(request)
+        if data is not None:
+            sources.append(data)
+    keys = []
+    for source in sources:
+        for field, prefix in REQUEST_PIN_FIELDS:
+            value = source.get(field)
+            if isinstance(value, (int, str)) and str(value).isdigit():
+                keys.append(f'{prefix}:{int(value)}')
+    return tuple(dict.fromkeys(keys))
+
+
+class ReplicaPinMiddleware:
+    """
+    Определяет пользователя запроса API для ReplicaRouter. Без реплики отключается при запуске.
+    Поддерживает синхронные и асинхронные запросы (без лишнего перехода в поток под ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not REPLICA_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _scope(request):
+        if request.path.startswith(PRIMARY_ONLY_PATHS):
+            return read_your_writes(primary=True)
+        return read_your_writes(*request_pin_keys(request))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self._scope(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with self._scope(request):
+            return await self.get_response(request)
@@ -1,11 +1,10 @@
 from aiogram import Router, F
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from asgiref.sync import sync_to_async
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from ...models import User
+from ...tools import repository
 
 # Создаем роутер
 router = Router()
@@ -47,7 +46,7 @@ async def process_user_id(message: Message, state: FSMContext):
         return
 
     # Асинхронный запрос к базе данных
-    user = await sync_to_async(User.objects.filter(id=user_id).first)()
+    user = await repository.get_user(user_id)
     if not user:
         await message.answer(
             "Пользователь с таким ID не найден. Попробуйте снова.",
@@ -81,10 +80,8 @@ async def process_user_id(message: Message, state: FSMContext):
 async def confirm_delete_user(callback: CallbackQuery):
     user_id = int(callback.data.split("_")[-1])  # Извлекаем ID пользователя из callback_data
 
-    # Асинхронный запрос к базе данных
-    user = await sync_to_async(User.objects.filter(id=user_id).first)()
-    if user:
-        await sync_to_async(user.delete)()
+    # Удаляем пользователя одним переходом в поток ORM
+    if await repository.delete_user(user_id):
         await callback.message.answer(f"Пользователь с ID (PK) {user_id} успешно удален.")
     else:
         await callback.message.answer("Пользователь не найден.")
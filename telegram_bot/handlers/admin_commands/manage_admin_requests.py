@@ -3,10 +3,10 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from asgiref.sync import sync_to_async
 
-from ...models import AdminRequest
+from ...models import AdminRequest, StatusChoices
 from ...tools.main_logger import logger
+from ...tools import repository
 
 # Создаем роутер для обработки команд
 router = Router()
@@ -36,13 +36,13 @@ async def view_pending_requests(callback: CallbackQuery):
     # Подтверждаем обработку callback-запроса
     await callback.answer()
 
-    # Получаем все заявки в статусе "pending"
-    pending_requests = await sync_to_async(list)(AdminRequest.objects.filter(status='pending'))
+    # Получаем все заявки в статусе "pending" вместе с пользователями
+    pending_requests = await repository.list_admin_requests(StatusChoices.PENDING)
 
     if pending_requests:
         for request in pending_requests:
-            # Асинхронно получаем имя пользователя
-            username = await sync_to_async(lambda: request.user.username)()
+            # Пользователь загружен вместе с заявкой
+            username = request.user.username
             response = (
                 f"Заявка в ожидании:\n"
                 f"ID: {request.id}\n"
@@ -71,11 +71,11 @@ async def approve_request(callback: CallbackQuery):
     request_id = int(callback.data.split(":")[1])
 
     # Находим заявку в базе данных
-    request = await sync_to_async(AdminRequest.objects.get)(id=request_id)
+    request = await repository.get_admin_request(request_id)
 
-    # Меняем статус заявки на "Одобрено"
+    # Меняем статус заявки на "Одобрено" (save, чтобы сработал сигнал pre_save)
     request.status = "approved"
-    await sync_to_async(request.save)()
+    await request.asave()
 
     # Отправляем сообщение об успешном одобрении
     await callback.message.answer(f"Заявка ID {request_id} одобрена.")
@@ -108,12 +108,12 @@ async def process_comment(message: Message, state: FSMContext):
     request_id = data["request_id"]
 
     # Находим заявку в базе данных
-    request = await sync_to_async(AdminRequest.objects.get)(id=request_id)
+    request = await repository.get_admin_request(request_id)
 
     # Меняем статус заявки на "Отклонено" и сохраняем комментарий
     request.status = "rejected"
     request.comment = message.text
-    await sync_to_async(request.save)()
+    await request.asave()
 
     # Сбрасываем состояние
     await state.clear()
@@ -128,13 +128,13 @@ async def view_approved_requests(callback: CallbackQuery):
     # Подтверждаем обработку callback-запроса
     await callback.answer()
 
-    # Получаем все заявки в статусе "approved"
-    approved_requests = await sync_to_async(list)(AdminRequest.objects.filter(status='approved'))
+    # Получаем все заявки в статусе "approved" вместе с пользователями
+    approved_requests = await repository.list_admin_requests(StatusChoices.APPROVED)
 
     if approved_requests:
         for request in approved_requests:
-            # Асинхронно получаем имя пользователя
-            username = await sync_to_async(lambda: request.user.username)()
+            # Пользователь загружен вместе с заявкой
+            username = request.user.username
 
             # Форматируем даты
             created_at_formatted = request.created_at.strftime("%d.%m.%Y %H:%M")
@@ -167,13 +167,13 @@ async def view_rejected_requests(callback: CallbackQuery):
     # Подтверждаем обработку callback-запроса
     await callback.answer()
 
-    # Получаем все заявки в статусе "rejected"
-    rejected_requests = await sync_to_async(list)(AdminRequest.objects.filter(status='rejected'))
+    # Получаем все заявки в статусе "rejected" вместе с пользователями
+    rejected_requests = await repository.list_admin_requests(StatusChoices.REJECTED)
 
     if rejected_requests:
         for request in rejected_requests:
-            # Асинхронно получаем имя пользователя
-            username = await sync_to_async(lambda: request.user.username)()
+            # Пользователь загружен вместе с заявкой
+            username = request.user.username
 
             # Форматируем даты
             created_at_formatted = request.created_at.strftime("%d.%m.%Y %H:%M")
@@ -206,14 +206,12 @@ async def delete_admin_status(callback: CallbackQuery):
     request_id = int(callback.data.split(":")[1])
 
     try:
-        # Находим заявку по ID (используем sync_to_async)
-        request = await sync_to_async(AdminRequest.objects.get)(id=request_id)
+        # Находим заявку по ID вместе с пользователем
+        request = await repository.get_admin_request(request_id)
+        user = request.user
 
-        # Получаем пользователя асинхронно
-        user = await sync_to_async(lambda: request.user)()
-
-        # Удаляем заявку через sync_to_async
-        await sync_to_async(request.delete)()
+        # Удаляем заявку (сигнал pre_delete снимает статус администратора)
+        await request.adelete()
 
         # Отправляем сообщение об успешном удалении
         await callback.message.answer(f"Статус администратора для пользователя {user.username} успешно удален.")
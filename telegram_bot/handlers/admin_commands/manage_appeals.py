@@ -1,14 +1,13 @@
-import os
-
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, CallbackQuery, FSInputFile
-from asgiref.sync import sync_to_async
+from aiogram.types import Message, CallbackQuery
 
 from .utils import PREVIEW_LENGTH, AppealState, get_appeal_details, get_appeal_keyboard, update_appeal_status, \
     format_appeal_response
 from ...models import Appeal, StatusChoices
+from ...tools.appeal_file_sender import answer_appeal_file
 from ...tools.main_logger import logger
+from ...tools import repository
 
 router = Router()
 
@@ -94,18 +93,16 @@ async def view_file(callback: CallbackQuery):
 
     try:
         # Получаем обращение
-        appeal = await sync_to_async(Appeal.objects.get)(id=appeal_id)
-
-        # Проверяем, что файл существует
-        if appeal.file_path and hasattr(appeal.file_path, 'path') and os.path.exists(appeal.file_path.path):
-            # Отправляем файл пользователю с эмодзи
-            file = FSInputFile(appeal.file_path.path)
-            await callback.message.answer_document(
-                file,
-                caption="📎 <b>Файл успешно загружен.</b>",
-                parse_mode='HTML'
-            )
-        else:
+        appeal = await repository.get_appeal(appeal_id)
+
+        # Отправляем файл (по сохранённому file_id, если файл уже загружался в Telegram)
+        sent = await answer_appeal_file(
+            callback.message,
+            appeal,
+            caption="📎 <b>Файл успешно загружен.</b>",
+            parse_mode='HTML'
+        )
+        if not sent:
             await callback.message.answer(
                 "❌ <b>Файл не найден.</b>",
                 parse_mode='HTML'
@@ -230,7 +227,7 @@ async def delete_appeal(callback: CallbackQuery):
 
     try:
         # Удаляем обращение
-        await sync_to_async(Appeal.objects.filter(id=appeal_id).delete)()
+        await repository.delete_appeal(appeal_id)
 
         # Отправляем сообщение об успешном удалении с эмодзи
         await callback.message.edit_text(
@@ -3,10 +3,10 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from asgiref.sync import sync_to_async
 from django.db.utils import IntegrityError
 
-from ...models import CommissionInfo
+from ...tools import repository
+from ...tools.commission_cache import commission_cache
 
 # Создаем роутер для обработки команд
 router = Router()
@@ -44,7 +44,7 @@ async def process_commission_name(message: Message, state: FSMContext):
     commission_name = message.text.strip()
 
     # Проверяем существование комиссии с таким названием
-    commission_exists = await sync_to_async(CommissionInfo.objects.filter(name=commission_name).exists)()
+    commission_exists = await repository.commission_name_exists(commission_name)
 
     if commission_exists:
         await message.answer(
@@ -68,7 +68,7 @@ async def process_commission_description(message: Message, state: FSMContext):
 
     try:
         # Создаем новую комиссию
-        await sync_to_async(CommissionInfo.objects.create)(
+        await repository.create_commission(
             name=commission_name,
             description=commission_description
         )
@@ -94,8 +94,8 @@ async def process_commission_description(message: Message, state: FSMContext):
 # Обработчик для удаления комиссии
 @router.callback_query(F.data == "delete_commissions")
 async def delete_commissions(callback: CallbackQuery):
-    # Получаем все комиссии из базы данных
-    commissions = await sync_to_async(list)(CommissionInfo.objects.all())
+    # Получаем все комиссии из кеша каталога (сбрасывается при изменении комиссий)
+    commissions = (await commission_cache.aget()).commissions
 
     if commissions:
         # Создаем инлайн-клавиатуру для каждой комиссии
@@ -121,8 +121,11 @@ async def confirm_delete_commission(callback: CallbackQuery):
     # Получаем ID комиссии из callback_data
     commission_id = int(callback.data.split(":")[1])
 
-    # Получаем комиссию из базы данных
-    commission = await sync_to_async(CommissionInfo.objects.get)(id=commission_id)
+    # Получаем комиссию из кеша каталога
+    commission = (await commission_cache.aget()).get(commission_id)
+    if commission is None:
+        await callback.answer("Комиссия не найдена.", show_alert=True)
+        return
 
     # Создаем клавиатуру для подтверждения удаления
     builder = InlineKeyboardBuilder()
@@ -144,7 +147,7 @@ async def delete_commission(callback: CallbackQuery):
     commission_id = int(callback.data.split(":")[1])
 
     # Удаляем комиссию из базы данных
-    await sync_to_async(CommissionInfo.objects.filter(id=commission_id).delete)()
+    await repository.delete_commission(commission_id)
 
     # Подтверждаем удаление
     await callback.answer(f"Комиссия удалена.")
@@ -1,10 +1,10 @@
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from asgiref.sync import sync_to_async
 
-from ...models import Appeal, StatusChoices
+from ...models import StatusChoices
 from ...tools.main_logger import logger
+from ...tools import repository
 
 PREVIEW_LENGTH = 300  # Количество символов для предпросмотра текста обращения
 
@@ -64,14 +64,12 @@ async def get_appeal_details(appeal_id: int):
     :param appeal_id: ID обращения.
     :return: Кортеж (обращение, имя пользователя, название комиссии, текстовый статус).
     """
-    # Получаем обращение с использованием select_related
-    appeal = await sync_to_async(Appeal.objects.select_related('user', 'commission').get)(id=appeal_id)
+    # Получаем обращение вместе с пользователем и комиссией одним запросом
+    appeal = await repository.get_appeal(appeal_id, 'user', 'commission')
 
-    # Получаем данные пользователя через sync_to_async
-    user_info = await sync_to_async(lambda: appeal.user.username if appeal.user else "Неизвестен")()
-
-    # Получаем название комиссии через sync_to_async
-    commission_name = await sync_to_async(lambda: appeal.commission.name if appeal.commission else "Комиссия не указана")()
+    # Связанные объекты уже загружены: обращения к БД нет
+    user_info = appeal.user.username if appeal.user else "Неизвестен"
+    commission_name = appeal.commission.name if appeal.commission else "Комиссия не указана"
 
     # Определяем текст статуса из APPEAL_STATUSES
     status_display = next((status[1] for status in StatusChoices.APPEAL_STATUSES if status[0] == appeal.status), "Неизвестный статус")
@@ -95,7 +93,7 @@ async def update_appeal_status(callback: CallbackQuery, new_status: str):
         appeal.status = new_status
 
         # Сохраняем объект, чтобы сработал сигнал pre_save
-        await sync_to_async(appeal.save)()
+        await appeal.asave()
 
         # Формируем ответ с помощью функции format_appeal_response
         response = format_appeal_response(
@@ -5,11 +5,10 @@ from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
-from asgiref.sync import sync_to_async
 
-from ...models import AdminRequest, User
+from ...models import User
+from ...tools import repository
 from ...tools.check_admin_requests import check_admin_requests
-from ...tools.main_logger import logger
 
 # Создаем роутер для обработки команд
 router = Router()
@@ -57,36 +56,15 @@ async def submit_admin_request(
 
 # Обработчик ввода должности
 @router.message(StateFilter(AdminRequestState.waiting_for_position))
-async def process_position(message: Message, state: FSMContext):
-    # Получаем Telegram ID пользователя
-    telegram_id = message.from_user.id
+async def process_position(message: Message, state: FSMContext, user: User):
+    # Пользователь получен из middleware (зарегистрированность уже проверена)
+    # Создаем новую заявку, удалив старые отклонённые заявки пользователя
+    await repository.submit_admin_request(user, message.text)
+
+    # Отправляем подтверждение
+    await message.answer(
+        f"Ваша заявка на должность '{message.text}' успешно отправлена. Ожидайте одобрения."
+    )
 
-    try:
-        # Находим пользователя в базе данных
-        user = await sync_to_async(User.objects.get)(telegram_id=telegram_id)
-
-        # Проверяем, есть ли у пользователя отклонённые заявки
-        rejected_requests_exist = await sync_to_async(
-            AdminRequest.objects.filter(user=user, status='rejected').exists
-        )()
-        if rejected_requests_exist:
-            # Удаляем все отклонённые заявки
-            await sync_to_async(AdminRequest.objects.filter(user=user, status='rejected').delete)()
-            logger.info("Старые отклонённые заявки пользователя были удалены.")
-
-        # Создаем новую заявку
-        await sync_to_async(AdminRequest.objects.create)(
-            user=user,
-            admin_position=message.text
-        )
-
-        # Отправляем подтверждение
-        await message.answer(
-            f"Ваша заявка на должность '{message.text}' успешно отправлена. Ожидайте одобрения."
-        )
-
-        # Сбрасываем состояние
-        await state.clear()
-
-    except User.DoesNotExist:
-        await message.answer("Произошла ошибка. Пожалуйста, начните с команды /start.")
\ No newline at end of file
+    # Сбрасываем состояние
+    await state.clear()
\ No newline at end of file
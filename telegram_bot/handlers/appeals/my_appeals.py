@@ -1,10 +1,9 @@
 from html import escape
 
 from aiogram import Router, F
-from aiogram.types import FSInputFile, InlineKeyboardButton
+from aiogram.types import InlineKeyboardButton
 from aiogram.types import Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from asgiref.sync import sync_to_async
 from django.utils.translation import gettext as _
 from aiogram.types import CallbackQuery
 
@@ -19,6 +18,8 @@ from .utils import (
     APPEAL_STATUS_MAPPING, generate_appeal_response
 )
 from ...models import Appeal
+from ...tools.appeal_file_sender import answer_appeal_file
+from ...tools import repository
 from ...tools.main_logger import logger
 
 router = Router()
@@ -31,11 +32,7 @@ async def track_appeal_status(message: Message, user=None):
     """
     try:
         # Получаем обращения с предзагрузкой комиссии
-        appeals = await sync_to_async(list)(
-            Appeal.objects.filter(user=user)
-            .select_related('commission')
-            .order_by('-id')  # Сначала новые
-        )
+        appeals = await repository.list_user_appeals(user)  # Сначала новые
 
         if not appeals:
             await message.answer("У вас пока нет обращений.")
@@ -77,9 +74,7 @@ async def track_appeal_status(message: Message, user=None):
 async def show_appeal_detail(callback: CallbackQuery):
     try:
         appeal_id = int(callback.data.split(":")[1])
-        appeal = await sync_to_async(
-            Appeal.objects.select_related('commission').get
-        )(id=appeal_id)
+        appeal = await repository.get_appeal(appeal_id, 'commission')
 
         # Генерируем ответ и клавиатуру
         response, builder = await generate_appeal_response(appeal)
@@ -107,15 +102,10 @@ async def view_file(callback_query: CallbackQuery):
         appeal_id = int(callback_query.data.split(":")[1])
 
         # Находим обращение в базе данных
-        appeal = await sync_to_async(Appeal.objects.get)(id=appeal_id)
-
-        # Проверяем, существует ли файл
-        if appeal.file_path and appeal.file_path.storage.exists(appeal.file_path.name):
-            # Отправляем файл пользователю
-            file_path = appeal.file_path.path  # Полный путь к файлу
-            file = FSInputFile(file_path)
-            await callback_query.message.answer_document(file)
-        else:
+        appeal = await repository.get_appeal(appeal_id)
+
+        # Отправляем файл пользователю (по сохранённому file_id, если файл уже загружался в Telegram)
+        if not await answer_appeal_file(callback_query.message, appeal):
             # Если файл не найден, отправляем сообщение об ошибке
             await callback_query.message.answer("Файл не найден.")
 
@@ -134,9 +124,7 @@ async def view_file(callback_query: CallbackQuery):
 async def show_full_appeal(callback: CallbackQuery):
     try:
         appeal_id = int(callback.data.split(":")[1])
-        appeal = await sync_to_async(
-            Appeal.objects.select_related('commission').get
-        )(id=appeal_id)
+        appeal = await repository.get_appeal(appeal_id, 'commission')
 
         # Получаем данные статуса
         status_data = APPEAL_STATUS_MAPPING.get(appeal.status.lower(), {
@@ -231,20 +219,10 @@ async def request_delete_confirmation(callback: CallbackQuery):
 async def confirm_delete_appeal(callback: CallbackQuery):
     try:
         appeal_id = int(callback.data.split(":")[1])
-        appeal = await sync_to_async(Appeal.objects.get)(id=appeal_id)
+        appeal = await repository.get_appeal(appeal_id)
 
-        # Удаляем файл, если он есть (с улучшенным логированием)
-        if appeal.file_path:
-            try:
-                file_path = appeal.file_path.name
-                storage = appeal.file_path.storage
-                await sync_to_async(storage.delete)(file_path)
-                logger.info(f"Файл обращения {appeal_id} успешно удалён: {file_path}")
-            except Exception as file_error:
-                logger.error(f"Ошибка удаления файла обращения {appeal_id}: {file_error}")
-
-        # Удаляем запись
-        await sync_to_async(appeal.delete)()
+        # Удаляем запись (файл удаляется сигналом post_delete, если на него больше нет ссылок)
+        await appeal.adelete()
         logger.info(f"Обращение {appeal_id} успешно удалено")
 
         # Форматируем сообщение об успехе с HTML
@@ -6,12 +6,15 @@ from aiogram.types import CallbackQuery
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from asgiref.sync import sync_to_async
 from decouple import config
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError
 from django.utils.translation import gettext as _
 
 from ...models import Appeal, StatusChoices
-from ...models import CommissionInfo, User
+from ...tools import repository
+from ...tools.check_is_registred import get_user_by_telegram_id
+from ...tools.commission_cache import commission_cache
 from ...tools.main_logger import logger
+from ...tools.user_cache import user_cache
 
 # ===================== КОНСТАНТЫ ФОРМАТИРОВАНИЯ =====================
 PREVIEW_LENGTH = 300  # Количество символов для предпросмотра текста обращения
@@ -118,9 +121,7 @@ async def process_appeal(
         appeal_id = int(callback.data.split(":")[1])
 
         # Получаем полные данные обращения
-        appeal = await sync_to_async(
-            Appeal.objects.select_related('commission').get
-        )(id=appeal_id)
+        appeal = await repository.get_appeal(appeal_id, 'commission')
 
         # Генерируем стандартный ответ с HTML-разметкой
         response, builder = await generate_appeal_response(appeal)
@@ -159,39 +160,48 @@ MAX_TXT_LENGTH = int(config('MAX_TXT_LENGTH'))
 MAX_FILE_SIZE = int(config('MAX_FILE_SIZE'))
 
 # Функция для сохранения обращения в базу данных
-@sync_to_async
-def save_appeal_to_db(data, telegram_id, django_file=None, original_file_name=None):
+async def save_appeal_to_db(data, telegram_id, file_name=None, original_file_name=None):
     """
     Сохраняет обращение в базу данных.
+    Пользователь и комиссия проверяются по кешам (пользователей и каталога комиссий),
+    поэтому в БД выполняется только вставка обращения. Если пользователь или комиссия удалены в другом
+    процессе, а кеш ещё не сброшен, вставка нарушает внешний ключ: по БД проверяется, чья ссылка устарела,
+    и её кеш сбрасывается. Для пользователя вставка повторяется, если он зарегистрирован заново.
+    :param file_name: Имя уже сохранённого в хранилище файла вложения.
+    :param original_file_name: Исходное имя файла вложения.
     """
-    try:
-        # Получаем пользователя по telegram_id
-        user = User.objects.get(telegram_id=telegram_id)
-    except ObjectDoesNotExist:
+    # Получаем пользователя по telegram_id
+    user = await get_user_by_telegram_id(telegram_id)
+    if user is None:
         raise ValueError("Пользователь с указанным telegram_id не найден.")
 
-    try:
-        # Получаем комиссию по ID
-        commission = CommissionInfo.objects.get(id=data["commission_id"])
-    except ObjectDoesNotExist:
+    # Проверяем комиссию по ID
+    if (await commission_cache.aget()).get(data["commission_id"]) is None:
         raise ValueError("Комиссия с указанным ID не найдена.")
 
-    # Создаем объект обращения
-    appeal = Appeal(
-        user=user,
-        commission=commission,
-        appeal_text=data["appeal_text"],
-        contact_info=data.get("contact_info"),
-        status=StatusChoices.NEW
-    )
-
-    # Если файл передан, сохраняем его
-    if django_file and original_file_name:
-        appeal.file_path.save(original_file_name, django_file)
-
-    # Сохраняем обращение в базу данных
-    appeal.save()
-    return appeal
+    # Сохраняем обращение в базу данных (файл, если передан, уже записан в хранилище)
+    for attempt in range(2):
+        try:
+            return await repository.create_appeal(
+                user_id=user.id,
+                commission_id=data["commission_id"],
+                appeal_text=data["appeal_text"],
+                contact_info=data.get("contact_info"),
+                file_name=file_name,
+                original_file_name=original_file_name
+            )
+        except IntegrityError:
+            if not await repository.commission_exists(data["commission_id"]):
+                logger.warning(f"Комиссия {data['commission_id']} из кеша не найдена в БД, кеш комиссий сброшен.")
+                await sync_to_async(commission_cache.invalidate)()
+                raise ValueError("Комиссия с указанным ID не найдена.")
+            if attempt or await repository.user_exists(user.id):
+                raise
+            logger.warning(f"Пользователь {telegram_id} из кеша не найден в БД при сохранении обращения, кеш сброшен.")
+            await sync_to_async(user_cache.invalidate)(telegram_id)
+            user = await get_user_by_telegram_id(telegram_id)
+            if user is None:
+                raise ValueError("Пользователь с указанным telegram_id не найден.")
 
 # Класс для хранения состояний
 class AppealForm(StatesGroup):
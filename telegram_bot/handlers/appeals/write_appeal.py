@@ -1,15 +1,16 @@
-import os
 import re
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from asgiref.sync import sync_to_async
-from django.core.files import File
 from .utils import PHONE_PATTERN, EMAIL_PATTERN, MIN_TXT_LENGTH, MAX_TXT_LENGTH, save_appeal_to_db, MAX_FILE_SIZE, \
     AppealForm
-from ...models import CommissionInfo
+from ...storage import attachment_storage
+from ...tools.attachment_ingest import AttachmentTooLarge, delete_attachment, save_telegram_file
+from ...tools.attachment_variants import schedule_variants
+from ...tools.commission_cache import commission_cache
+from ...tools.db_pool import release_connection, run_in_thread
 from ...tools.main_logger import logger
 
 router = Router()
@@ -23,8 +24,8 @@ async def start_appeal_form(message: Message, state: FSMContext, user=None):
     :param user: Пользователь, полученный из middleware
     """
     try:
-        # Получаем все комиссии из базы данных
-        commissions = await sync_to_async(list)(CommissionInfo.objects.all())
+        # Получаем все комиссии из кеша каталога
+        commissions = (await commission_cache.aget()).commissions
 
         if commissions:
             # Создаем inline-клавиатуру с кнопками для каждой комиссии
@@ -286,7 +287,7 @@ async def process_file_upload(message: Message, state: FSMContext):
             file_id = message.document.file_id
             file_info = await message.bot.get_file(file_id)
             file_size = message.document.file_size  # Размер документа в байтах
-            original_file_name = message.document.file_name
+            original_file_name = message.document.file_name or f"{message.from_user.id}_document"
 
         else:
             await message.answer(
@@ -296,7 +297,7 @@ async def process_file_upload(message: Message, state: FSMContext):
             return
 
         # Проверяем размер файла
-        if file_size > MAX_FILE_SIZE:
+        if file_size and file_size > MAX_FILE_SIZE:
             await message.answer(
                 f"❌ <b>Размер файла слишком большой.</b>\n\n"
                 f"Максимальный допустимый размер: {MAX_FILE_SIZE // (1024 * 1024)} MB.",
@@ -304,25 +305,32 @@ async def process_file_upload(message: Message, state: FSMContext):
             )
             return
 
-        # Путь к временной папке
-        temp_dir = os.path.join(os.getcwd(), 'tmp')
-        os.makedirs(temp_dir, exist_ok=True)  # Создаем папку tmp, если её нет
-
-        # Полный путь к временному файлу
-        temp_file_path = os.path.join(temp_dir, original_file_name)
-
-        # Скачиваем файл во временную папку
-        await message.bot.download_file(file_info.file_path, temp_file_path)
-
-        # Открываем временный файл для загрузки через Django
-        with open(temp_file_path, 'rb') as f:
-            django_file = File(f)
-            # Сохраняем данные в базу данных
-            data = await state.get_data()
-            await save_appeal_to_db(data, message.from_user.id, django_file, original_file_name)
+        # Скачиваем файл потоком сразу в хранилище (без временной папки и повторного копирования).
+        # Скачивание может длиться минуты: соединение с БД на это время возвращается в пул
+        await release_connection()
+        try:
+            attachment = await save_telegram_file(
+                message.bot, file_info.file_path, original_file_name, max_size=MAX_FILE_SIZE
+            )
+        except AttachmentTooLarge:
+            await message.answer(
+                f"❌ <b>Размер файла слишком большой.</b>\n\n"
+                f"Максимальный допустимый размер: {MAX_FILE_SIZE // (1024 * 1024)} MB.",
+                parse_mode='HTML'  # Включаем HTML-парсинг
+            )
+            return
 
-        # Удаляем временный файл после использования
-        os.remove(temp_file_path)
+        # Сохраняем данные в базу данных
+        data = await state.get_data()
+        try:
+            await save_appeal_to_db(data, message.from_user.id, attachment.name, original_file_name)
+        except Exception:
+            # Обращение не создано — снимаем ссылку на файл
+            await run_in_thread(delete_attachment, attachment.name)
+            raise
+
+        # Миниатюра и превью для изображений создаются в фоне, в пуле процессов
+        schedule_variants(attachment_storage, attachment.name, original_file_name)
 
         # Отправляем сообщение об успешной отправке обращения с эмодзи
         await message.answer(
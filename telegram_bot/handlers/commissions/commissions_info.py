@@ -1,9 +1,8 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-from asgiref.sync import sync_to_async
 from .utils import generate_commissions_keyboard
 
-from ...models import CommissionInfo
+from ...tools.commission_cache import commission_cache
 from ...tools.main_logger import logger
 
 router = Router()
@@ -16,8 +15,8 @@ async def show_commissions(message: Message):
     Отправляет список комиссий с inline-кнопками.
     """
     try:
-        # Получаем все комиссии из базы данных
-        commissions = await sync_to_async(list)(CommissionInfo.objects.all())
+        # Получаем все комиссии из кеша каталога
+        commissions = (await commission_cache.aget()).commissions
 
         if not commissions:
             await message.answer("Список комиссий пуст.")
@@ -48,8 +47,11 @@ async def show_commission_info(callback_query: CallbackQuery):
         # Извлекаем ID комиссии из callback_data
         commission_id = int(callback_query.data.split(":")[1])
 
-        # Находим комиссию в базе данных
-        commission = await sync_to_async(CommissionInfo.objects.get)(id=commission_id)
+        # Находим комиссию в кеше каталога
+        commission = (await commission_cache.aget()).get(commission_id)
+        if commission is None:
+            await callback_query.message.edit_text("Комиссия не найдена. Попробуйте снова.")
+            return
 
         # Формируем ответное сообщение с HTML-стилизацией, эмодзи и увеличенными межстрочными интервалами
         response = (
@@ -73,8 +75,6 @@ async def show_commission_info(callback_query: CallbackQuery):
             parse_mode='HTML'  # Передаем parse_mode как строку
         )
 
-    except CommissionInfo.DoesNotExist:
-        await callback_query.message.edit_text("Комиссия не найдена. Попробуйте снова.")
     except Exception as e:
         logger.error(f"Ошибка при получении информации о комиссии: {e}")
         await callback_query.message.edit_text("Произошла ошибка. Пожалуйста, попробуйте позже.")
@@ -88,8 +88,8 @@ async def go_back_to_commissions(callback_query: CallbackQuery):
     Возвращает пользователя к списку комиссий.
     """
     try:
-        # Получаем все комиссии из базы данных
-        commissions = await sync_to_async(list)(CommissionInfo.objects.all())
+        # Получаем все комиссии из кеша каталога
+        commissions = (await commission_cache.aget()).commissions
 
         if not commissions:
             await callback_query.message.edit_text("Список комиссий пуст.")
@@ -1,10 +1,9 @@
 from aiogram import Router
 from aiogram.filters.command import Command
 from aiogram.types import Message
-from asgiref.sync import sync_to_async
 
 from ...keyboards.start_kb import start_keyboard
-from ...models import User
+from ...tools import repository
 
 # Инициализация роутера
 router = Router()
@@ -17,18 +16,12 @@ async def cmd_start(message: Message):
     - Создает или обновляет пользователя в базе данных.
     - Отправляет приветственное сообщение с клавиатурой.
     """
-    # Подготовка данных пользователя
-    user_data = {
-        "telegram_id": message.from_user.id,
-        "username": message.from_user.username or "",
-        "first_name": message.from_user.first_name or "",
-        "last_name": message.from_user.last_name or "",
-    }
-
-    # Создание или обновление пользователя в базе данных
-    await sync_to_async(User.objects.update_or_create)(
-        telegram_id=user_data["telegram_id"],
-        defaults=user_data
+    # Создание или обновление пользователя в базе данных (без записи, если данные не изменились)
+    await repository.register_user(
+        telegram_id=message.from_user.id,
+        username=message.from_user.username or "",
+        first_name=message.from_user.first_name or "",
+        last_name=message.from_user.last_name or "",
     )
 
     # Отправка приветственного сообщения
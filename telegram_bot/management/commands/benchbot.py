@@ -0,0 +1,192 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiohttp import ClientSession, TCPConnector, web
+from django.core.management.base import BaseCommand
+
+from telegram_bot.tools.webhook_server import SECRET_TOKEN_HEADER, UpdateWorkerPool, create_webhook_app
+
+BENCH_TOKEN = '123456:benchmark-token'
+BENCH_SECRET = 'benchmark-secret'
+
+
+class FakeTelegram:
+    """
+    Минимальная имитация Bot API: отдаёт заранее сгенерированные апдейты через getUpdates
+    и подтверждает sendMessage и остальные методы.
+    """
+
+    def __init__(self, updates: list[dict]):
+        self.updates = updates
+        self.calls = defaultdict(int)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] += 1
+        data = await request.post()
+
+        if method == 'getMe':
+            result = {'id': 123456, 'is_bot': True, 'first_name': 'benchmark', 'username': 'benchmark_bot'}
+        elif method == 'getUpdates':
+            offset = int(data.get('offset') or 0)
+            limit = int(data.get('limit') or 100)
+            result = [update for update in self.updates[max(offset - 1, 0):] if update['update_id'] >= offset][:limit]
+            if not result:
+                await asyncio.sleep(0.05)  # Имитация long polling без новых апдейтов
+        elif method == 'sendMessage':
+            result = {
+                'message_id': self.calls[method],
+                'date': int(time.time()),
+                'chat': {'id': int(data['chat_id']), 'type': 'private'},
+                'text': data.get('text', ''),
+            }
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
+
+
+def generate_updates(count: int, chats: int) -> list[dict]:
+    """
+    Генерирует текстовые сообщения от chats пользователей; текст — порядковый номер сообщения в чате.
+    """
+    sequence = defaultdict(int)
+    updates = []
+    for update_id in range(1, count + 1):
+        chat_id = random.randint(1, chats)
+        sequence[chat_id] += 1
+        updates.append({
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': f'user{chat_id}'},
+                'text': str(sequence[chat_id]),
+            },
+        })
+    return updates
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест приёма апдейтов: локальный фейковый Telegram, '
+        'сравнение пропускной способности long polling и вебхука с пулом воркеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['polling', 'webhook', 'both'], default='both')
+        parser.add_argument('--updates', type=int, default=5000, help='Количество апдейтов')
+        parser.add_argument('--chats', type=int, default=500, help='Количество разных пользователей')
+        parser.add_argument('--handler-delay', type=float, default=0.02, help='Среднее время работы обработчика (сек.)')
+        parser.add_argument('--workers', type=int, default=100, help='Воркеров в пуле вебхука')
+        parser.add_argument('--concurrency', type=int, default=100, help='Параллельных соединений Telegram к вебхуку')
+        parser.add_argument('--port', type=int, default=18080, help='Порт фейкового Telegram (вебхук: port + 1)')
+
+    def handle(self, *args, **options):
+        updates = generate_updates(options['updates'], options['chats'])
+        modes = ['polling', 'webhook'] if options['mode'] == 'both' else [options['mode']]
+        for mode in modes:
+            elapsed, violations = asyncio.run(getattr(self, f'bench_{mode}')(updates, options))
+            self.stdout.write(self.style.SUCCESS(
+                f"{mode}: {len(updates)} апдейтов за {elapsed:.2f} сек. — {len(updates) / elapsed:.0f} апдейтов/сек., "
+                f"нарушений порядка внутри чата: {violations}"
+            ))
+
+    def create_dispatcher(self, total: int, handler_delay: float):
+        """
+        Создаёт диспетчер с обработчиком, имитирующим работу (ожидание + ответ пользователю),
+        и проверкой порядка сообщений внутри чата.
+        """
+        router = Router()
+        done = asyncio.Event()
+        state = {'processed': 0, 'violations': 0, 'last': defaultdict(int)}
+
+        @router.message()
+        async def handle_message(message: Message):
+            # Разброс времени обработки (запросы к БД, загрузка файлов) выявляет нарушения порядка
+            await asyncio.sleep(random.expovariate(1 / handler_delay) if handler_delay else 0)
+            sequence = int(message.text)
+            if sequence < state['last'][message.chat.id]:
+                state['violations'] += 1
+            state['last'][message.chat.id] = sequence
+            await message.answer('ok')
+
+            state['processed'] += 1
+            if state['processed'] >= total:
+                done.set()
+
+        dp = Dispatcher()
+        dp.include_router(router)
+        return dp, done, state
+
+    async def start_fake_telegram(self, updates: list[dict], port: int):
+        runner = web.AppRunner(FakeTelegram(updates).create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        bot = Bot(BENCH_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(f'http://127.0.0.1:{port}')))
+        return runner, bot
+
+    async def bench_polling(self, updates: list[dict], options: dict):
+        runner, bot = await self.start_fake_telegram(updates, options['port'])
+        dp, done, state = self.create_dispatcher(len(updates), options['handler_delay'])
+
+        started = time.monotonic()
+        polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+        await done.wait()
+        elapsed = time.monotonic() - started
+
+        await dp.stop_polling()
+        await polling
+        await runner.cleanup()
+        return elapsed, state['violations']
+
+    async def bench_webhook(self, updates: list[dict], options: dict):
+        runner, bot = await self.start_fake_telegram(updates, options['port'])
+        dp, done, state = self.create_dispatcher(len(updates), options['handler_delay'])
+
+        pool = UpdateWorkerPool(dp, bot, workers=options['workers'])
+        pool.start()
+        webhook_runner = web.AppRunner(create_webhook_app(pool, BENCH_SECRET, path='/webhook'), access_log=None)
+        await webhook_runner.setup()
+        await web.TCPSite(webhook_runner, '127.0.0.1', options['port'] + 1).start()
+
+        # Telegram доставляет апдейты вебхуку не более чем в max_connections параллельных соединений;
+        # внутри одного чата следующий апдейт отправляется только после ответа на предыдущий
+        by_chat = defaultdict(list)
+        for update in updates:
+            by_chat[update['message']['chat']['id']].append(update)
+        chat_queue = asyncio.Queue()
+        for chat_updates in by_chat.values():
+            chat_queue.put_nowait(chat_updates)
+
+        url = f"http://127.0.0.1:{options['port'] + 1}/webhook"
+        headers = {SECRET_TOKEN_HEADER: BENCH_SECRET}
+
+        async def deliver(session: ClientSession):
+            while not chat_queue.empty():
+                for update in chat_queue.get_nowait():
+                    async with session.post(url, json=update, headers=headers) as response:
+                        response.raise_for_status()
+
+        started = time.monotonic()
+        async with ClientSession(connector=TCPConnector(limit=options['concurrency'])) as session:
+            await asyncio.gather(*(deliver(session) for _ in range(options['concurrency'])))
+        await done.wait()
+        elapsed = time.monotonic() - started
+
+        await webhook_runner.cleanup()
+        await pool.stop()
+        await bot.session.close()
+        await runner.cleanup()
+        return elapsed, state['violations']
@@ -0,0 +1,206 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from telegram_bot.management.commands.benchbot import BENCH_TOKEN, FakeTelegram
+from telegram_bot.management.commands.benchhttp import percentile
+from telegram_bot.models import AdminRequest, Appeal, CommissionInfo, User
+from telegram_bot.tools.db_pool import collect_stats, configure_process
+
+# Тестовые пользователи создаются с telegram_id от этого значения и удаляются после теста
+BENCH_TELEGRAM_ID_BASE = 9_000_000_000_000
+BENCH_COMMISSION_NAME = '__benchhandlers__'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест обработчиков бота на реальной БД: одновременные пользователи проходят сценарии '
+        '(список и карточка обращения, /start, заявки и обращения в админ-панели) через диспетчер бота '
+        'и локальный фейковый Telegram; выводятся задержки обработки апдейта и число запросов к БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Одновременных пользователей')
+        parser.add_argument('--admins', type=int, default=20, help='Из них администраторов')
+        parser.add_argument('--appeals', type=int, default=5, help='Обращений у каждого пользователя')
+        parser.add_argument('--pending', type=int, default=10, help='Заявок на администратора в ожидании')
+        parser.add_argument('--rounds', type=int, default=3, help='Сколько раз каждый пользователь проходит сценарий')
+        parser.add_argument('--port', type=int, default=18085, help='Порт фейкового Telegram')
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0,
+            help='Добавить задержку к каждому запросу к БД (как у удалённого PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        # Диспетчер с роутерами и middleware бота (импорт здесь: модуль создаёт бота и хранилище FSM)
+        from telegram_bot.bot import dp
+
+        # Соединения с БД как у процесса бота (DB_POOL_MAX_SIZE_BOT в режиме pool)
+        configure_process('bot')
+        self.cleanup()
+        try:
+            users, admins = self.seed(options)
+            latencies, queries, elapsed = asyncio.run(self.bench(dp, users, admins, options))
+            pool_stats = collect_stats()
+        finally:
+            self.cleanup()
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['users']} пользователей, {total} апдейтов за {elapsed:.2f} сек. — "
+            f"{total / elapsed:.0f} апдейтов/сек., запросов к БД: {queries} ({queries / total:.2f} на апдейт)"
+        ))
+        for step, values in latencies.items():
+            self.stdout.write(
+                f"  {step}: {len(values)} апдейтов, задержка p50/p95/p99: {percentile(values, 0.5) * 1000:.1f}/"
+                f"{percentile(values, 0.95) * 1000:.1f}/{percentile(values, 0.99) * 1000:.1f} мс"
+            )
+        self.stdout.write(f"Соединения с БД ({pool_stats['mode']}): {pool_stats}")
+
+    def seed(self, options: dict) -> tuple[list[tuple[User, list[int]]], list[tuple[User, list[int]]]]:
+        """
+        Создаёт тестовых пользователей, комиссию, обращения и заявки на администратора.
+        :return: Пользователи и администраторы вместе с ID их обращений.
+        """
+        commission = CommissionInfo.objects.create(name=BENCH_COMMISSION_NAME, description='Нагрузочный тест')
+        created = User.objects.bulk_create([
+            User(
+                telegram_id=BENCH_TELEGRAM_ID_BASE + number,
+                # Те же данные, что и в апдейтах: повторный /start не меняет пользователя
+                first_name='bench',
+                is_admin=number < options['admins'],
+            )
+            for number in range(options['users'])
+        ])
+        # Длинный текст: карточка обращения показывает кнопку "Показать полностью"
+        Appeal.objects.bulk_create([
+            Appeal(user=user, commission=commission, appeal_text='Текст обращения. ' * 30)
+            for user in created for _ in range(options['appeals'])
+        ])
+        AdminRequest.objects.bulk_create([
+            AdminRequest(user=user, admin_position='Нагрузочный тест')
+            for user in created[options['admins']:options['admins'] + options['pending']]
+        ])
+
+        appeal_ids = defaultdict(list)
+        for user_id, appeal_id in Appeal.objects.filter(user__in=created).values_list('user_id', 'id'):
+            appeal_ids[user_id].append(appeal_id)
+        with_appeals = [(user, appeal_ids[user.id]) for user in created]
+        return with_appeals[options['admins']:], with_appeals[:options['admins']]
+
+    def cleanup(self):
+        # Обращения и заявки удаляются каскадом
+        User.objects.filter(telegram_id__gte=BENCH_TELEGRAM_ID_BASE).delete()
+        CommissionInfo.objects.filter(name=BENCH_COMMISSION_NAME).delete()
+
+    @staticmethod
+    def user_scenario(appeal_ids: list[int]) -> list[tuple[str, str, str]]:
+        appeal_id = random.choice(appeal_ids)
+        return [
+            ('/start', 'message', '/start'),
+            ('Отследить статус обращения', 'message', 'Отследить статус обращения'),
+            ('appeal_detail', 'callback_query', f'appeal_detail:{appeal_id}'),
+            ('show_full', 'callback_query', f'show_full:{appeal_id}'),
+            ('collapse', 'callback_query', f'collapse:{appeal_id}'),
+            # Админ-команда от обычного пользователя: проверка заявки в CheckAdminMiddleware
+            ('/admin (не администратор)', 'message', '/admin'),
+        ]
+
+    @staticmethod
+    def admin_scenario(appeal_ids: list[int]) -> list[tuple[str, str, str]]:
+        appeal_id = random.choice(appeal_ids)
+        return [
+            ('view_pending_requests', 'callback_query', 'view_pending_requests'),
+            ('appeal_show_full (админ)', 'callback_query', f'appeal_show_full_{appeal_id}'),
+            ('appeal_collapse (админ)', 'callback_query', f'appeal_collapse_{appeal_id}'),
+            ('delete_commissions', 'callback_query', 'delete_commissions'),
+        ]
+
+    @staticmethod
+    def make_update(update_id: int, telegram_id: int, kind: str, payload: str) -> dict:
+        sender = {'id': telegram_id, 'is_bot': False, 'first_name': 'bench'}
+        message = {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': telegram_id, 'type': 'private'},
+            'from': sender,
+            'text': payload,
+        }
+        if kind == 'message':
+            return {'update_id': update_id, 'message': message}
+        return {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id),
+                'from': sender,
+                'chat_instance': str(telegram_id),
+                'message': {**message, 'text': 'bench'},
+                'data': payload,
+            },
+        }
+
+    async def bench(self, dp, users: list, admins: list, options: dict) -> tuple[dict, int, float]:
+        runner = web.AppRunner(FakeTelegram([]).create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', options['port']).start()
+        bot = Bot(
+            BENCH_TOKEN,
+            session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{options['port']}"))
+        )
+
+        # Запросы считаем на каждом соединении: в режиме pool апдейты обращаются к БД из собственных потоков,
+        # иначе — из общего потока sync_to_async
+        queries = 0
+        lock = threading.Lock()
+        db_latency = options['db_latency_ms'] / 1000
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            with lock:
+                queries += 1
+            if db_latency:
+                time.sleep(db_latency)
+            return execute(sql, params, many, context)
+
+        def install_counter(connection, **kwargs):
+            if count_queries not in connection.execute_wrappers:
+                connection.execute_wrappers.append(count_queries)
+
+        connection_created.connect(install_counter)
+        await sync_to_async(lambda: install_counter(connection))()
+
+        latencies = defaultdict(list)
+        update_ids = itertools.count(1)
+
+        async def simulate(user: User, appeal_ids: list[int], scenario):
+            for _ in range(options['rounds']):
+                for step, kind, payload in scenario(appeal_ids):
+                    update = self.make_update(next(update_ids), user.telegram_id, kind, payload)
+                    started = time.perf_counter()
+                    await dp.feed_raw_update(bot, update)
+                    latencies[step].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(simulate(user, appeal_ids, self.user_scenario) for user, appeal_ids in users),
+            *(simulate(user, appeal_ids, self.admin_scenario) for user, appeal_ids in admins),
+        )
+        elapsed = time.perf_counter() - started
+
+        connection_created.disconnect(install_counter)
+        await sync_to_async(lambda: connection.execute_wrappers.remove(count_queries))()
+        await bot.session.close()
+        await runner.cleanup()
+        return latencies, queries, elapsed
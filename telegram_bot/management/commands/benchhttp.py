@@ -0,0 +1,123 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientError, ClientSession, TCPConnector
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATH = '/telegram_bot/api/v1/service/commissions/'
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест HTTP API: запросы/сек. и задержки. Без --url по очереди запускает '
+        'runserver и manage.py serve (WSGI и ASGI) на свободном порту и сравнивает их'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Тестировать уже запущенный сервер (полный адрес страницы)')
+        parser.add_argument('--path', default=DEFAULT_PATH, help='Путь запроса при сравнении серверов')
+        parser.add_argument('--requests', type=int, default=3000, help='Количество запросов')
+        parser.add_argument('--concurrency', type=int, default=50, help='Параллельных соединений')
+        parser.add_argument('--port', type=int, default=18090, help='Порт для запускаемых серверов')
+        parser.add_argument('--serve-args', default='', help='Дополнительные аргументы manage.py serve (строкой)')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            self.report(options['url'], asyncio.run(self.bench(options['url'], options)))
+            return
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.compare_servers(options, os.path.join(tmp, 'serve.pid'))
+
+    def compare_servers(self, options: dict, pidfile: str):
+        """
+        Запускает серверы по очереди. У manage.py serve временный pid-файл: файл по умолчанию принадлежит
+        рабочему серверу, тестовый сервер перезаписал бы его и удалил при остановке, и
+        manage.py serve --graceful-reload перестал бы находить рабочий сервер.
+        """
+        address = f"127.0.0.1:{options['port']}"
+        url = f"http://{address}{options['path']}"
+        serve_args = ['--bind', address, '--pidfile', pidfile, *options['serve_args'].split()]
+        servers = {
+            'runserver': ['runserver', '--noreload', address],
+            'serve (wsgi)': ['serve', '--interface', 'wsgi', *serve_args],
+            'serve (asgi)': ['serve', '--interface', 'asgi', *serve_args],
+        }
+        for label, command in servers.items():
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), *command],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                asyncio.run(self.wait_ready(url, process))
+                self.report(label, asyncio.run(self.bench(url, options)))
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+
+    async def wait_ready(self, url: str, process: subprocess.Popen, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        async with ClientSession() as session:
+            while time.monotonic() < deadline:
+                if process.poll() is not None:
+                    raise CommandError(f"Сервер завершился при запуске (код {process.returncode}).")
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        return
+                except ClientError:
+                    await asyncio.sleep(0.2)
+        raise CommandError(f"Сервер не ответил за {timeout} сек.")
+
+    async def bench(self, url: str, options: dict) -> dict:
+        """
+        Отправляет options['requests'] GET-запросов в options['concurrency'] keep-alive соединений.
+        """
+        total = options['requests']
+        latencies = []
+        errors = 0
+        issued = 0
+
+        async def client(session: ClientSession):
+            nonlocal errors, issued
+            while issued < total:
+                issued += 1
+                started = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors += 1
+                except ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        connector = TCPConnector(limit=options['concurrency'])
+        async with ClientSession(connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(client(session) for _ in range(options['concurrency'])))
+            elapsed = time.perf_counter() - started
+
+        return {'requests': len(latencies), 'elapsed': elapsed, 'errors': errors, 'latencies': latencies}
+
+    def report(self, label: str, result: dict):
+        latencies = result['latencies']
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {result['requests']} запросов за {result['elapsed']:.2f} сек. — "
+            f"{result['requests'] / result['elapsed']:.0f} запросов/сек., ошибок: {result['errors']}, "
+            f"задержка p50/p95/p99: {percentile(latencies, 0.5) * 1000:.1f}/"
+            f"{percentile(latencies, 0.95) * 1000:.1f}/{percentile(latencies, 0.99) * 1000:.1f} мс"
+        ))
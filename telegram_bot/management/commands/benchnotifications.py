@@ -0,0 +1,132 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from telegram_bot.models import Notification
+
+# Индексы, добавленные миграцией 0009_notification_indexes
+BENCHMARK_INDEXES = ['notification_pending_idx', 'notification_sent_created_idx']
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк индексов таблицы уведомлений: заполняет временную копию таблицы тестовыми данными, '
+        'сравнивает планы и время запросов с индексами и без них, затем откатывает все изменения. '
+        'Рабочая таблица не изменяется и не блокируется'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Количество тестовых уведомлений')
+        parser.add_argument('--pending-ratio', type=float, default=0.01, help='Доля непосланных уведомлений')
+        parser.add_argument('--days', type=int, default=30, help='Разброс дат создания уведомлений (в днях)')
+        parser.add_argument('--cleanup-days', type=int, default=7, help='Возраст уведомлений для очистки (в днях)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Размер пачки при очистке')
+        parser.add_argument('--repeat', type=int, default=20, help='Количество повторов каждого запроса')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_scratch_table()
+            self.seed(options['rows'], options['pending_ratio'], options['days'])
+
+            queries = {
+                'Отправка (sent=False)': lambda: (
+                    Notification.objects
+                    .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now()), sent=False)
+                    .order_by('created_at', 'id')
+                    .values_list('id', flat=True)[:500]
+                ),
+                'Очистка (sent=True, created_at < cutoff)': lambda: (
+                    Notification.objects
+                    .filter(sent=True, created_at__lt=now() - timedelta(days=options['cleanup_days']))
+                    .order_by('created_at')
+                    .values_list('id', flat=True)[:options['chunk_size']]
+                ),
+            }
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\n=== С индексами ==='))
+            with_indexes = self.run_queries(queries, options['repeat'])
+
+            with connection.cursor() as cursor:
+                for index_name in BENCHMARK_INDEXES:
+                    # Схема указана явно: индекс рабочей таблицы с тем же именем не затрагивается
+                    cursor.execute(f'DROP INDEX pg_temp.{index_name}')
+                cursor.execute(f'ANALYZE pg_temp.{Notification._meta.db_table}')
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\n=== Без индексов ==='))
+            without_indexes = self.run_queries(queries, options['repeat'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\n=== Итог (медиана, мс) ==='))
+            for name in queries:
+                self.stdout.write(
+                    f"{name}: с индексами {with_indexes[name]:.2f}, без индексов {without_indexes[name]:.2f}, "
+                    f"ускорение x{without_indexes[name] / max(with_indexes[name], 0.001):.1f}"
+                )
+
+            # Временная таблица удаляется вместе с тестовыми данными
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('\nВременная таблица с тестовыми данными удалена (rollback).'))
+
+    def create_scratch_table(self):
+        """
+        Создаёт пустую временную копию таблицы уведомлений с индексами модели. Временная схема PostgreSQL
+        просматривается первой, поэтому до конца транзакции запросы ORM этого соединения обращаются к копии,
+        а DROP INDEX не берёт блокировку рабочей таблицы, которую ждали бы бот и API.
+        """
+        table = connection.ops.quote_name(Notification._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {table} (LIKE {table} INCLUDING DEFAULTS INCLUDING IDENTITY) ON COMMIT DROP'
+            )
+            cursor.execute(f'ALTER TABLE pg_temp.{table} ADD PRIMARY KEY (id)')
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for index in Notification._meta.indexes:
+                schema_editor.add_index(Notification, index)
+
+    def seed(self, rows: int, pending_ratio: float, days: int):
+        """
+        Заполняет временную таблицу уведомлений тестовыми данными одним INSERT ... SELECT generate_series.
+        """
+        self.stdout.write(f"Создание {rows} тестовых уведомлений...")
+        started = time.monotonic()
+
+        with connection.cursor() as cursor:
+            # Внешних ключей у копии нет: пользователь для тестовых уведомлений не нужен
+            cursor.execute(
+                f"""
+                INSERT INTO pg_temp.{Notification._meta.db_table} (user_id, message, sent, created_at, updated_at)
+                SELECT 0, 'benchmark', random() >= %s, now() - random() * (%s * interval '1 day'), now()
+                FROM generate_series(1, %s)
+                """,
+                [pending_ratio, days, rows]
+            )
+            cursor.execute(f'ANALYZE pg_temp.{Notification._meta.db_table}')
+
+        self.stdout.write(f"Готово за {time.monotonic() - started:.1f} сек.")
+
+    def run_queries(self, queries: dict, repeat: int) -> dict:
+        """
+        Выводит план (EXPLAIN ANALYZE) каждого запроса и возвращает медианное время выполнения в мс.
+        """
+        results = {}
+        for name, build_queryset in queries.items():
+            self.stdout.write(self.style.HTTP_INFO(f"\n{name}"))
+            self.stdout.write(build_queryset().explain(analyze=True, buffers=True))
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(build_queryset())
+                timings.append((time.perf_counter() - started) * 1000)
+
+            timings.sort()
+            results[name] = statistics.median(timings)
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f"Медиана: {results[name]:.2f} мс, p95: {p95:.2f} мс")
+
+        return results
\ No newline at end of file
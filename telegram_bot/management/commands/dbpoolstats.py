@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from telegram_bot.tools.db_pool import DB_POOL_STATS_INTERVAL, read_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Метрики соединений с БД процессов бота и воркеров API (последние значения, которые процессы '
+        'пишут в Redis раз в DB_POOL_STATS_INTERVAL секунд): занято/размер пула и ожидающие запросы сейчас, '
+        'среднее ожидание соединения и таймауты с запуска процесса'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Режим соединений: {settings.DB_POOL_MODE}, пул бота: {settings.DB_POOL_MAX_SIZE_BOT}, "
+            f"пул воркера API: {settings.DB_POOL_MAX_SIZE_WEB}, интервал метрик: {DB_POOL_STATS_INTERVAL} сек."
+        )
+        try:
+            processes = read_stats()
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"Не удалось прочитать метрики из Redis: {e}"))
+            exit(1)
+        if not processes:
+            self.stdout.write("Метрик нет: процессы ещё не записали их или DB_POOL_STATS_INTERVAL=0.")
+            return
+
+        for stats in processes:
+            line = (
+                f"{stats['role']:>4} {stats['host']}:{stats['pid']} ({stats['mode']}, "
+                f"{round(time.time()) - stats['reported_at']} сек. назад, работает {stats['uptime']} сек.): "
+                f"подключений Django {stats['connects']}"
+            )
+            if 'size' in stats:
+                line += f", {self.pool_line(stats)}"
+            style = self.style.WARNING if stats.get('timeouts') or stats.get('waiting') else str
+            self.stdout.write(style(line))
+            if 'replica' in stats:
+                self.stdout.write(f"     реплика: {self.pool_line(stats['replica'])}")
+
+        pooled = [stats for stats in processes if 'size' in stats]
+        if pooled:
+            self.stdout.write(self.style.SUCCESS(
+                f"Всего соединений в пулах: {sum(stats['size'] for stats in pooled)}, "
+                f"занято {sum(stats['in_use'] for stats in pooled)}, "
+                f"ждут {sum(stats['waiting'] for stats in pooled)}"
+            ))
+
+    @staticmethod
+    def pool_line(stats: dict) -> str:
+        return (
+            f"занято {stats['in_use']}/{stats['size']} (макс. {stats['max_size']}), "
+            f"ждут {stats['waiting']}, выдач {stats['checkouts']} (в очереди {stats['queued']}), "
+            f"ожидание {stats['avg_wait_ms']} мс, таймаутов {stats['timeouts']}, "
+            f"открыто {stats['opened']}, потеряно {stats['lost']}"
+        )
@@ -0,0 +1,152 @@
+import os
+import shutil
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from telegram_bot.models import Appeal, AttachmentBlob
+from telegram_bot.storage import STAGING_DIR, blob_digest
+
+
+def iter_files(root: str):
+    """
+    Обходит дерево каталогов без построения полного списка файлов.
+    :return: Генератор (путь, os.stat_result).
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из каталога загрузок файлы, на которые не ссылается ни одно обращение '
+        '(или переносит их в карантин) и сообщает, сколько места освобождено'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать найденные файлы, ничего не удалять')
+        parser.add_argument('--quarantine', help='Переносить файлы в этот каталог вместо удаления')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Сколько файлов проверять в БД за один запрос')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не трогать файлы, изменённые менее N секунд назад (загрузки, для которых обращение ещё не сохранено)'
+        )
+        parser.add_argument('--verbose-files', action='store_true', help='Выводить каждый найденный файл')
+
+    def handle(self, *args, **options):
+        field = Appeal._meta.get_field('file_path')
+        storage = field.storage
+        upload_dir = field.upload_to.strip('/')
+        root = storage.path(upload_dir)
+        if not os.path.isdir(root):
+            raise CommandError(f"Каталог загрузок не найден: {root}")
+
+        quarantine = options['quarantine']
+        if quarantine:
+            quarantine = os.path.abspath(quarantine)
+            if quarantine.startswith(os.path.abspath(root) + os.sep):
+                raise CommandError("Каталог карантина не должен находиться внутри каталога загрузок.")
+
+        self.dry_run = options['dry_run']
+        self.quarantine = quarantine
+        self.storage = storage
+        self.root = root
+        self.verbose_files = options['verbose_files']
+        cutoff = time.time() - options['min_age']
+        stats = {'scanned': 0, 'orphans': 0, 'reclaimed': 0, 'skipped_recent': 0, 'blobs': 0}
+
+        # Файлы читаются из дерева потоком и проверяются пачками: в памяти одновременно
+        # находится не больше chunk_size имён (и из каталога, и из БД)
+        for batch in batched(iter_files(root), options['chunk_size']):
+            names = {
+                os.path.relpath(path, storage.location).replace(os.sep, '/'): stat for path, stat in batch
+            }
+            stats['scanned'] += len(names)
+            referenced = set(
+                # С основной БД: отстающая реплика не видит ссылки недавно сохранённых обращений
+                Appeal.objects.using(DEFAULT_DB_ALIAS).filter(file_path__in=list(names))
+                .values_list('file_path', flat=True)
+            )
+
+            for name, stat in names.items():
+                if name in referenced:
+                    continue
+                if stat.st_mtime > cutoff:
+                    stats['skipped_recent'] += 1
+                    continue
+                if self.collect(name, stat, cutoff, stats):
+                    stats['orphans'] += 1
+                    stats['reclaimed'] += stat.st_size
+
+        action = 'Будет освобождено' if self.dry_run else 'Освобождено'
+        self.stdout.write(self.style.SUCCESS(
+            f"Проверено файлов: {stats['scanned']}, без ссылок: {stats['orphans']} "
+            f"(из них записей AttachmentBlob: {stats['blobs']}), пропущено недавних: {stats['skipped_recent']}. "
+            f"{action}: {stats['reclaimed'] / (1024 * 1024):.2f} MB ({stats['reclaimed']} байт)."
+        ))
+
+    def collect(self, name: str, stat: os.stat_result, cutoff: float, stats: dict) -> bool:
+        """
+        Удаляет (переносит в карантин) файл без ссылок.
+        :return: False, если файл нельзя удалять (на него появилась ссылка).
+        """
+        if self.verbose_files or self.dry_run:
+            self.stdout.write(f"{'[dry-run] ' if self.dry_run else ''}{name} ({stat.st_size} байт)")
+        if self.dry_run:
+            return True
+
+        digest = blob_digest(name)
+        if digest is None:
+            self.remove(name)
+            return True
+
+        # Файл с адресацией по содержимому: проверка и удаление под той же блокировкой строки,
+        # что и в хранилище, чтобы не удалить файл, который прямо сейчас загружают повторно
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(sha256=digest).first()
+            path = self.storage.path(name)
+            if not os.path.exists(path) or os.stat(path).st_mtime > cutoff:
+                return False
+            if Appeal.objects.filter(file_path=name).exists():
+                return False
+            if blob is not None:
+                blob.delete()
+                stats['blobs'] += 1
+            self.remove(name)
+        return True
+
+    def remove(self, name: str):
+        path = self.storage.path(name)
+        if self.quarantine:
+            target = os.path.join(self.quarantine, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(path, target)
+        else:
+            os.remove(path)
+
+        # Удаляем опустевшие каталоги шардирования (ab/cd/); каталог недописанных файлов оставляем
+        directory = os.path.dirname(path)
+        while directory != self.root and directory.startswith(self.root) and os.path.basename(directory) != STAGING_DIR:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
@@ -1,13 +1,25 @@
 import asyncio
 from django.core.management.base import BaseCommand
 from telegram_bot.bot import start_bot
+from telegram_bot.tools.db_pool import close_pools, configure_process
 
 class Command(BaseCommand):
     help = 'Запуск Telegram-бота'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--webhook',
+            action='store_true',
+            help='Принимать апдейты через вебхук (aiohttp) вместо long polling'
+        )
+
     def handle(self, *args, **options):
+        # Пул соединений бота (DB_POOL_MAX_SIZE_BOT) настраивается до первого обращения к БД
+        configure_process('bot')
         try:
             # Запускаем бота через asyncio.run
-            asyncio.run(start_bot())
+            asyncio.run(start_bot(webhook=options['webhook']))
         except KeyboardInterrupt:
-            self.stdout.write("Бот остановлен.")
\ No newline at end of file
+            self.stdout.write("Бот остановлен.")
+        finally:
+            close_pools()
\ No newline at end of file
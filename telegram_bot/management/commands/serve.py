@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from telegram_bot.tools import app_server
+
+
+class Command(BaseCommand):
+    help = (
+        'Запуск Django API на gunicorn (ASGI на воркерах uvicorn или WSGI на потоках, keep-alive) вместо runserver; '
+        '--graceful-reload плавно перезапускает уже работающий сервер'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interface', choices=['asgi', 'wsgi'], default=app_server.SERVE_INTERFACE,
+            help='asgi — mp_bot/asgi.py (uvicorn), wsgi — mp_bot/wsgi.py (потоки gunicorn)'
+        )
+        parser.add_argument('--bind', default=app_server.SERVE_BIND, help='Адрес и порт (host:port)')
+        parser.add_argument('--workers', type=int, default=app_server.SERVE_WORKERS, help='Процессов (0 — 2 * CPU + 1)')
+        parser.add_argument('--threads', type=int, default=app_server.SERVE_THREADS, help='Потоков в процессе (WSGI)')
+        parser.add_argument('--keep-alive', type=int, default=app_server.SERVE_KEEPALIVE, help='Keep-alive (сек.)')
+        parser.add_argument('--timeout', type=int, default=app_server.SERVE_TIMEOUT, help='Таймаут воркера (сек.)')
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=app_server.SERVE_GRACEFUL_TIMEOUT,
+            help='Время на завершение запросов при остановке и перезапуске (сек.)'
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=app_server.SERVE_MAX_REQUESTS,
+            help='Перезапускать воркер после N запросов (0 — отключить)'
+        )
+        parser.add_argument('--access-log', action='store_true', default=app_server.SERVE_ACCESS_LOG)
+        parser.add_argument('--pidfile', default=app_server.SERVE_PIDFILE)
+        parser.add_argument(
+            '--graceful-reload', action='store_true',
+            help='Не запускать сервер, а плавно перезапустить работающий (SIGHUP мастер-процессу)'
+        )
+
+    def handle(self, *args, **options):
+        if options['graceful_reload']:
+            try:
+                pid = app_server.reload_server(options['pidfile'])
+            except ProcessLookupError as e:
+                raise CommandError(f"Сервер не запущен: {e}")
+            self.stdout.write(self.style.SUCCESS(f"Сигнал перезапуска отправлен процессу {pid}."))
+            return
+
+        app_server.run_server(app_server.build_options(
+            interface=options['interface'],
+            bind=options['bind'],
+            workers=options['workers'],
+            threads=options['threads'],
+            keepalive=options['keep_alive'],
+            timeout=options['timeout'],
+            graceful_timeout=options['graceful_timeout'],
+            max_requests=options['max_requests'],
+            access_log=options['access_log'],
+            pidfile=options['pidfile'],
+        ), interface=options['interface'])
@@ -0,0 +1,24 @@
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from typing import Callable, Awaitable, Dict, Any
+from ..db_router import read_your_writes
+from ..tools.db_pool import database_scope
+
+
+class DatabaseScopeMiddleware(BaseMiddleware):
+    """
+    Outer-middleware апдейтов: вся обработка апдейта (middleware и обработчики) выполняется в рамке database_scope.
+    В режиме DB_POOL_MODE=pool апдейт получает своё соединение из пула и возвращает его после обработки.
+    При настроенной реплике чтения отправителя апдейта закрепляются за основной БД после его записи.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+            event: Update,
+            data: Dict[str, Any]
+    ) -> Any:
+        sender = data.get('event_from_user')  # Заполняется UserContextMiddleware aiogram
+        async with database_scope():
+            with read_your_writes(*((f'tg:{sender.id}',) if sender else ())):
+                return await handler(event, data)
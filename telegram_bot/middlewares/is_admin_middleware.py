@@ -107,11 +107,10 @@ class CheckAdminMiddleware(BaseMiddleware):
 
         response, reply_markup, allow_submit = await check_admin_requests(user)
 
-        # Сохраняем данные в state
+        # Сохраняем данные в state (клавиатура не сохраняется: из state она не читается)
         await state.update_data(
             admin_request={
                 'response': response,
-                'reply_markup': reply_markup,
                 'allow_submit': allow_submit
             }
         )
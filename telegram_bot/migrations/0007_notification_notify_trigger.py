@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Канал PostgreSQL, в который отправляется NOTIFY при создании уведомлений.
+# Должен совпадать с NOTIFICATION_CHANNEL в telegram_bot/tools/notification_listener.py
+NOTIFICATION_CHANNEL = 'telegram_bot_notification'
+
+CREATE_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION telegram_bot_notification_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NOTIFICATION_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER telegram_bot_notification_notify_trigger
+AFTER INSERT ON telegram_bot_notification
+FOR EACH STATEMENT
+EXECUTE FUNCTION telegram_bot_notification_notify();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS telegram_bot_notification_notify_trigger ON telegram_bot_notification;
+DROP FUNCTION IF EXISTS telegram_bot_notification_notify();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0006_notification_admin_request'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER_SQL, reverse_sql=DROP_TRIGGER_SQL),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0007_notification_notify_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='locked_by',
+            field=models.CharField(blank=True, help_text='Идентификатор процесса бота, который отправляет уведомление.', max_length=255, null=True, verbose_name='Захвачено воркером'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, help_text='После этого момента уведомление может забрать другой процесс.', null=True, verbose_name='Захвачено до'),
+        ),
+    ]
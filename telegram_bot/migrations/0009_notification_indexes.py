@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0008_notification_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('sent', False)), fields=['created_at'], name='notification_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['sent', 'created_at'], name='notification_sent_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0009_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appeal',
+            name='telegram_bo_status_2801fc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appeal',
+            name='telegram_bo_created_eedc43_idx',
+        ),
+        migrations.AddIndex(
+            model_name='appeal',
+            index=models.Index(fields=['created_at', 'id'], name='appeal_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appeal',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='appeal_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appeal',
+            index=models.Index(fields=['commission', 'created_at', 'id'], name='appeal_commission_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appeal',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='appeal_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:51
+
+import telegram_bot.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0010_appeal_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(verbose_name='Размер (байт)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Файл вложения',
+                'verbose_name_plural': 'Файлы вложений',
+            },
+        ),
+        migrations.AddField(
+            model_name='appeal',
+            name='file_name',
+            field=models.CharField(blank=True, default='', help_text='Исходное имя прикреплённого файла (в хранилище файл называется по хешу содержимого).', max_length=255, verbose_name='Имя файла'),
+        ),
+        migrations.AlterField(
+            model_name='appeal',
+            name='file_path',
+            field=models.FileField(blank=True, null=True, storage=telegram_bot.storage.get_attachment_storage, upload_to='uploads/', verbose_name='Прикрепленный файл'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0011_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appeal',
+            name='telegram_file_id',
+            field=models.CharField(blank=True, default='', help_text='file_id файла, уже загруженного в Telegram: повторно файл отправляется без загрузки.', max_length=255, verbose_name='file_id в Telegram'),
+        ),
+    ]
@@ -1,7 +1,12 @@
+import os
+
 from django.db import models
+from django.db.models.fields.files import FieldFile
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 
+from .storage import get_attachment_storage
+
 class StatusChoices:
     """Константы для статусов"""
     NEW = 'new'
@@ -47,6 +52,75 @@ def validate_admin_request_status(value):
         )
 
 
+class FieldTrackerMixin(models.Model):
+    """
+    Примесь для отслеживания изменений полей без дополнительных запросов к БД.
+    Значения полей из tracked_fields запоминаются при загрузке объекта (from_db)
+    и после каждого сохранения.
+    """
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: instance._tracked_value(name) for name in cls.tracked_fields if name in field_names
+        }
+        return instance
+
+    def _tracked_value(self, name: str):
+        value = getattr(self, name)
+        # FieldFile изменяется на месте при сохранении файла, поэтому запоминаем только имя
+        return value.name if isinstance(value, FieldFile) else value
+
+    def _snapshot_tracked_fields(self, fields=None):
+        """
+        Запоминает текущие значения отслеживаемых полей (всех или только fields).
+        """
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        deferred_fields = self.get_deferred_fields()
+        for name in self.tracked_fields:
+            if (fields is None or name in fields) and name not in deferred_fields:
+                self._loaded_values[name] = self._tracked_value(name)
+
+    def previous(self, field: str):
+        """
+        Возвращает значение поля на момент загрузки из БД (или последнего сохранения).
+        Если значение не было загружено (новый объект или отложенное поле), читает его из БД.
+        :param field: Имя отслеживаемого поля.
+        """
+        loaded_values = getattr(self, '_loaded_values', {})
+        if field not in loaded_values:
+            if self.pk is None or self._state.adding:
+                return None
+            loaded_values[field] = (
+                type(self)._base_manager.filter(pk=self.pk).values_list(field, flat=True).first()
+            )
+            self._loaded_values = loaded_values
+        return loaded_values[field]
+
+    def has_changed(self, field: str) -> bool:
+        """
+        Проверяет, изменилось ли значение поля с момента загрузки из БД (или последнего сохранения).
+        :param field: Имя отслеживаемого поля.
+        """
+        if self.pk is None or self._state.adding:
+            return False
+        return self.previous(field) != self._tracked_value(field)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_tracked_fields(fields)
+
+
 class User(models.Model):
     """
     Модель пользователя.
@@ -86,10 +160,29 @@ class CommissionInfo(models.Model):
         return self.name
 
 
-class Appeal(models.Model):
+class AttachmentBlob(models.Model):
+    """
+    Файл вложения в хранилище с адресацией по содержимому и количество ссылающихся на него обращений.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True, verbose_name=_('SHA-256'))
+    size = models.BigIntegerField(verbose_name=_('Размер (байт)'))
+    ref_count = models.PositiveIntegerField(default=0, verbose_name=_('Количество ссылок'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Дата создания'))
+
+    class Meta:
+        verbose_name = _('Файл вложения')
+        verbose_name_plural = _('Файлы вложений')
+
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count})"
+
+
+class Appeal(FieldTrackerMixin):
     """
     Модель обращения.
     """
+    tracked_fields = ('status', 'file_path')
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -113,10 +206,25 @@ class Appeal(models.Model):
     )
     file_path = models.FileField(
         upload_to='uploads/',
+        storage=get_attachment_storage,
         null=True,
         blank=True,
         verbose_name=_('Прикрепленный файл')
     )
+    file_name = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name=_('Имя файла'),
+        help_text=_('Исходное имя прикреплённого файла (в хранилище файл называется по хешу содержимого).')
+    )
+    telegram_file_id = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name=_('file_id в Telegram'),
+        help_text=_('file_id файла, уже загруженного в Telegram: повторно файл отправляется без загрузки.')
+    )
     status = models.CharField(
         max_length=50,
         choices=StatusChoices.APPEAL_STATUSES,
@@ -133,8 +241,12 @@ class Appeal(models.Model):
         verbose_name_plural = _('Обращения')
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # Курсорная пагинация по (created_at, id) и фильтр по диапазону дат
+            models.Index(fields=['created_at', 'id'], name='appeal_created_id_idx'),
+            # Фильтры списка обращений для администратора с той же сортировкой
+            models.Index(fields=['status', 'created_at', 'id'], name='appeal_status_created_idx'),
+            models.Index(fields=['commission', 'created_at', 'id'], name='appeal_commission_created_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='appeal_user_created_idx'),
         ]
         constraints = [
             models.CheckConstraint(
@@ -146,12 +258,32 @@ class Appeal(models.Model):
     def __str__(self):
         return f"Обращение #{self.id} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        # Новый файл ещё не записан в хранилище: запоминаем его исходное имя
+        if self.file_path and not self.file_path._committed:
+            self.file_name = os.path.basename(self.file_path.name)
+        # file_id относится к прежнему файлу
+        if 'file_path' not in self.get_deferred_fields() and self.has_changed('file_path'):
+            self.telegram_file_id = ''
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'telegram_file_id'}
+        super().save(*args, **kwargs)
+
+    @property
+    def attachment_name(self) -> str:
+        """
+        Имя файла для пользователя (исходное имя или имя в хранилище для старых загрузок).
+        """
+        return self.file_name or os.path.basename(self.file_path.name)
 
 
-class AdminRequest(models.Model):
+
+class AdminRequest(FieldTrackerMixin):
     """
     Модель запроса на администрирование.
     """
+    tracked_fields = ('status',)
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -232,6 +364,19 @@ class Notification(models.Model):
         help_text=_('Текст уведомления, который будет отправлен пользователю.')
     )
     sent = models.BooleanField(default=False, verbose_name=_('Отправлено'))
+    locked_by = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        verbose_name=_('Захвачено воркером'),
+        help_text=_('Идентификатор процесса бота, который отправляет уведомление.')
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Захвачено до'),
+        help_text=_('После этого момента уведомление может забрать другой процесс.')
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Дата создания'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Дата обновления'))
 
@@ -239,6 +384,16 @@ class Notification(models.Model):
         verbose_name = _('Уведомление')
         verbose_name_plural = _('Уведомления')
         ordering = ['-created_at']
+        indexes = [
+            # Поиск непосланных уведомлений для отправки (частичный индекс только по sent=False)
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(sent=False),
+                name='notification_pending_idx'
+            ),
+            # Очистка старых отправленных уведомлений (sent=True, created_at < cutoff)
+            models.Index(fields=['sent', 'created_at'], name='notification_sent_created_idx'),
+        ]
 
     def __str__(self):
         return f"Уведомление #{self.id}: {self.message[:50]}..."
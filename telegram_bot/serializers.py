@@ -3,6 +3,7 @@ from django.db.utils import IntegrityError
 
 from rest_framework import serializers
 from .models import User, Appeal, CommissionInfo, AdminRequest
+from .tools.file_serving import signed_download_url
 from decouple import config
 
 # Загрузка конфигурации из .env
@@ -33,6 +34,7 @@ class AppealSerializer(serializers.ModelSerializer):
     Сериализатор для модели Appeal (для пользователей).
     """
     commission_name = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Appeal
@@ -44,11 +46,13 @@ class AppealSerializer(serializers.ModelSerializer):
             'appeal_text',
             'contact_info',
             'file_path',
+            'file_name',
+            'download_url',
             'status',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'file_name', 'created_at', 'updated_at']
 
     def get_commission_name(self, obj):
         """
@@ -56,6 +60,12 @@ class AppealSerializer(serializers.ModelSerializer):
         """
         return obj.commission.name if obj.commission else "Неизвестная комиссия"
 
+    def get_download_url(self, obj):
+        """
+        Подписанная ссылка на скачивание файла (проверяется без запроса к БД).
+        """
+        return signed_download_url(obj.file_path, self.context.get('request'))
+
     def validate_appeal_text(self, value):
         """
         Валидация текста обращения.
@@ -107,11 +117,20 @@ class AppealSerializerForAdmin(serializers.ModelSerializer):
     Сериализатор для модели Appeal (для администраторов).
     """
     commission_name = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Appeal
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        # Необязательный параметр fields ограничивает набор возвращаемых полей (проекция)
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
     def get_commission_name(self, obj):
         """
         Получение названия комиссии (если она указана).
@@ -120,6 +139,12 @@ class AppealSerializerForAdmin(serializers.ModelSerializer):
             return obj.commission.name
         return "Комиссия не найдена"
 
+    def get_download_url(self, obj):
+        """
+        Подписанная ссылка на скачивание файла (проверяется без запроса к БД).
+        """
+        return signed_download_url(obj.file_path, self.context.get('request'))
+
 class CommissionInfoSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели CommissionInfo.
@@ -1,9 +1,39 @@
-from django.db.models.signals import pre_save, pre_delete
+from django.db.models.signals import pre_save, pre_delete, post_save, post_delete
 from django.db.utils import IntegrityError
 from django.dispatch import receiver
 
-from .models import Notification, Appeal, AdminRequest
+from .models import Notification, Appeal, AdminRequest, StatusChoices, User, CommissionInfo
+from .storage import release_attachment_on_commit
+from .tools.commission_cache import commission_cache
 from .tools.main_logger import logger
+from .tools.notification_messages import build_appeal_status_message
+from .tools.user_cache import user_cache
+
+
+# ======================================================
+# Блок обработки сигналов для User
+# ======================================================
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш пользователя (в том числе при изменении статуса администратора).
+    """
+    user_cache.invalidate_on_commit(instance.telegram_id)
+
+
+# ======================================================
+# Блок обработки сигналов для CommissionInfo
+# ======================================================
+
+@receiver(post_save, sender=CommissionInfo)
+@receiver(post_delete, sender=CommissionInfo)
+def invalidate_commission_cache(sender, instance, **kwargs):
+    """
+    Увеличивает версию каталога комиссий (API и бот перечитают его при следующем обращении).
+    """
+    commission_cache.invalidate_on_commit()
 
 
 # ======================================================
@@ -19,54 +49,53 @@ def track_admin_request_status_change(sender, instance, **kwargs):
     if not instance.pk:  # Пропускаем создание новых объектов
         return
 
-    try:
-        previous_instance = sender.objects.get(pk=instance.pk)
-        previous_status = previous_instance.status
-        current_status = instance.status
+    # Предыдущий статус берётся из снимка, сделанного при загрузке объекта (без запроса к БД)
+    if not instance.has_changed('status'):
+        return
 
-        if previous_status == current_status:
-            return
+    previous_status = instance.previous('status')
+    if previous_status is None:
+        logger.warning(f"AdminRequest {instance.pk} не найден при обработке сигнала pre_save")
+        return
 
-        logger.info(
-            f"Статус заявки {instance.pk} изменен с '{previous_instance.get_status_display()}' "
-            f"на '{instance.get_status_display()}'."
-        )
+    previous_status_display = dict(StatusChoices.ADMIN_REQUEST_STATUSES).get(previous_status, previous_status)
+    logger.info(
+        f"Статус заявки {instance.pk} изменен с '{previous_status_display}' "
+        f"на '{instance.get_status_display()}'."
+    )
 
-        # Форматируем дату создания в удобочитаемый формат
-        created_date = instance.created_at.strftime("%d.%m.%Y %H:%M")
+    # Форматируем дату создания в удобочитаемый формат
+    created_date = instance.created_at.strftime("%d.%m.%Y %H:%M")
 
-        message = ""
-        if instance.status == 'approved':
-            message = (
-                f"🎉 Ваша заявка #{instance.pk} на должность '{instance.admin_position}' одобрена!\n\n"
-                f"• Дата подачи: {created_date}\n"
-                f"• Должность: {instance.admin_position}\n\n"
-                f"Теперь вы имеете доступ к панели администратора. Поздравляем!"
-            )
-        elif instance.status == 'rejected':
-            rejection_reason = instance.comment or "причина не указана"
-            message = (
-                f"⚠️ Ваша заявка #{instance.pk} на должность '{instance.admin_position}' отклонена.\n\n"
-                f"• Дата подачи: {created_date}\n"
-                f"• Должность: {instance.admin_position}\n"
-                f"• Причина отклонения: {rejection_reason}\n\n"
-                f"Вы можете подать новую заявку, исправив указанные замечания."
-            )
+    message = ""
+    if instance.status == 'approved':
+        message = (
+            f"🎉 Ваша заявка #{instance.pk} на должность '{instance.admin_position}' одобрена!\n\n"
+            f"• Дата подачи: {created_date}\n"
+            f"• Должность: {instance.admin_position}\n\n"
+            f"Теперь вы имеете доступ к панели администратора. Поздравляем!"
+        )
+    elif instance.status == 'rejected':
+        rejection_reason = instance.comment or "причина не указана"
+        message = (
+            f"⚠️ Ваша заявка #{instance.pk} на должность '{instance.admin_position}' отклонена.\n\n"
+            f"• Дата подачи: {created_date}\n"
+            f"• Должность: {instance.admin_position}\n"
+            f"• Причина отклонения: {rejection_reason}\n\n"
+            f"Вы можете подать новую заявку, исправив указанные замечания."
+        )
 
-        if message:
-            try:
-                Notification.objects.create(
-                    user=instance.user,
-                    admin_request=instance,
-                    message=message,
-                    sent=False
-                )
-                logger.info(f"Уведомление создано для пользователя {instance.user.id}.")
-            except IntegrityError as e:
-                logger.error(f"Ошибка при создании уведомления: {e}")
-
-    except sender.DoesNotExist:
-        logger.warning(f"AdminRequest {instance.pk} не найден при обработке сигнала pre_save")
+    if message:
+        try:
+            Notification.objects.create(
+                user=instance.user,
+                admin_request=instance,
+                message=message,
+                sent=False
+            )
+            logger.info(f"Уведомление создано для пользователя {instance.user.id}.")
+        except IntegrityError as e:
+            logger.error(f"Ошибка при создании уведомления: {e}")
 
 
 @receiver(pre_delete, sender=AdminRequest)
@@ -113,71 +142,51 @@ def track_appeal_status_change(sender, instance, **kwargs):
     if not instance.pk:  # Пропускаем создание новых объектов
         return
 
-    try:
-        previous_instance = sender.objects.get(pk=instance.pk)
-        previous_status = previous_instance.status
-        current_status = instance.status
-
-        if previous_status == current_status:
-            return
-
-        logger.info(
-            f"Статус обращения {instance.pk} изменен с '{previous_instance.get_status_display()}' "
-            f"на '{instance.get_status_display()}'."
-        )
+    # Предыдущий статус берётся из снимка, сделанного при загрузке объекта (без запроса к БД)
+    if not instance.has_changed('status'):
+        return
 
-        # Форматируем даты в удобочитаемый формат
-        created_date = instance.created_at.strftime("%d.%m.%Y %H:%M")
-        updated_date = instance.updated_at.strftime("%d.%m.%Y %H:%M")
+    previous_status = instance.previous('status')
+    if previous_status is None:
+        logger.warning(f"Appeal {instance.pk} не найден при обработке сигнала pre_save")
+        return
 
-        commission_name = instance.commission.name if instance.commission else "Общее обращение"
-        status_display = instance.get_status_display()
+    previous_status_display = dict(StatusChoices.APPEAL_STATUSES).get(previous_status, previous_status)
+    logger.info(
+        f"Статус обращения {instance.pk} изменен с '{previous_status_display}' "
+        f"на '{instance.get_status_display()}'."
+    )
 
-        # Определяем иконку статуса
-        status_icon = "🔄"
-        if instance.status == 'processed':
-            status_icon = "✅"
-        elif instance.status == 'rejected':
-            status_icon = "❌"
+    message = build_appeal_status_message(instance)
 
-        message = (
-            f"{status_icon} Статус вашего обращения #{instance.pk} обновлён\n\n"
-            f"📌 Комиссия: {commission_name}\n"
-            f"📅 Дата подачи: {created_date}\n"
-            f"🔄 Дата обновления: {updated_date}\n"
-            f"📋 Новый статус: {status_display}\n\n"
+    try:
+        Notification.objects.create(
+            user=instance.user,
+            appeal=instance,
+            message=message,
+            sent=False
         )
+        logger.info(f"Уведомление создано для пользователя {instance.user.id}.")
+    except IntegrityError as e:
+        logger.error(f"Ошибка при создании уведомления: {e}")
 
-        # Добавляем дополнительную информацию в зависимости от статуса
-        if instance.status == 'processed':
-            message += (
-                "Ваше обращение было успешно обработано. "
-                "Спасибо за ваше участие!\n\n"
-                "Если у вас остались вопросы, вы можете создать новое обращение."
-            )
-        elif instance.status == 'rejected':
-            message += (
-                "К сожалению, ваше обращение было отклонено. "
-                "Вы можете уточнить детали или подать новое обращение.\n\n"
-                "Для уточнения причин решения комиссии, пожалуйста, "
-                "обратитесь к администрации платформы."
-            )
-        else:
-            message += (
-                "Ваше обращение находится в работе. "
-                "Мы уведомим вас о дальнейших изменениях статуса."
-            )
 
-        try:
-            Notification.objects.create(
-                user=instance.user,
-                appeal=instance,
-                message=message,
-                sent=False
-            )
-            logger.info(f"Уведомление создано для пользователя {instance.user.id}.")
-        except IntegrityError as e:
-            logger.error(f"Ошибка при создании уведомления: {e}")
+@receiver(post_save, sender=Appeal)
+def release_replaced_appeal_file(sender, instance, created, **kwargs):
+    """
+    Убирает ссылку на прежний файл, если у обращения заменили или удалили вложение.
+    """
+    if created or not instance.has_changed('file_path'):
+        return
+    previous_file = instance.previous('file_path')
+    if previous_file:
+        release_attachment_on_commit(instance.file_path.storage, previous_file)
+
 
-    except sender.DoesNotExist:
-        logger.warning(f"Appeal {instance.pk} не найден при обработке сигнала pre_save")
\ No newline at end of file
+@receiver(post_delete, sender=Appeal)
+def release_deleted_appeal_file(sender, instance, **kwargs):
+    """
+    Убирает ссылку на файл удалённого обращения; файл удаляется, когда на него не осталось ссылок.
+    """
+    if instance.file_path:
+        release_attachment_on_commit(instance.file_path.storage, instance.file_path.name)
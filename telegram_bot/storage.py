@@ -0,0 +1,153 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .tools.main_logger import logger
+
+# Имя файла в хранилище: <каталог>/ab/cd/<sha256>
+BLOB_NAME_PATTERN = re.compile(r'(?:^|/)([0-9a-f]{2})/([0-9a-f]{2})/(\1\2[0-9a-f]{60})$')
+
+STAGING_DIR = '.staging'  # Каталог для недописанных файлов (внутри каталога загрузок)
+
+
+def blob_name(directory: str, digest: str) -> str:
+    """
+    Возвращает имя файла с содержимым digest в двухуровневом дереве каталогов.
+    """
+    return os.path.join(directory, digest[:2], digest[2:4], digest).replace('\\', '/')
+
+
+def blob_digest(name: str) -> str | None:
+    """
+    Возвращает SHA-256 из имени файла в хранилище или None, если файл сохранён не по хешу (старые загрузки).
+    """
+    match = BLOB_NAME_PATTERN.search(name or '')
+    return match.group(3) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище вложений с адресацией по содержимому.
+
+    Файл называется SHA-256 своего содержимого и лежит в дереве uploads/ab/cd/<sha256>,
+    поэтому одинаковые файлы (одна и та же петиция от сотен пользователей) хранятся один раз,
+    а в каждом каталоге остаётся немного записей. Количество ссылок на файл хранится
+    в AttachmentBlob: save() добавляет ссылку, delete() убирает её и удаляет файл,
+    когда ссылок не осталось. Изменение счётчика и операции с файлом выполняются
+    под блокировкой строки AttachmentBlob, поэтому параллельные загрузки и удаления
+    одного файла не теряют друг друга.
+
+    Файлы, сохранённые до перехода на это хранилище (uploads/<имя>), читаются и удаляются как обычно.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя определяется содержимым в _save(); совпадение имён — это дедупликация, а не конфликт
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        staging_dir = self.path(os.path.join(directory, STAGING_DIR))
+        os.makedirs(staging_dir, exist_ok=True)
+
+        # Файл пишется один раз во временный файл рядом с итоговым каталогом (та же файловая система),
+        # по ходу записи считается хеш; затем файл атомарно переименовывается или отбрасывается как дубликат
+        fd, staging_path = tempfile.mkstemp(dir=staging_dir)
+        try:
+            sha256 = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(staging_path, self.file_permissions_mode)
+
+            name = blob_name(directory, sha256.hexdigest())
+            self._acquire(name, sha256.hexdigest(), size, staging_path)
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+        return name
+
+    def _acquire(self, name: str, digest: str, size: int, staging_path: str):
+        """
+        Добавляет ссылку на файл; если файла ещё нет в хранилище, перемещает в него staging_path.
+        """
+        from .models import AttachmentBlob
+
+        while True:
+            try:
+                with transaction.atomic():
+                    blob = AttachmentBlob.objects.select_for_update().filter(sha256=digest).first()
+                    if blob is None:
+                        # При одновременной загрузке одного файла вторая вставка дождётся первой и получит IntegrityError
+                        blob = AttachmentBlob.objects.create(sha256=digest, size=size, ref_count=0)
+
+                    path = self.path(name)
+                    if os.path.exists(path):
+                        # Обновляем время изменения: gc_uploads не трогает недавно использованные файлы,
+                        # пока обращение, ссылающееся на них, ещё не сохранено
+                        os.utime(path)
+                    else:
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        os.replace(staging_path, path)
+                    AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                return
+            except IntegrityError:
+                continue
+
+    def delete(self, name):
+        """
+        Убирает ссылку на файл и удаляет его, когда ссылок не осталось.
+        """
+        from .models import AttachmentBlob
+        from .tools.attachment_variants import delete_variants
+
+        digest = blob_digest(name)
+        if digest is None:
+            super().delete(name)
+            delete_variants(self, name)
+            return
+
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(sha256=digest).first()
+            if blob is not None and blob.ref_count > 1:
+                AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            super().delete(name)
+        delete_variants(self, name)
+        logger.info(f"Файл {name} удалён: на него больше нет ссылок.")
+
+
+attachment_storage = ContentAddressedStorage()
+
+
+def release_attachment_on_commit(storage, name: str):
+    """
+    Убирает ссылку на файл после коммита текущей транзакции (сразу, если транзакции нет),
+    чтобы откат удаления обращения не оставил его без файла.
+    """
+    def release():
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.error(f"Не удалось удалить файл вложения {name}: {e}")
+
+    transaction.on_commit(release)
+
+
+def get_attachment_storage():
+    """
+    Хранилище для Appeal.file_path (функция, чтобы миграции не зависели от настроек хранилища).
+    """
+    return attachment_storage
@@ -1,3 +1,407 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from aiogram.types import Update
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .models import Appeal, CommissionInfo, StatusChoices, User
+from .pagination import KeysetPagination
+from .tools import redis_client
+from .tools.file_serving import file_etag, parse_range, serve_file, serve_signed_file, sign_download, unsign_download
+from .tools.notification_dispatcher import TokenBucket
+from .tools.update_offset import UpdateCheckpoint
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-4', 10), (0, 4))
+        self.assertEqual(parse_range('bytes=3-', 10), (3, 9))
+        self.assertEqual(parse_range('bytes=3-100', 10), (3, 9))
+        self.assertEqual(parse_range('bytes=-4', 10), (6, 9))
+        self.assertEqual(parse_range('bytes=-100', 10), (0, 9))
+
+    def test_unsupported_or_invalid_range_is_ignored(self):
+        self.assertIsNone(parse_range('bytes=0-1,3-4', 10))
+        self.assertIsNone(parse_range('items=0-4', 10))
+        self.assertIsNone(parse_range('bytes=-', 10))
+        self.assertIsNone(parse_range('bytes=5-3', 10))
+
+    def test_unsatisfiable_range(self):
+        for header, size in (('bytes=10-', 10), ('bytes=-0', 10), ('bytes=-5', 0), ('bytes=0-', 0)):
+            with self.subTest(header=header, size=size), self.assertRaises(ValueError):
+                parse_range(header, size)
+
+
+class ServeFileTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = FileSystemStorage(location=self.location)
+        self.name = self.storage.save('file.txt', ContentFile(b'0123456789'))
+        self.stat = os.stat(self.storage.path(self.name))
+        self.etag = file_etag(self.name, self.stat)
+        self.factory = RequestFactory()
+
+    def serve(self, name=None, offload='', **headers):
+        response = serve_file(self.factory.get('/', headers=headers), self.storage, name or self.name, 'file.txt', offload)
+        self.addCleanup(response.close)
+        return response
+
+    @staticmethod
+    def body(response) -> bytes:
+        return b''.join(response.streaming_content)
+
+    def test_full_file(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b'0123456789')
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_not_modified(self):
+        self.assertEqual(self.serve(If_None_Match=self.etag).status_code, 304)
+        self.assertEqual(self.serve(If_Modified_Since=http_date(self.stat.st_mtime + 1)).status_code, 304)
+
+    def test_partialContentFile(self):
+        response = self.serve(Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_unsatisfiable_range(self):
+        response = self.serve(Range='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_empty_file_range(self):
+        name = self.storage.save('empty.txt', ContentFile(b''))
+        response = self.serve(name, Range='bytes=-5')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_inverted_range_returns_full_file(self):
+        response = self.serve(Range='bytes=5-3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b'0123456789')
+
+    def test_if_range(self):
+        response = self.serve(Range='bytes=0-1', If_Range=self.etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), b'01')
+
+        # Файл изменился с прошлой загрузки: отдаётся целиком
+        response = self.serve(Range='bytes=0-1', If_Range='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b'0123456789')
+
+    def test_missing_file(self):
+        self.assertEqual(self.serve('missing.txt').status_code, 404)
+
+    def test_accel_redirect_is_percent_encoded(self):
+        name = self.storage.save('uploads/Заявление.pdf', ContentFile(b'pdf'))
+        response = self.serve(name, offload='x-accel-redirect')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/uploads/%D0%97%D0%B0%D1%8F%D0%B2%D0%BB%D0%B5%D0%BD%D0%B8%D0%B5.pdf')
+
+    def test_sendfile_falls_back_to_streaming_for_non_ascii_path(self):
+        self.assertEqual(self.serve(offload='x-sendfile')['X-Sendfile'], self.storage.path(self.name))
+
+        name = self.storage.save('Заявление.txt', ContentFile(b'text'))
+        response = self.serve(name, offload='x-sendfile')
+        self.assertFalse(response.has_header('X-Sendfile'))
+        self.assertEqual(self.body(response), b'text')
+
+
+class SignedDownloadTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = FileSystemStorage(location=self.location)
+        self.name = self.storage.save('file.txt', ContentFile(b'content'))
+
+    def test_round_trip(self):
+        name, filename, expires_at = unsign_download(sign_download(self.name, 'Файл.txt', ttl=60))
+        self.assertEqual((name, filename), (self.name, 'Файл.txt'))
+        # Срок действия — от ttl до 2 * ttl, округлён до границы интервала
+        self.assertEqual(expires_at % 60, 0)
+        self.assertTrue(time.time() + 60 <= expires_at <= time.time() + 120)
+
+    def test_links_in_same_interval_match(self):
+        self.assertEqual(sign_download(self.name, 'file.txt'), sign_download(self.name, 'file.txt'))
+
+    def test_expired(self):
+        token = sign_download(self.name, 'file.txt', ttl=60)
+        with mock.patch('telegram_bot.tools.file_serving.time.time', return_value=time.time() + 121):
+            with self.assertRaises(signing.SignatureExpired):
+                unsign_download(token)
+            response = serve_signed_file(RequestFactory().get('/'), self.storage, token)
+        self.assertEqual(response.status_code, 403)
+
+    def test_tampered(self):
+        token = sign_download(self.name, 'file.txt')
+        tampered = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        with self.assertRaises(signing.BadSignature):
+            unsign_download(tampered)
+        self.assertEqual(serve_signed_file(RequestFactory().get('/'), self.storage, tampered).status_code, 403)
+
+        # Подпись с другой солью (другое назначение токена) не принимается
+        forged = signing.dumps({'n': self.name, 'f': 'file.txt', 'e': int(time.time()) + 60}, compress=True)
+        with self.assertRaises(signing.BadSignature):
+            unsign_download(forged)
+
+    def test_serves_file_with_cache_headers(self):
+        response = serve_signed_file(RequestFactory().get('/'), self.storage, sign_download(self.name, 'file.txt'))
+        self.addCleanup(response.close)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Expires', response)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_burst_then_rate(self):
+        async def scenario():
+            bucket = TokenBucket(rate=20, capacity=2)
+            started = time.monotonic()
+            await bucket.acquire()
+            await bucket.acquire()
+            burst = time.monotonic() - started
+            await bucket.acquire()
+            return burst, time.monotonic() - started
+
+        burst, total = asyncio.run(scenario())
+        self.assertLess(burst, 0.03)
+        self.assertGreaterEqual(total, 0.045)
+
+    def test_default_capacity(self):
+        self.assertEqual(TokenBucket(rate=30).capacity, 30)
+        self.assertEqual(TokenBucket(rate=0.5).capacity, 1.0)
+
+    def test_pause(self):
+        async def scenario():
+            bucket = TokenBucket(rate=100)
+            bucket.pause(0.1)
+            self.assertFalse(bucket.idle)
+            started = time.monotonic()
+            await bucket.acquire()
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(scenario()), 0.09)
+
+    def test_idle(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        self.assertTrue(bucket.idle)
+        asyncio.run(bucket.acquire())
+        self.assertFalse(bucket.idle)
+        time.sleep(0.06)
+        self.assertTrue(bucket.idle)
+
+
+class UpdateCheckpointTests(SimpleTestCase):
+    """
+    Контрольная точка апдейтов в Redis (ключи отдельного тестового бота удаляются после теста).
+    """
+
+    def setUp(self):
+        self.bot_id = -uuid.uuid4().int % 10 ** 9
+        # Асинхронный клиент Redis привязан к event loop: у каждого asyncio.run() — свой
+        redis_client._async_redis = None
+
+    def run_async(self, coroutine_function):
+        async def scenario():
+            try:
+                return await coroutine_function()
+            finally:
+                checkpoint = UpdateCheckpoint(self.bot_id)
+                redis = redis_client.get_async_redis()
+                await redis.delete(checkpoint.offset_key, checkpoint.pending_key, checkpoint.processed_key)
+                await redis.aclose()
+                redis_client._async_redis = None
+
+        return asyncio.run(scenario())
+
+    @staticmethod
+    def updates(*update_ids: int) -> list[Update]:
+        return [Update(update_id=update_id) for update_id in update_ids]
+
+    @staticmethod
+    def ids(updates: list[Update]) -> list[int]:
+        return [update.update_id for update in updates]
+
+    def test_accept_skips_updates_in_flight(self):
+        async def scenario():
+            checkpoint = UpdateCheckpoint(self.bot_id)
+            self.assertEqual(self.ids(await checkpoint.accept(self.updates(1, 2), offset=3)), [1, 2])
+            self.assertEqual(self.ids(await checkpoint.accept(self.updates(2, 3), offset=4)), [3])
+            self.assertEqual(checkpoint.offset, 4)
+
+        self.run_async(scenario)
+
+    def test_restart_replays_unfinished_and_skips_processed(self):
+        async def scenario():
+            checkpoint = UpdateCheckpoint(self.bot_id)
+            await checkpoint.accept(self.updates(1, 2, 3), offset=4)
+            checkpoint.finish(1)
+            checkpoint.finish(3)
+            await checkpoint.flush()
+
+            restarted = UpdateCheckpoint(self.bot_id)
+            self.assertEqual(self.ids(await restarted.load(bot=None)), [2])
+            self.assertEqual(restarted.offset, 4)
+            self.assertEqual(restarted.processed, {1, 3})
+            # Повторная доставка обработанного и ожидающего повтора апдейтов отбрасывается
+            self.assertEqual(self.ids(await restarted.accept(self.updates(1, 2, 3, 4))), [4])
+
+        self.run_async(scenario)
+
+    def test_finish_without_flush_is_replayed(self):
+        async def scenario():
+            checkpoint = UpdateCheckpoint(self.bot_id)
+            await checkpoint.accept(self.updates(1), offset=2)
+            checkpoint.finish(1)
+            # Процесс упал до flush(): апдейт обрабатывается повторно
+            self.assertEqual(self.ids(await UpdateCheckpoint(self.bot_id).load(bot=None)), [1])
+
+        self.run_async(scenario)
+
+    def test_history_is_trimmed(self):
+        async def scenario():
+            checkpoint = UpdateCheckpoint(self.bot_id, history=2)
+            await checkpoint.accept(self.updates(1, 2, 3))
+            for update_id in (1, 2, 3):
+                checkpoint.finish(update_id)
+            await checkpoint.flush()
+            restarted = UpdateCheckpoint(self.bot_id, history=2)
+            await restarted.load(bot=None)
+            self.assertEqual(restarted.processed, {2, 3})
+
+        self.run_async(scenario)
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id=-1, first_name='user')
+        cls.commission = CommissionInfo.objects.create(name='Комиссия')
+        cls.appeals = [
+            Appeal.objects.create(user=cls.user, commission=cls.commission, appeal_text=f'Обращение {index}')
+            for index in range(7)
+        ]
+        # Пять обращений с одинаковым created_at: порядок внутри группы задаёт id
+        same_time = cls.appeals[0].created_at
+        Appeal.objects.filter(id__in=[appeal.id for appeal in cls.appeals[:5]]).update(created_at=same_time)
+
+    def paginate(self, cursor=None, page_size=2):
+        params = {'page_size': page_size}
+        if cursor:
+            params['cursor'] = cursor
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(Appeal.objects.all(), Request(APIRequestFactory().get('/', params)))
+        return paginator, [appeal.id for appeal in page]
+
+    def test_pages_cover_all_rows_once_in_order(self):
+        expected = list(Appeal.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        seen, cursor = [], None
+        while True:
+            paginator, ids = self.paginate(cursor)
+            seen += ids
+            cursor = paginator.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_cursor_round_trip(self):
+        paginator, _ = self.paginate()
+        request = Request(APIRequestFactory().get('/', {'cursor': paginator.next_cursor}))
+        appeal = Appeal.objects.get(id=self.paginate()[1][-1])
+        self.assertEqual(KeysetPagination().decode_cursor(request), (appeal.created_at, appeal.id))
+
+    def test_response_and_next_link(self):
+        paginator, _ = self.paginate()
+        data = paginator.get_paginated_response([]).data
+        self.assertEqual(set(data), {'next', 'next_cursor', 'results'})
+        self.assertEqual(parse_qs(urlsplit(data['next']).query)['cursor'], [paginator.next_cursor])
+
+    def test_invalid_cursor_and_page_size(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'page_size': 'x'}, {'page_size': '0'}):
+            with self.subTest(params=params), self.assertRaises(Exception) as error:
+                KeysetPagination().paginate_queryset(Appeal.objects.all(), Request(APIRequestFactory().get('/', params)))
+            self.assertEqual(error.exception.status_code, 400)
+
+
+class BulkUpdateAppealStatusTests(TestCase):
+    url = '/telegram_bot/api/v1/admin/bulk_update_appeal_status/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(telegram_id=-2, first_name='admin', is_admin=True)
+        cls.user = User.objects.create(telegram_id=-3, first_name='user')
+        cls.commission = CommissionInfo.objects.create(name='Комиссия')
+        cls.other_commission = CommissionInfo.objects.create(name='Другая комиссия')
+        cls.appeal = Appeal.objects.create(user=cls.user, commission=cls.commission, appeal_text='Обращение')
+        cls.other_appeal = Appeal.objects.create(
+            user=cls.user, commission=cls.other_commission, appeal_text='Другое обращение'
+        )
+
+    def post(self, **body):
+        return self.client.post(
+            self.url,
+            json.dumps({'user_id': self.admin.id, 'status': StatusChoices.PROCESSED, **body}),
+            content_type='application/json',
+        )
+
+    def assertUnchanged(self):
+        self.assertFalse(Appeal.objects.exclude(status=StatusChoices.NEW).exists())
+
+    def test_invalid_filters_are_rejected(self):
+        for appeal_filter in (
+                {'comission_id': self.commission.id},
+                {'status': 'unknown'},
+                {'commission_id': str(self.commission.id)},
+                {'commission_id': True},
+                {'status': StatusChoices.NEW, 'user_id': self.user.id},
+        ):
+            with self.subTest(filter=appeal_filter):
+                self.assertEqual(self.post(filter=appeal_filter).status_code, 400)
+        self.assertUnchanged()
+
+    def test_invalid_appeal_ids_are_rejected(self):
+        for appeal_ids in ([True], [], [str(self.appeal.id)], self.appeal.id):
+            with self.subTest(appeal_ids=appeal_ids):
+                self.assertEqual(self.post(appeal_ids=appeal_ids).status_code, 400)
+        self.assertUnchanged()
+
+    def test_filter_updates_matching_appeals_only(self):
+        response = self.post(filter={'status': StatusChoices.NEW, 'commission_id': self.commission.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 1)
+        self.appeal.refresh_from_db()
+        self.other_appeal.refresh_from_db()
+        self.assertEqual(self.appeal.status, StatusChoices.PROCESSED)
+        self.assertEqual(self.other_appeal.status, StatusChoices.NEW)
+
+    def test_non_admin_is_forbidden(self):
+        response = self.client.post(
+            self.url,
+            json.dumps({'user_id': self.user.id, 'status': StatusChoices.PROCESSED, 'appeal_ids': [self.appeal.id]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertUnchanged()
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import signal
+
+from decouple import config
+from django.conf import settings
+from django.utils.module_loading import import_string
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from .db_pool import close_pools
+from .main_logger import logger
+
+# asgi — mp_bot/asgi.py на воркерах uvicorn (async-представления выполняются в event loop),
+# wsgi — mp_bot/wsgi.py на потоковых воркерах gunicorn
+SERVE_INTERFACE = config('SERVE_INTERFACE', default='asgi').lower()
+SERVE_BIND = config('SERVE_BIND', default='0.0.0.0:8000')
+SERVE_WORKERS = int(config('SERVE_WORKERS', default=0))  # Процессов-воркеров (0 — 2 * CPU + 1, не больше 8)
+SERVE_THREADS = int(config('SERVE_THREADS', default=4))  # Потоков в каждом WSGI-воркере (1 — синхронный воркер)
+SERVE_KEEPALIVE = int(config('SERVE_KEEPALIVE', default=5))  # Сколько держать открытым keep-alive соединение (сек.)
+SERVE_TIMEOUT = int(config('SERVE_TIMEOUT', default=60))  # Перезапуск зависшего воркера (сек.)
+SERVE_GRACEFUL_TIMEOUT = int(config('SERVE_GRACEFUL_TIMEOUT', default=30))  # Время на завершение запросов при остановке (сек.)
+SERVE_MAX_REQUESTS = int(config('SERVE_MAX_REQUESTS', default=2000))  # Перезапуск воркера после N запросов (0 — отключить)
+SERVE_ACCESS_LOG = bool(int(config('SERVE_ACCESS_LOG', default=0)))  # Журнал запросов в stdout
+SERVE_PIDFILE = config('SERVE_PIDFILE', default='/tmp/mp_bot_web.pid')
+
+
+def default_workers() -> int:
+    return min(multiprocessing.cpu_count() * 2 + 1, 8)
+
+
+def on_starting(server):
+    # Соединения и пул БД, открытые в мастер-процессе при запуске команды, не должны достаться воркерам после fork
+    close_pools()
+    threads = '' if server.cfg.worker_class_str.endswith('UvicornWorker') else f", потоков {server.cfg.threads}"
+    logger.info(
+        f"Сервер приложения ({server.app.interface.upper()}) запускается на {server.cfg.bind}: "
+        f"воркеров {server.cfg.workers}{threads}, keep-alive {server.cfg.keepalive} сек."
+    )
+    if settings.DB_POOL_MODE == 'pool':
+        logger.info(
+            f"Пул соединений с БД: до {settings.DB_POOL_MAX_SIZE_WEB} на воркер, "
+            f"всего до {settings.DB_POOL_MAX_SIZE_WEB * server.cfg.workers}."
+        )
+    elif settings.DB_POOL_MODE == 'persistent' and server.app.interface == 'asgi':
+        # Синхронные представления под ASGI выполняются в новом потоке на каждый запрос:
+        # постоянное соединение потока не переиспользуется и остаётся открытым до сборки мусора
+        logger.warning(
+            "DB_POOL_MODE=persistent не подходит для SERVE_INTERFACE=asgi: используйте DB_POOL_MODE=pool."
+        )
+
+
+def on_reload(server):
+    logger.info("Плавный перезапуск сервера приложения: новые воркеры запускаются, старые завершают текущие запросы.")
+
+
+def worker_abort(worker):
+    logger.error(f"Воркер {worker.pid} превысил таймаут {worker.cfg.timeout} сек. и будет перезапущен.")
+
+
+class DjangoUvicornWorker(UvicornWorker):
+    """
+    Воркер uvicorn для Django: протокол lifespan Django не поддерживает.
+    """
+    CONFIG_KWARGS = {'loop': 'auto', 'http': 'auto', 'lifespan': 'off'}
+
+
+class DjangoApplication(BaseApplication):
+    """
+    Gunicorn, запускаемый из manage.py serve: настройки передаются словарём, без отдельного конфигурационного файла.
+    """
+
+    def __init__(self, options: dict, interface: str = SERVE_INTERFACE):
+        self.options = options
+        self.interface = interface
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler, StaticFilesHandler
+
+        if self.interface == 'asgi':
+            application = import_string(settings.ASGI_APPLICATION)
+            static_handler = ASGIStaticFilesHandler
+        else:
+            application = import_string(settings.WSGI_APPLICATION)
+            static_handler = StaticFilesHandler
+        # Как и runserver, в режиме отладки отдаём статику админки сами
+        return static_handler(application) if settings.DEBUG else application
+
+
+def build_options(
+    interface: str = SERVE_INTERFACE,
+    bind: str = SERVE_BIND,
+    workers: int = SERVE_WORKERS,
+    threads: int = SERVE_THREADS,
+    keepalive: int = SERVE_KEEPALIVE,
+    timeout: int = SERVE_TIMEOUT,
+    graceful_timeout: int = SERVE_GRACEFUL_TIMEOUT,
+    max_requests: int = SERVE_MAX_REQUESTS,
+    access_log: bool = SERVE_ACCESS_LOG,
+    pidfile: str = SERVE_PIDFILE,
+) -> dict:
+    """
+    Собирает настройки gunicorn.
+    Код приложения загружается в каждом воркере (без preload), поэтому плавный перезапуск подхватывает новую версию кода.
+    В режиме ASGI каждый воркер обслуживает все свои соединения в одном event loop; синхронные представления
+    Django выполняет в отдельном потоке на запрос, асинхронные — прямо в event loop.
+    """
+    if interface == 'asgi':
+        worker_class = f'{DjangoUvicornWorker.__module__}.{DjangoUvicornWorker.__qualname__}'
+    else:
+        worker_class = 'gthread' if threads > 1 else 'sync'
+    return {
+        'bind': bind,
+        'workers': workers or default_workers(),
+        'worker_class': worker_class,
+        'threads': threads,
+        'keepalive': keepalive,
+        'timeout': timeout,
+        'graceful_timeout': graceful_timeout,
+        'max_requests': max_requests,
+        # Разброс, чтобы воркеры не перезапускались одновременно
+        'max_requests_jitter': max_requests // 10,
+        'accesslog': '-' if access_log else None,
+        'errorlog': '-',
+        'pidfile': pidfile,
+        'proc_name': 'mp_bot_web',
+        'on_starting': on_starting,
+        'on_reload': on_reload,
+        'worker_abort': worker_abort,
+    }
+
+
+def run_server(options: dict, interface: str = SERVE_INTERFACE):
+    DjangoApplication(options, interface).run()
+
+
+def reload_server(pidfile: str = SERVE_PIDFILE) -> int:
+    """
+    Отправляет мастер-процессу SIGHUP: gunicorn запускает воркеры с новым кодом и настройками,
+    а старые воркеры дообрабатывают текущие запросы, поэтому запросы не теряются.
+    :return: PID мастер-процесса.
+    :raises ProcessLookupError: Сервер не запущен.
+    """
+    try:
+        with open(pidfile) as f:
+            pid = int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        raise ProcessLookupError(f"PID-файл сервера не найден или повреждён: {pidfile}")
+    os.kill(pid, signal.SIGHUP)
+    return pid
@@ -0,0 +1,34 @@
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from ..models import Appeal
+from .main_logger import logger
+from .repository import save_appeal_file_id
+
+
+async def answer_appeal_file(message: Message, appeal: Appeal, **kwargs) -> bool:
+    """
+    Отправляет файл обращения в чат сообщения.
+    Если файл уже загружался в Telegram, он отправляется по сохранённому file_id без повторной загрузки;
+    иначе загружается с диска, и полученный file_id запоминается в обращении.
+    :param kwargs: Дополнительные параметры answer_document (caption, parse_mode и т.д.).
+    :return: False, если у обращения нет файла или он не найден в хранилище.
+    """
+    if appeal.telegram_file_id:
+        try:
+            await message.answer_document(appeal.telegram_file_id, **kwargs)
+            return True
+        except TelegramBadRequest as e:
+            # file_id недействителен (например, бот сменил токен) — загружаем файл заново
+            logger.warning(f"Telegram отклонил file_id файла обращения {appeal.id}: {e}")
+
+    if not appeal.file_path or not appeal.file_path.storage.exists(appeal.file_path.name):
+        return False
+
+    sent = await message.answer_document(
+        FSInputFile(appeal.file_path.path, filename=appeal.attachment_name), **kwargs
+    )
+    if sent.document:
+        appeal.telegram_file_id = sent.document.file_id
+        await save_appeal_file_id(appeal.id, appeal.telegram_file_id)
+    return True
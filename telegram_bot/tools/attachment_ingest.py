@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from io import UnsupportedOperation
+from typing import AsyncIterator
+
+import aiofiles
+from aiogram import Bot
+from decouple import config
+from django.core.files import File
+
+from ..models import Appeal
+from .db_pool import run_in_thread
+from .main_logger import logger
+
+ATTACHMENT_CHUNK_SIZE = int(config('ATTACHMENT_CHUNK_SIZE', default=65536))  # Размер блока при скачивании вложения (байт)
+ATTACHMENT_DOWNLOAD_TIMEOUT = int(config('ATTACHMENT_DOWNLOAD_TIMEOUT', default=120))  # Таймаут скачивания вложения (сек.)
+
+
+class AttachmentTooLarge(ValueError):
+    """
+    Вложение оказалось больше допустимого размера (обнаруживается во время скачивания).
+    """
+
+
+@dataclass
+class StoredAttachment:
+    """
+    Результат сохранения вложения.
+    """
+    name: str  # Имя файла в хранилище (значение для Appeal.file_path)
+    size: int  # Размер в байтах
+    sha256: str  # SHA-256 содержимого (hex)
+
+
+async def iter_telegram_file(bot: Bot, file_path: str, chunk_size: int = ATTACHMENT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Отдаёт содержимое файла Telegram блоками, не сохраняя его целиком ни в памяти, ни на диске.
+    :param file_path: Путь файла на сервере Telegram (File.file_path из getFile).
+    """
+    if bot.session.api.is_local:
+        # Локальный Bot API сервер: файл уже лежит на диске, читаем его без блокировки event loop
+        async with aiofiles.open(bot.session.api.wrap_local_file.to_local(file_path), 'rb') as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+        return
+
+    stream = bot.session.stream_content(
+        url=bot.session.api.file_url(bot.token, file_path),
+        timeout=ATTACHMENT_DOWNLOAD_TIMEOUT,
+        chunk_size=chunk_size,
+        raise_for_status=True,
+    )
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
+
+
+class AsyncChunkReader:
+    """
+    Файлоподобный объект для чтения из потока: отдаёт хранилищу Django блоки асинхронного
+    итератора, по ходу считая размер и SHA-256.
+
+    read() вызывается хранилищем в отдельном потоке и ждёт следующий блок из event loop,
+    поэтому скачивание и запись идут одновременно, а в памяти находится не больше одного блока.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop, max_size: int | None = None):
+        """
+        :param chunks: Асинхронный итератор блоков.
+        :param loop: Event loop, в котором выполняется итератор.
+        :param max_size: Максимальный размер в байтах (при превышении — AttachmentTooLarge).
+        """
+        self.chunks = chunks
+        self.loop = loop
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self._buffer = b''
+        self._exhausted = False
+
+    def _next_chunk(self) -> bytes:
+        try:
+            chunk = asyncio.run_coroutine_threadsafe(anext(self.chunks), self.loop).result()
+        except StopAsyncIteration:
+            self._exhausted = True
+            return b''
+
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise AttachmentTooLarge(f"Размер файла превышает {self.max_size} байт.")
+        self.sha256.update(chunk)
+        return chunk
+
+    def read(self, size: int = -1) -> bytes:
+        # Хранилище Django читает блоками размера chunk_size; блоки сети отдаём как есть, без склейки
+        if not self._buffer and not self._exhausted:
+            self._buffer = self._next_chunk()
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, b''
+            while not self._exhausted:
+                data += self._next_chunk()
+            return data
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def seek(self, *args):
+        # Поток нельзя перемотать: File.chunks() перехватывает это исключение и читает с начала
+        raise UnsupportedOperation('seek')
+
+    def close(self):
+        pass
+
+
+async def save_telegram_file(
+        bot: Bot,
+        file_path: str,
+        original_file_name: str,
+        max_size: int | None = None,
+) -> StoredAttachment:
+    """
+    Скачивает файл Telegram и по мере скачивания записывает его в хранилище Appeal.file_path.
+    Запись выполняется в отдельном потоке, event loop не блокируется. Хранилище называет файл
+    по хешу содержимого, поэтому одновременные загрузки файлов с одинаковым именем не мешают друг другу.
+    :param file_path: Путь файла на сервере Telegram (File.file_path из getFile).
+    :param original_file_name: Исходное имя файла.
+    :param max_size: Максимальный размер файла в байтах.
+    :return: Имя сохранённого файла, его размер и SHA-256.
+    """
+    field = Appeal._meta.get_field('file_path')
+    chunks = iter_telegram_file(bot, file_path)
+    reader = AsyncChunkReader(chunks, asyncio.get_running_loop(), max_size=max_size)
+
+    try:
+        # Поток по умолчанию (не поток ORM рамки): долгая запись файла не задерживает запросы апдейта к БД.
+        # В конце записи хранилище увеличивает счётчик ссылок AttachmentBlob в транзакции на соединении
+        # этого потока, run_in_thread закрывает его (возвращает в пул). Недописанный файл хранилище удаляет само
+        name = await run_in_thread(
+            field.storage.save,
+            field.generate_filename(None, original_file_name),
+            File(reader, name=original_file_name),
+        )
+    finally:
+        await chunks.aclose()
+
+    logger.info(f"Вложение сохранено: {name}, {reader.size} байт, sha256={reader.sha256.hexdigest()}")
+    return StoredAttachment(name=name, size=reader.size, sha256=reader.sha256.hexdigest())
+
+
+def delete_attachment(name: str):
+    """
+    Убирает ссылку на файл вложения (файл удаляется, когда на него не осталось ссылок).
+    """
+    storage = Appeal._meta.get_field('file_path').storage
+    try:
+        storage.delete(name)
+    except Exception as e:
+        logger.error(f"Не удалось удалить файл вложения {name}: {e}")
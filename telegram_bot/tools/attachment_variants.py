@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from decouple import config
+
+from ..storage import blob_digest
+from .image_render import render_variants
+from .main_logger import logger
+
+ATTACHMENT_THUMBNAIL_SIZE = int(config('ATTACHMENT_THUMBNAIL_SIZE', default=320))  # Максимальная сторона миниатюры (px)
+ATTACHMENT_PREVIEW_SIZE = int(config('ATTACHMENT_PREVIEW_SIZE', default=1280))  # Максимальная сторона превью (px)
+ATTACHMENT_VARIANT_FORMAT = config('ATTACHMENT_VARIANT_FORMAT', default='WEBP').upper()  # WEBP или JPEG
+ATTACHMENT_VARIANT_QUALITY = int(config('ATTACHMENT_VARIANT_QUALITY', default=80))
+ATTACHMENT_VARIANT_WORKERS = int(config('ATTACHMENT_VARIANT_WORKERS', default=2))  # Процессов для обработки изображений
+# Сколько запрос скачивания ждёт создания отсутствующего варианта (сек.), дальше обработка продолжается в фоне
+ATTACHMENT_VARIANT_TIMEOUT = float(config('ATTACHMENT_VARIANT_TIMEOUT', default=10))
+
+# Варианты вложения: имя -> максимальная сторона
+ATTACHMENT_VARIANTS = {
+    'thumb': ATTACHMENT_THUMBNAIL_SIZE,
+    'preview': ATTACHMENT_PREVIEW_SIZE,
+}
+
+VARIANTS_DIR = 'previews'  # Отдельно от uploads/: gc_uploads считает файлы без обращения мусором
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+VARIANT_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pending: dict[str, Future] = {}  # Файлы, обрабатываемые пулом: имя в хранилище -> Future
+_tasks: set[asyncio.Task] = set()
+
+
+def is_image(filename: str) -> bool:
+    return os.path.splitext(filename or '')[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_name(name: str, variant: str) -> str:
+    """
+    Возвращает имя варианта в хранилище: previews/ab/cd/<ключ>.<вариант>.<расширение>.
+    Для файлов с адресацией по содержимому ключ — SHA-256 файла (одинаковые фото обрабатываются один раз).
+    """
+    key = blob_digest(name) or hashlib.sha256(name.encode()).hexdigest()
+    extension = VARIANT_EXTENSIONS[ATTACHMENT_VARIANT_FORMAT]
+    return f"{VARIANTS_DIR}/{key[:2]}/{key[2:4]}/{key}.{variant}.{extension}"
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    """
+    Имя файла варианта для пользователя (photo.jpg -> photo.thumb.webp).
+    """
+    return f"{os.path.splitext(filename)[0]}.{variant}.{VARIANT_EXTENSIONS[ATTACHMENT_VARIANT_FORMAT]}"
+
+
+def _targets(storage, name: str, variants) -> list[tuple[str, int]]:
+    return [(storage.path(variant_name(name, variant)), ATTACHMENT_VARIANTS[variant]) for variant in variants]
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Пул процессов для обработки изображений (создаётся при первом использовании).
+    Процессы запускаются через spawn: fork процесса с event loop и потоками небезопасен.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=ATTACHMENT_VARIANT_WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor | None):
+    # Процесс пула аварийно завершился (например, из-за нехватки памяти) — следующий вызов создаст новый пул
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def submit_variants(storage, name: str) -> Future:
+    """
+    Ставит создание всех вариантов изображения в пул процессов (не больше ATTACHMENT_VARIANT_WORKERS
+    изображений одновременно). Пока файл обрабатывается, повторные вызовы получают тот же Future.
+    :return: Future с размерами созданных файлов в байтах.
+    """
+    global _pool
+    with _pool_lock:
+        future = _pending.get(name)
+        if future is not None:
+            return future
+        pool = get_pool()
+        try:
+            future = pool.submit(
+                render_variants,
+                storage.path(name),
+                _targets(storage, name, ATTACHMENT_VARIANTS),
+                ATTACHMENT_VARIANT_FORMAT,
+                ATTACHMENT_VARIANT_QUALITY,
+            )
+        except BrokenProcessPool:
+            _pool = None
+            raise
+        _pending[name] = future
+
+    def forget(done: Future):
+        with _pool_lock:
+            if _pending.get(name) is done:
+                del _pending[name]
+        if isinstance(done.exception(), BrokenProcessPool):
+            _reset_pool(pool)
+
+    future.add_done_callback(forget)
+    return future
+
+
+async def generate_variants(storage, name: str):
+    """
+    Создаёт все варианты изображения в пуле процессов (event loop не блокируется).
+    """
+    started = time.monotonic()
+    try:
+        sizes = await asyncio.wrap_future(submit_variants(storage, name))
+    except BrokenProcessPool as e:
+        logger.error(f"Пул обработки изображений остановлен при создании превью для {name}: {e}")
+        return
+    except Exception as e:
+        logger.error(f"Не удалось создать превью для {name}: {e}")
+        return
+    logger.info(
+        f"Превью для {name} созданы за {time.monotonic() - started:.2f} сек.: "
+        f"{dict(zip(ATTACHMENT_VARIANTS, sizes))} байт"
+    )
+
+
+def schedule_variants(storage, name: str, filename: str):
+    """
+    Запускает создание вариантов в фоне, если вложение — изображение.
+    """
+    if not is_image(filename):
+        return
+    task = asyncio.create_task(generate_variants(storage, name))
+    # Держим ссылку на задачу, иначе сборщик мусора может удалить её до завершения
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def queue_variants(storage, name: str, filename: str):
+    """
+    Синхронный вариант schedule_variants (представления API): ставит создание вариантов в пул процессов без ожидания.
+    """
+    if not is_image(filename):
+        return
+
+    def log_error(future: Future):
+        if future.exception() is not None:
+            logger.error(f"Не удалось создать превью для {name}: {future.exception()}")
+
+    try:
+        submit_variants(storage, name).add_done_callback(log_error)
+    except Exception as e:
+        logger.error(f"Не удалось поставить создание превью для {name} в очередь: {e}")
+
+
+def ensure_variant(storage, name: str, filename: str, variant: str) -> str | None:
+    """
+    Возвращает имя варианта в хранилище. Если варианта ещё нет (вложение загружено до появления превью
+    или фоновая обработка не завершилась), он создаётся в пуле процессов, а запрос ждёт его
+    не дольше ATTACHMENT_VARIANT_TIMEOUT секунд.
+    :return: None, если вложение не является изображением, его не удалось обработать или вариант ещё не готов.
+    """
+    if not is_image(filename):
+        return None
+    result = variant_name(name, variant)
+    if storage.exists(result):
+        return result
+    try:
+        submit_variants(storage, name).result(timeout=ATTACHMENT_VARIANT_TIMEOUT)
+    except TimeoutError:
+        logger.warning(
+            f"Вариант {variant} для {name} не создан за {ATTACHMENT_VARIANT_TIMEOUT} сек., обработка продолжается в фоне"
+        )
+        return None
+    except Exception as e:
+        logger.error(f"Не удалось создать вариант {variant} для {name}: {e}")
+        return None
+    return result
+
+
+def delete_variants(storage, name: str):
+    """
+    Удаляет все варианты файла.
+    """
+    for variant in ATTACHMENT_VARIANTS:
+        path = storage.path(variant_name(name, variant))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,7 +1,8 @@
-from ..models import User, AdminRequest, StatusChoices
-from asgiref.sync import sync_to_async
+from ..models import User, StatusChoices
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from .repository import get_user_admin_request
+
 
 async def check_admin_requests(user: User):
     """
@@ -9,9 +10,7 @@ async def check_admin_requests(user: User):
     Возвращает (response_message, reply_markup, allow_submit).
     """
     # Получаем существующую заявку (если есть)
-    existing_request = await sync_to_async(
-        AdminRequest.objects.filter(user=user).first
-    )()
+    existing_request = await get_user_admin_request(user)
 
     if not existing_request:
         # Если заявок нет - разрешаем подачу
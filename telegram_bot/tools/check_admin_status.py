@@ -1,13 +1,20 @@
-from asgiref.sync import sync_to_async
 from ..models import User
 
 async def is_user_admin(user_id: int) -> bool:
     """
     Проверяет, является ли пользователь с указанным ID администратором.
-    Использует sync_to_async для выполнения синхронного кода Django ORM в асинхронном контексте.
+    Использует асинхронный ORM Django (для бота и асинхронных представлений).
     :param user_id: Первичный ключ (ID) пользователя
     :return: True, если пользователь администратор, иначе False
     """
-    # Оборачиваем синхронный код в sync_to_async
-    user = await sync_to_async(User.objects.filter(id=user_id).first)()
-    return user.is_admin if user else False
\ No newline at end of file
+    return bool(await User.objects.filter(id=user_id).values_list('is_admin', flat=True).afirst())
+
+
+def is_user_admin_sync(user_id: int) -> bool:
+    """
+    Синхронный вариант is_user_admin для представлений DRF
+    (async_to_sync создавал бы отдельный event loop на каждый запрос).
+    :param user_id: Первичный ключ (ID) пользователя
+    :return: True, если пользователь администратор, иначе False
+    """
+    return bool(User.objects.filter(id=user_id).values_list('is_admin', flat=True).first())
\ No newline at end of file
@@ -1,12 +1,11 @@
-from asgiref.sync import sync_to_async
-
 from ..models import User
+from .user_cache import user_cache
 
 
 async def get_user_by_telegram_id(telegram_id: int) -> User | None:
     """
     Проверяет, зарегистрирован ли пользователь в базе данных.
     Возвращает объект пользователя или None, если пользователь не найден.
+    Данные берутся из двухуровневого кеша (память процесса -> Redis -> БД).
     """
-    user = await sync_to_async(User.objects.filter(telegram_id=telegram_id).first)()
-    return user
\ No newline at end of file
+    return await user_cache.get(telegram_id)
\ No newline at end of file
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from decouple import config
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
+from rest_framework.utils.encoders import JSONEncoder
+
+from ..models import CommissionInfo
+from ..serializers import CommissionInfoSerializer
+from .main_logger import logger
+from .redis_client import cache_key, get_sync_redis
+
+COMMISSION_CACHE_ENABLED = bool(int(config('COMMISSION_CACHE_ENABLED', default=1)))
+# Сколько секунд процесс использует свою копию каталога, не сверяя версию с Redis
+COMMISSION_CACHE_LOCAL_TTL = float(config('COMMISSION_CACHE_LOCAL_TTL', default=5))
+COMMISSION_CACHE_REDIS_TTL = int(config('COMMISSION_CACHE_REDIS_TTL', default=86400))  # TTL каталога в Redis (сек.)
+
+# Счётчик версий каталога: увеличивается при каждом изменении комиссий
+COMMISSION_VERSION_KEY = cache_key('commissions', 'version')
+
+
+def catalogue_key(version: int) -> str:
+    return cache_key('commissions', 'catalogue', version)
+
+
+def render_json(data) -> bytes:
+    """
+    Сериализует данные так же, как JSONRenderer DRF (компактно, без экранирования кириллицы).
+    """
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def content_etag(content: bytes) -> str:
+    return quote_etag(hashlib.sha256(content).hexdigest()[:32])
+
+
+def load_commission_items(using: str | None = None) -> list[dict]:
+    """
+    Загружает комиссии из БД в том виде, в каком их отдаёт API.
+    :param using: Алиас БД (по умолчанию — по маршрутизации, то есть с реплики, если она настроена).
+    """
+    return CommissionInfoSerializer(CommissionInfo.objects.using(using), many=True).data
+
+
+class CommissionCatalogue:
+    """
+    Неизменяемый снимок списка комиссий: готовые JSON-ответы API с ETag и объекты CommissionInfo для бота.
+    """
+
+    def __init__(self, version: int | None, items: list[dict]):
+        """
+        :param version: Версия каталога (None, если Redis недоступен и снимок не кешируется).
+        :param items: Комиссии в представлении CommissionInfoSerializer.
+        """
+        self.version = version
+        self.items = items
+        self.list_json = render_json(items)
+        self.list_etag = content_etag(self.list_json)
+        self.details = {}
+        for item in items:
+            content = render_json(item)
+            self.details[item['id']] = (content, content_etag(content))
+        self._commissions = None
+
+    @property
+    def commissions(self) -> list[CommissionInfo]:
+        """
+        Комиссии в виде объектов модели (без запроса к БД), в порядке CommissionInfo.Meta.ordering.
+        """
+        if self._commissions is None:
+            self._commissions = [
+                CommissionInfo(
+                    id=item['id'],
+                    name=item['name'],
+                    description=item['description'],
+                    created_at=parse_datetime(item['created_at']),
+                    updated_at=parse_datetime(item['updated_at']),
+                )
+                for item in self.items
+            ]
+        return self._commissions
+
+    def get(self, commission_id: int) -> CommissionInfo | None:
+        for commission in self.commissions:
+            if commission.id == commission_id:
+                return commission
+        return None
+
+
+class CommissionCache:
+    """
+    Кеш каталога комиссий: копия в памяти процесса поверх Redis, ключ — счётчик версий.
+
+    Сигналы CommissionInfo post_save/post_delete увеличивают счётчик в Redis; процессы сверяют
+    версию своей копии не чаще раза в COMMISSION_CACHE_LOCAL_TTL секунд и при расхождении
+    загружают каталог новой версии из Redis (или из БД, если его там ещё нет).
+    Каталог старой версии не удаляется: он истечёт по TTL и больше никем не читается.
+    """
+
+    def __init__(self):
+        self._catalogue: CommissionCatalogue | None = None
+        self._checked_at = 0.0
+
+    def _local(self) -> CommissionCatalogue | None:
+        catalogue = self._catalogue
+        if catalogue is not None and time.monotonic() - self._checked_at < COMMISSION_CACHE_LOCAL_TTL:
+            return catalogue
+        return None
+
+    def _remember(self, catalogue: CommissionCatalogue) -> CommissionCatalogue:
+        self._catalogue = catalogue
+        self._checked_at = time.monotonic()
+        return catalogue
+
+    def _matches_local(self, version: int) -> CommissionCatalogue | None:
+        catalogue = self._catalogue
+        if catalogue is not None and catalogue.version == version:
+            return self._remember(catalogue)
+        return None
+
+    @staticmethod
+    def _store(redis, version: int, items: list[dict]):
+        redis.set(catalogue_key(version), render_json(items), ex=COMMISSION_CACHE_REDIS_TTL)
+
+    def get(self) -> CommissionCatalogue:
+        """
+        Возвращает текущий каталог комиссий (для представлений API).
+        """
+        if not COMMISSION_CACHE_ENABLED:
+            return CommissionCatalogue(None, load_commission_items())
+
+        catalogue = self._local()
+        if catalogue is not None:
+            return catalogue
+
+        try:
+            redis = get_sync_redis()
+            version = int(redis.get(COMMISSION_VERSION_KEY) or 0)
+            catalogue = self._matches_local(version)
+            if catalogue is not None:
+                return catalogue
+            cached = redis.get(catalogue_key(version))
+        except Exception as e:
+            # Без Redis нельзя проверить актуальность копии в памяти: читаем из БД
+            logger.warning(f"Кеш комиссий в Redis недоступен: {e}")
+            return CommissionCatalogue(None, load_commission_items())
+
+        if cached is not None:
+            items = json.loads(cached)
+        else:
+            # Каталог новой версии читается с основной БД: отстающая реплика сохранила бы в Redis старые данные
+            items = load_commission_items(DEFAULT_DB_ALIAS)
+            try:
+                self._store(redis, version, items)
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить каталог комиссий в Redis: {e}")
+        return self._remember(CommissionCatalogue(version, items))
+
+    async def aget(self) -> CommissionCatalogue:
+        """
+        Асинхронный вариант get() для бота и async-представлений: копия в памяти отдаётся без перехода в поток.
+        Сверка версии с Redis (не чаще раза в COMMISSION_CACHE_LOCAL_TTL секунд) выполняется синхронным
+        клиентом в потоке: асинхронный клиент Redis привязан к одному event loop, а под WSGI
+        каждое async-представление выполняется в собственном event loop.
+        """
+        if COMMISSION_CACHE_ENABLED:
+            catalogue = self._local()
+            if catalogue is not None:
+                return catalogue
+        return await sync_to_async(self.get)()
+
+    def invalidate(self):
+        """
+        Увеличивает версию каталога и сбрасывает копию в памяти процесса.
+        Синхронный метод: вызывается из сигналов.
+        """
+        self._catalogue = None
+        try:
+            get_sync_redis().incr(COMMISSION_VERSION_KEY)
+        except Exception as e:
+            logger.error(f"Не удалось сбросить кеш комиссий в Redis: {e}")
+
+    def invalidate_on_commit(self):
+        """
+        Сбрасывает кеш после коммита текущей транзакции (сразу, если транзакции нет),
+        чтобы параллельный запрос не закешировал старые данные под новой версией.
+        """
+        transaction.on_commit(self.invalidate)
+
+
+def catalogue_response(request, content: bytes, etag: str) -> HttpResponse:
+    """
+    Отдаёт готовый JSON с ETag; повторный запрос с If-None-Match получает 304 без тела.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    # Браузер хранит ответ, но перепроверяет его при каждом открытии WebApp
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+commission_cache = CommissionCache()
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from decouple import config
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+from .main_logger import logger
+from .redis_client import cache_key, get_sync_redis
+
+# Как часто процесс пишет метрики соединений с БД в журнал и Redis (сек., 0 — отключить)
+DB_POOL_STATS_INTERVAL = int(config('DB_POOL_STATS_INTERVAL', default=60))
+
+# Роль процесса: web — воркер API (по умолчанию), bot — процесс бота (configure_process)
+_role = 'web'
+_lock = threading.Lock()
+_report_lock = threading.Lock()
+_connects = 0
+_started_at = time.monotonic()
+_reported_at = _started_at
+
+
+def stats_key(role: str = '*', process: str = '*') -> str:
+    return cache_key('db_pool', role, process)
+
+
+def configure_process(role: str):
+    """
+    Задаёт роль процесса. Для бота размер пула заменяется на DB_POOL_MAX_SIZE_BOT.
+    Вызывается до первого обращения к БД: пул создаётся при первом соединении.
+    """
+    global _role
+    _role = role
+    if role != 'bot':
+        return
+    # Основная БД и реплика (если настроена): у каждой свой пул
+    for database in settings.DATABASES.values():
+        pool_options = database.get('OPTIONS', {}).get('pool')
+        if isinstance(pool_options, dict):
+            pool_options['max_size'] = settings.DB_POOL_MAX_SIZE_BOT
+            pool_options['min_size'] = min(settings.DB_POOL_MIN_SIZE, settings.DB_POOL_MAX_SIZE_BOT)
+
+
+def close_pools():
+    """
+    Закрывает соединения и пулы процесса (мастер gunicorn перед запуском воркеров, остановка бота):
+    пул не должен достаться дочерним процессам после fork.
+    """
+    connections.close_all()
+    for connection in connections.all():
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
+
+
+@asynccontextmanager
+async def database_scope():
+    """
+    Рамка работы с БД вне запроса Django: обработка апдейта бота или проход фоновой задачи.
+
+    pool — запросы ORM выполняются в собственном потоке рамки со своим соединением из пула (как запрос под ASGI),
+    по завершении соединение возвращается в пул, поэтому апдейты обращаются к БД параллельно;
+    persistent — по завершении закрываются устаревшие и оборванные соединения (как после запроса Django);
+    off — как раньше: все запросы ORM выполняются в общем потоке на одном соединении.
+
+    В режиме pool соединение занято рамкой от первого запроса до её завершения, в том числе во время запросов
+    к Telegram API, поэтому с БД одновременно работают не больше DB_POOL_MAX_SIZE_BOT апдейтов, остальные ждут
+    соединения до DB_POOL_TIMEOUT. Перед долгим ожиданием без БД соединение возвращают в пул: release_connection().
+    """
+    if settings.DB_POOL_MODE == 'pool':
+        async with ThreadSensitiveContext():
+            try:
+                yield
+            finally:
+                await sync_to_async(close_old_connections)()
+    elif settings.DB_POOL_MODE == 'persistent':
+        try:
+            yield
+        finally:
+            await sync_to_async(close_old_connections)()
+    else:
+        yield
+
+
+async def release_connection():
+    """
+    Возвращает соединение рамки database_scope в пул (режим pool) перед долгой работой без БД, например
+    скачиванием файла. Следующий запрос ORM рамки получит соединение из пула заново.
+    """
+    if settings.DB_POOL_MODE == 'pool':
+        await sync_to_async(close_old_connections)()
+
+
+def _close_thread_connections(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Поток пула asyncio не проходит через рамку или цикл запроса Django: соединения потока закрываются
+        # (в режиме pool — возвращаются в пул) здесь, иначе они остаются занятыми до завершения процесса
+        connections.close_all()
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию в потоке по умолчанию asyncio (asyncio.to_thread), не занимая поток ORM рамки:
+    для долгой работы с файлами, которая обращается к БД. Соединения потока закрываются по её завершении.
+    """
+    return await asyncio.to_thread(_close_thread_connections, func, *args, **kwargs)
+
+
+def _count_connect(sender, connection, **kwargs):
+    global _connects
+    with _lock:
+        _connects += 1
+
+
+# Подключения Django: в режиме pool — каждая выдача соединения из пула, иначе — новые соединения с PostgreSQL
+connection_created.connect(_count_connect)
+
+
+def collect_stats() -> dict:
+    """
+    Метрики соединений процесса. in_use (выдано из пула) и waiting (ждут свободного соединения) — текущие значения,
+    остальные счётчики — с запуска процесса (uptime, сек.): checkouts — выдач соединения, queued — из них с ожиданием,
+    avg_wait_ms — среднее ожидание соединения, timeouts — не дождались соединения за DB_POOL_TIMEOUT,
+    opened/lost — соединений открыто пулом и потеряно (оборвались).
+    """
+    stats = {
+        'role': _role,
+        'mode': settings.DB_POOL_MODE,
+        'host': socket.gethostname(),
+        'pid': os.getpid(),
+        'reported_at': round(time.time()),
+        'uptime': round(time.monotonic() - _started_at),
+        'connects': _connects,
+    }
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        # Метрики основной БД — на верхнем уровне, реплики — в отдельном словаре
+        if alias == DEFAULT_DB_ALIAS:
+            stats.update(pool_stats(pool))
+        else:
+            stats[alias] = pool_stats(pool)
+    return stats
+
+
+def pool_stats(pool) -> dict:
+    # Не pop_stats(): время ожидания учитывается по его окончании, а запрос — в начале,
+    # поэтому среднее по коротким периодам искажается
+    counters = pool.get_stats()
+    # Пул открывается при первом соединении процесса: до этого открытых соединений нет
+    size = counters.get('pool_size', 0) if not pool.closed else 0
+    requests = counters.get('requests_num', 0)
+    return {
+        'size': size,
+        'max_size': pool.max_size,
+        'in_use': size - counters.get('pool_available', 0),
+        'waiting': counters.get('requests_waiting', 0),
+        'checkouts': requests,
+        'queued': counters.get('requests_queued', 0),
+        'avg_wait_ms': round(counters.get('requests_wait_ms', 0) / requests, 1) if requests else 0.0,
+        'timeouts': counters.get('requests_errors', 0),
+        'opened': counters.get('connections_num', 0),
+        'lost': counters.get('connections_lost', 0),
+    }
+
+
+def report_stats():
+    """
+    Пишет метрики соединений процесса в журнал и в Redis (читает manage.py dbpoolstats).
+    """
+    global _reported_at
+    _reported_at = time.monotonic()
+    stats = collect_stats()
+    logger.info(f"Соединения с БД ({stats['role']}): {stats}")
+    try:
+        get_sync_redis().set(
+            stats_key(stats['role'], f"{stats['host']}:{stats['pid']}"),
+            json.dumps(stats),
+            ex=max(DB_POOL_STATS_INTERVAL * 3, 60),
+        )
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить метрики соединений с БД в Redis: {e}")
+
+
+def report_stats_if_due(**kwargs):
+    """
+    Обработчик сигнала request_finished: воркер API пишет метрики не чаще раза в DB_POOL_STATS_INTERVAL секунд.
+    """
+    if not DB_POOL_STATS_INTERVAL or time.monotonic() - _reported_at < DB_POOL_STATS_INTERVAL:
+        return
+    # Метрики пишет один поток воркера, остальные не ждут
+    if not _report_lock.acquire(blocking=False):
+        return
+    try:
+        if time.monotonic() - _reported_at >= DB_POOL_STATS_INTERVAL:
+            report_stats()
+    finally:
+        _report_lock.release()
+
+
+async def report_stats_periodically():
+    """
+    Фоновая задача процесса бота: метрики соединений раз в DB_POOL_STATS_INTERVAL секунд.
+    """
+    while True:
+        await asyncio.sleep(DB_POOL_STATS_INTERVAL)
+        try:
+            # Не занимаем поток ORM: метрики собираются без запросов к БД
+            await sync_to_async(report_stats, thread_sensitive=False)()
+        except Exception as e:
+            logger.error(f"Ошибка при записи метрик соединений с БД: {e}")
+
+
+def read_stats() -> list[dict]:
+    """
+    Последние метрики всех процессов из Redis (процессы, не писавшие метрики за 3 интервала, отсутствуют).
+    """
+    redis = get_sync_redis()
+    keys = sorted(redis.scan_iter(stats_key()))
+    return [json.loads(value) for value in (redis.mget(keys) if keys else []) if value]
@@ -0,0 +1,242 @@
+import mimetypes
+import os
+import re
+import time
+from urllib.parse import quote
+
+import aiofiles
+from decouple import config
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from ..storage import blob_digest
+from .attachment_variants import ATTACHMENT_VARIANTS, ensure_variant, variant_filename
+
+# Кто передаёт файл клиенту: '' — Django, 'x-accel-redirect' — nginx, 'x-sendfile' — Apache/lighttpd
+FILE_DOWNLOAD_OFFLOAD = config('FILE_DOWNLOAD_OFFLOAD', default='').lower()
+# internal-location nginx, отображаемый на MEDIA_ROOT (для X-Accel-Redirect)
+FILE_DOWNLOAD_ACCEL_PREFIX = config('FILE_DOWNLOAD_ACCEL_PREFIX', default='/protected/')
+FILE_DOWNLOAD_CHUNK_SIZE = int(config('FILE_DOWNLOAD_CHUNK_SIZE', default=65536))  # Размер блока при отдаче файла (байт)
+DOWNLOAD_URL_TTL = int(config('DOWNLOAD_URL_TTL', default=900))  # Минимальное время жизни подписанной ссылки (сек.)
+
+DOWNLOAD_URL_SALT = 'telegram_bot.download'
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(name: str, stat: os.stat_result) -> str:
+    """
+    Возвращает ETag файла: SHA-256 для файлов с адресацией по содержимому, иначе размер и время изменения.
+    """
+    return quote_etag(blob_digest(name) or f"{stat.st_size:x}-{int(stat.st_mtime):x}")
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Разбирает заголовок Range с одним диапазоном.
+    :return: (начало, конец включительно); None, если заголовок не поддерживается или некорректен
+        и нужно отдать файл целиком.
+    :raises ValueError: Диапазон не пересекается с файлом, в том числе с пустым (ответ 416).
+    """
+    match = RANGE_PATTERN.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None  # Несколько диапазонов или другие единицы — отдаём файл целиком (допускается RFC 9110)
+
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: последние N байт
+        suffix = int(end)
+        if suffix == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - suffix, 0), size - 1
+
+    start = int(start)
+    if end and int(end) < start:
+        return None  # bytes=5-3: некорректный диапазон игнорируется (RFC 9110, 14.1.1)
+    if start >= size:
+        raise ValueError(header)
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def iter_file_range(f, start: int, length: int, chunk_size: int = FILE_DOWNLOAD_CHUNK_SIZE):
+    """
+    Отдаёт length байт файла, начиная с start, блоками.
+    """
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+async def aiter_file_range(path: str, start: int, length: int, chunk_size: int = FILE_DOWNLOAD_CHUNK_SIZE):
+    """
+    Асинхронный вариант iter_file_range для ASGI: синхронный итератор Django под ASGI
+    прочитал бы файл в память целиком, прежде чем отправить первый байт.
+    """
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def is_asgi_request(request) -> bool:
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def serve_file(request, storage, name: str, filename: str, offload: str | None = None) -> HttpResponse:
+    """
+    Отдаёт файл из хранилища как вложение с поддержкой условных запросов и докачки.
+
+    - ETag и Last-Modified: повторный запрос с If-None-Match / If-Modified-Since получает 304 без тела;
+    - Range (один диапазон байт): ответ 206 для докачки, 416 для диапазона за пределами файла;
+    - offload: передача файла фронт-прокси (X-Accel-Redirect для nginx, X-Sendfile для Apache),
+      Python-воркер сразу освобождается; Range прокси обрабатывает сам.
+
+    :param storage: Файловое хранилище (FileSystemStorage).
+    :param name: Имя файла в хранилище.
+    :param filename: Имя файла для пользователя (Content-Disposition).
+    :param offload: Режим передачи файла прокси (по умолчанию FILE_DOWNLOAD_OFFLOAD).
+    """
+    offload = FILE_DOWNLOAD_OFFLOAD if offload is None else offload
+    path = storage.path(name)
+    if offload == 'x-sendfile' and not path.isascii():
+        # Django кодирует не-latin-1 заголовки по RFC 2047 (=?utf-8?b?...?=), а такой путь прокси не найдёт:
+        # старые загрузки с кириллическими именами отдаются самим Django
+        offload = ''
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse("Файл не найден.", status=404)
+
+    etag = file_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+
+    conditional_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional_response is not None:
+        return conditional_response
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if offload in ('x-accel-redirect', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            # URI в процентной кодировке: nginx декодирует его, а кириллические имена старых загрузок
+            # Django иначе закодировал бы по RFC 2047
+            response['X-Accel-Redirect'] = FILE_DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + quote(name.lstrip('/'))
+        else:
+            response['X-Sendfile'] = path
+    else:
+        byte_range = None
+        range_header = request.headers.get('Range')
+        # If-Range: докачка возможна, только если файл не изменился с прошлой загрузки
+        if range_header and request.headers.get('If-Range', etag) in (etag, http_date(last_modified)):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f"bytes */{stat.st_size}"
+                return response
+
+        asgi = is_asgi_request(request)
+        if byte_range is None and not asgi:
+            response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range or (0, stat.st_size - 1)
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                aiter_file_range(path, start, length) if asgi else iter_file_range(storage.open(name, 'rb'), start, length),
+                status=200 if byte_range is None else 206,
+                content_type=content_type,
+            )
+            response['Content-Length'] = length
+            if byte_range is not None:
+                response['Content-Range'] = f"bytes {start}-{end}/{stat.st_size}"
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def serve_attachment(request, storage, name: str, filename: str) -> HttpResponse:
+    """
+    Отдаёт файл вложения или его уменьшенную копию (?variant=thumb|preview для изображений).
+    """
+    variant = request.GET.get('variant')
+    if variant:
+        if variant not in ATTACHMENT_VARIANTS:
+            return HttpResponse(f"Неизвестный вариант: {variant}.", status=400)
+        variant_name = ensure_variant(storage, name, filename, variant)
+        if variant_name is None:
+            return HttpResponse("Для этого файла нет уменьшенной копии.", status=404)
+        name, filename = variant_name, variant_filename(filename, variant)
+    return serve_file(request, storage, name, filename)
+
+
+def sign_download(name: str, filename: str, ttl: int = DOWNLOAD_URL_TTL) -> str:
+    """
+    Возвращает подписанный (HMAC на SECRET_KEY) токен для скачивания файла без обращения к БД.
+    Срок действия округляется вверх до границы интервала ttl (ссылка живёт от ttl до 2 * ttl),
+    поэтому в пределах интервала все ссылки на один файл совпадают и кешируются прокси как одна.
+    :param name: Имя файла в хранилище.
+    :param filename: Имя файла для пользователя.
+    """
+    expires_at = (int(time.time()) // ttl + 2) * ttl
+    return signing.dumps({'n': name, 'f': filename, 'e': expires_at}, salt=DOWNLOAD_URL_SALT, compress=True)
+
+
+def unsign_download(token: str) -> tuple[str, str, int]:
+    """
+    Проверяет подпись и срок действия токена.
+    :return: (имя файла в хранилище, имя файла для пользователя, время окончания действия).
+    :raises signing.BadSignature: Подпись неверна или срок действия истёк.
+    """
+    payload = signing.loads(token, salt=DOWNLOAD_URL_SALT)
+    if payload['e'] <= time.time():
+        raise signing.SignatureExpired('Срок действия ссылки истёк.')
+    return payload['n'], payload['f'], payload['e']
+
+
+def signed_download_url(file, request=None) -> str | None:
+    """
+    Возвращает подписанную ссылку на скачивание файла обращения (None, если файла нет).
+    :param file: Значение Appeal.file_path.
+    :param request: Текущий запрос (для абсолютной ссылки).
+    """
+    if not file:
+        return None
+    url = reverse('download_file_signed', kwargs={'token': sign_download(file.name, file.instance.attachment_name)})
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def serve_signed_file(request, storage, token: str) -> HttpResponse:
+    """
+    Отдаёт файл (или его вариант) по подписанной ссылке. БД не используется; ответ разрешено кешировать
+    (в том числе общему кешу nginx/Varnish) до окончания срока действия ссылки.
+    """
+    try:
+        name, filename, expires_at = unsign_download(token)
+    except signing.BadSignature:
+        return HttpResponse("Ссылка недействительна или устарела.", status=403)
+
+    response = serve_attachment(request, storage, name, filename)
+    if response.status_code in (200, 206, 304):
+        max_age = max(expires_at - int(time.time()), 0)
+        patch_cache_control(response, public=True, max_age=max_age, immutable=bool(blob_digest(name)))
+        response['Expires'] = http_date(expires_at)
+    return response
@@ -0,0 +1,118 @@
+import json
+from typing import Any, Dict
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from decouple import config
+from django.conf import settings
+from pydantic import BaseModel
+
+from .main_logger import logger
+
+# Режим хранилища состояний FSM: memory (в памяти процесса) или redis (общий Redis из settings.CACHES)
+FSM_STORAGE = config('FSM_STORAGE', default='memory')
+FSM_STATE_TTL = int(config('FSM_STATE_TTL', default=3600))  # TTL состояния и его данных по умолчанию (сек.)
+FSM_DATA_TTL = int(config('FSM_DATA_TTL', default=3600))  # TTL данных без состояния, например admin_request (сек.)
+FSM_APPEAL_FORM_TTL = int(config('FSM_APPEAL_FORM_TTL', default=86400))  # TTL недописанного обращения (сек.)
+
+# TTL для отдельных состояний или целых групп состояний (ключ — "Группа:состояние" или "Группа")
+FSM_STATE_TTLS = {
+    'AppealForm': FSM_APPEAL_FORM_TTL,
+}
+
+
+def _json_default(value: Any) -> Any:
+    # Объекты aiogram (например, клавиатуры) сохраняются как словари без пустых полей
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_none=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def compact_json_dumps(data: Dict[str, Any]) -> str:
+    """
+    Компактная сериализация данных FSM: без пробелов и без экранирования кириллицы.
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+class TTLRedisStorage(RedisStorage):
+    """
+    Redis-хранилище FSM с TTL, зависящим от состояния.
+
+    Ключи имеют вид <KEY_PREFIX>:fsm:<bot_id>:<chat_id>:<user_id>:<state|data>, поэтому
+    несколько процессов бота (и несколько ботов) могут работать с одним Redis.
+    Данные живут столько же, сколько текущее состояние; каждое изменение продлевает оба ключа.
+    """
+
+    def __init__(self, *args, state_ttls: Dict[str, int] | None = None, **kwargs):
+        """
+        :param state_ttls: TTL (сек.) для состояний или групп состояний.
+        """
+        super().__init__(*args, **kwargs)
+        self.state_ttls = state_ttls or {}
+
+    def get_state_ttl(self, state: str | None) -> int:
+        """
+        Возвращает TTL для состояния: сначала ищется точное совпадение, затем группа состояний.
+        """
+        if state is None:
+            return self.data_ttl
+        if state in self.state_ttls:
+            return self.state_ttls[state]
+        return self.state_ttls.get(state.split(':', 1)[0], self.state_ttl)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state_key = self.key_builder.build(key, 'state')
+        data_key = self.key_builder.build(key, 'data')
+        if state is None:
+            await self.redis.delete(state_key)
+            return
+
+        state = state.state if isinstance(state, State) else state
+        ttl = self.get_state_ttl(state)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(state_key, state, ex=ttl)
+            pipe.expire(data_key, ttl)  # Данные формы живут столько же, сколько состояние
+            await pipe.execute()
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        state_key = self.key_builder.build(key, 'state')
+        data_key = self.key_builder.build(key, 'data')
+        if not data:
+            await self.redis.delete(data_key)
+            return
+
+        state = await self.get_state(key)
+        ttl = self.get_state_ttl(state)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(data_key, self.json_dumps(data), ex=ttl)
+            if state is not None:
+                pipe.expire(state_key, ttl)
+            await pipe.execute()
+
+
+def create_fsm_storage() -> BaseStorage:
+    """
+    Создаёт хранилище состояний FSM в соответствии с FSM_STORAGE.
+    В режиме redis используется тот же Redis, что и в settings.CACHES['default'].
+    """
+    if FSM_STORAGE != 'redis':
+        return MemoryStorage()
+
+    cache = settings.CACHES['default']
+    storage = TTLRedisStorage.from_url(
+        cache['LOCATION'],
+        connection_kwargs={
+            'socket_connect_timeout': cache['OPTIONS'].get('SOCKET_CONNECT_TIMEOUT'),
+            'socket_timeout': cache['OPTIONS'].get('SOCKET_TIMEOUT'),
+        },
+        key_builder=DefaultKeyBuilder(prefix=f"{cache.get('KEY_PREFIX', 'telegram_bot')}:fsm", with_bot_id=True),
+        state_ttl=FSM_STATE_TTL,
+        data_ttl=FSM_DATA_TTL,
+        state_ttls=FSM_STATE_TTLS,
+        json_dumps=compact_json_dumps,
+    )
+    logger.info(f"Хранилище состояний FSM: Redis ({cache['LOCATION'].rsplit('@', 1)[-1]}).")
+    return storage
@@ -0,0 +1,54 @@
+"""
+Уменьшенные копии изображений (миниатюры и превью).
+
+Модуль не зависит от Django: его функции выполняются в дочерних процессах пула,
+которые не инициализируют приложение.
+"""
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+
+def render_variants(source_path: str, targets: list[tuple[str, int]], image_format: str, quality: int) -> list[int]:
+    """
+    Создаёт уменьшенные копии изображения.
+    :param source_path: Путь к исходному изображению.
+    :param targets: Список (путь результата, максимальная сторона в пикселях).
+    :param image_format: Формат результата (WEBP или JPEG).
+    :param quality: Качество сжатия (1-100).
+    :return: Размеры созданных файлов в байтах (в порядке targets).
+    """
+    sizes = {}
+    with Image.open(source_path) as image:
+        # Для JPEG декодер сразу уменьшает изображение в 2-8 раз (draft), не распаковывая его целиком
+        largest = max(max_side for _, max_side in targets)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)  # Поворот по EXIF (фото с телефона)
+
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha and image_format == 'WEBP' else 'RGB')
+
+        # От большего размера к меньшему: каждая следующая копия уменьшается из предыдущей
+        for path, max_side in sorted(targets, key=lambda target: target[1], reverse=True):
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            sizes[path] = _save_atomic(image, path, image_format, quality)
+
+    return [sizes[path] for path, _ in targets]
+
+
+def _save_atomic(image: Image.Image, path: str, image_format: str, quality: int) -> int:
+    """
+    Сохраняет изображение через временный файл, чтобы читатели не увидели недописанный файл.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, format=image_format, quality=quality, optimize=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
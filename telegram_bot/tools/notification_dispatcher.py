@@ -0,0 +1,330 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from asgiref.sync import sync_to_async
+from decouple import config
+from django.utils.timezone import now
+
+from ..models import Notification
+from .main_logger import logger
+
+# Лимиты Telegram Bot API (значения по умолчанию взяты из официального FAQ)
+NOTIFIER_WORKERS = int(config('NOTIFIER_WORKERS', default=30))  # Количество параллельных воркеров (чатов в обработке)
+NOTIFIER_GLOBAL_RATE = float(config('NOTIFIER_GLOBAL_RATE', default=30))  # Сообщений в секунду на всего бота
+NOTIFIER_CHAT_RATE = float(config('NOTIFIER_CHAT_RATE', default=1))  # Сообщений в секунду в один чат
+NOTIFIER_MAX_RETRIES = int(config('NOTIFIER_MAX_RETRIES', default=3))  # Повторы после TelegramRetryAfter
+# Как часто во время пачки отправленные уведомления помечаются в БД и продлевается захват остальных (сек.)
+NOTIFIER_FLUSH_INTERVAL = float(config('NOTIFIER_FLUSH_INTERVAL', default=5))
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket для ограничения частоты отправки сообщений.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        :param rate: Скорость пополнения (токенов в секунду).
+        :param capacity: Максимальное количество токенов (по умолчанию равно rate, но не меньше 1).
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        current = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (current - self.updated_at) * self.rate)
+        self.updated_at = current
+
+    def pause(self, seconds: float):
+        """
+        Приостанавливает выдачу токенов (используется при TelegramRetryAfter).
+        :param seconds: Длительность паузы в секундах.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self):
+        """
+        Ожидает появления токена и забирает его.
+        """
+        async with self._lock:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    @property
+    def idle(self) -> bool:
+        """
+        True, если корзина полностью заполнена и не находится на паузе (её можно безопасно удалить).
+        """
+        self._refill()
+        return self.tokens >= self.capacity and self.paused_until <= time.monotonic()
+
+
+class DispatcherStats:
+    """
+    Счётчики пропускной способности и задержек диспетчера уведомлений.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.deleted = 0
+        self.retried = 0
+        self.send_time_total = 0.0  # Суммарное время вызовов send_message
+        self.send_time_max = 0.0
+        self.delivery_delay_total = 0.0  # Суммарная задержка от создания уведомления до отправки
+        self.delivery_delay_max = 0.0
+        self.busy_time = 0.0  # Время, затраченное на обработку пачек
+        self.batches = 0
+
+    def record_send(self, send_time: float, delivery_delay: float):
+        self.sent += 1
+        self.send_time_total += send_time
+        self.send_time_max = max(self.send_time_max, send_time)
+        self.delivery_delay_total += delivery_delay
+        self.delivery_delay_max = max(self.delivery_delay_max, delivery_delay)
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает текущие значения счётчиков.
+        """
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'deleted': self.deleted,
+            'retried': self.retried,
+            'batches': self.batches,
+            'throughput': round(self.sent / self.busy_time, 2) if self.busy_time else 0.0,
+            'send_latency_avg': round(self.send_time_total / self.sent, 3) if self.sent else 0.0,
+            'send_latency_max': round(self.send_time_max, 3),
+            'delivery_delay_avg': round(self.delivery_delay_total / self.sent, 3) if self.sent else 0.0,
+            'delivery_delay_max': round(self.delivery_delay_max, 3),
+        }
+
+
+@sync_to_async
+def mark_notifications_sent(notification_ids: list[int]) -> int:
+    """
+    Помечает уведомления отправленными одним запросом UPDATE ... WHERE id IN (...) и снимает с них захват.
+    """
+    return Notification.objects.filter(id__in=notification_ids).update(
+        sent=True, locked_by=None, locked_until=None, updated_at=now()
+    )
+
+
+@sync_to_async
+def delete_notifications(notification_ids: list[int]) -> int:
+    """
+    Удаляет уведомления одним запросом DELETE ... WHERE id IN (...).
+    """
+    deleted_count, _ = Notification.objects.filter(id__in=notification_ids).delete()
+    return deleted_count
+
+
+class NotificationDispatcher:
+    """
+    Параллельный диспетчер уведомлений с учётом лимитов Telegram.
+
+    Уведомления группируются по чатам: сообщения одного чата отправляются последовательно
+    (с сохранением порядка), разные чаты обрабатываются пулом воркеров параллельно.
+    Глобальный лимит и лимит на чат соблюдаются с помощью token bucket.
+    """
+
+    def __init__(
+            self,
+            bot,
+            workers: int = NOTIFIER_WORKERS,
+            global_rate: float = NOTIFIER_GLOBAL_RATE,
+            chat_rate: float = NOTIFIER_CHAT_RATE,
+            max_retries: int = NOTIFIER_MAX_RETRIES,
+    ):
+        """
+        :param bot: Экземпляр бота (aiogram.Bot).
+        :param workers: Количество параллельных воркеров.
+        :param global_rate: Глобальный лимит сообщений в секунду.
+        :param chat_rate: Лимит сообщений в секунду для одного чата.
+        :param max_retries: Максимальное количество повторов после TelegramRetryAfter.
+        """
+        self.bot = bot
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.stats = DispatcherStats()
+
+    def _chat_bucket(self, telegram_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(telegram_id)
+        if bucket is None:
+            bucket = self.chat_buckets[telegram_id] = TokenBucket(self.chat_rate, capacity=1.0)
+        return bucket
+
+    def _prune_chat_buckets(self):
+        """
+        Удаляет корзины чатов, которые давно не использовались, чтобы словарь не рос бесконечно.
+        """
+        for telegram_id in [key for key, bucket in self.chat_buckets.items() if bucket.idle]:
+            del self.chat_buckets[telegram_id]
+
+    async def _send(self, notification, sent_ids: list[int], deleted_ids: list[int]):
+        """
+        Отправляет одно уведомление с соблюдением лимитов и повтором при TelegramRetryAfter.
+        """
+        user = notification.user
+        telegram_id = user.telegram_id
+        chat_bucket = self._chat_bucket(telegram_id)
+
+        for attempt in range(self.max_retries + 1):
+            await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+
+            started = time.monotonic()
+            try:
+                await self.bot.send_message(telegram_id, notification.message)
+            except TelegramRetryAfter as e:
+                # Telegram просит подождать: приостанавливаем все отправки на указанное время
+                logger.warning(
+                    f"Превышен лимит Telegram при отправке уведомления {notification.id}, "
+                    f"повтор через {e.retry_after} сек. (попытка {attempt + 1})"
+                )
+                self.global_bucket.pause(e.retry_after)
+                chat_bucket.pause(e.retry_after)
+                self.stats.retried += 1
+                continue
+            except TelegramBadRequest as e:
+                # Проверяем, является ли ошибка "chat not found"
+                if "chat not found" in str(e):
+                    logger.error(
+                        f"Чат не найден для пользователя {user.id} (Telegram ID: {telegram_id}). Удаляем уведомление."
+                    )
+                    deleted_ids.append(notification.id)
+                else:
+                    logger.error(f"Не удалось отправить уведомление пользователю {user.id}: {e}")
+                    self.stats.failed += 1
+                return
+            except Exception as e:
+                logger.error(f"Произошла ошибка при отправке уведомления пользователю {user.id}: {e}")
+                self.stats.failed += 1
+                return
+
+            send_time = time.monotonic() - started
+            delivery_delay = (now() - notification.created_at).total_seconds()
+            self.stats.record_send(send_time, delivery_delay)
+            sent_ids.append(notification.id)
+            return
+
+        logger.error(f"Уведомление {notification.id} не отправлено: исчерпаны повторы после TelegramRetryAfter.")
+        self.stats.failed += 1
+
+    async def _worker(self, queue: asyncio.Queue, sent_ids: list[int], deleted_ids: list[int]):
+        while True:
+            try:
+                chat_notifications = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            # Уведомления одного чата отправляются строго по порядку
+            for notification in chat_notifications:
+                await self._send(notification, sent_ids, deleted_ids)
+
+    async def _flush(self, sent_ids: list[int], deleted_ids: list[int]):
+        """
+        Сохраняет накопленные результаты отправки (один UPDATE и один DELETE) и очищает списки.
+        Если запрос не удался, идентификаторы возвращаются в списки и сохраняются при следующей попытке.
+        """
+        if sent_ids:
+            ids = sent_ids.copy()
+            sent_ids.clear()
+            try:
+                await mark_notifications_sent(ids)
+            except Exception:
+                sent_ids.extend(ids)
+                raise
+        if deleted_ids:
+            ids = deleted_ids.copy()
+            deleted_ids.clear()
+            try:
+                self.stats.deleted += await delete_notifications(ids)
+            except Exception:
+                deleted_ids.extend(ids)
+                raise
+
+    async def _flush_periodically(
+            self,
+            sent_ids: list[int],
+            deleted_ids: list[int],
+            renew_lease: Callable[[], Awaitable] | None,
+    ):
+        """
+        Во время отправки пачки раз в NOTIFIER_FLUSH_INTERVAL секунд помечает отправленные уведомления
+        и продлевает захват остальных, чтобы долгая пачка не была захвачена и отправлена другим процессом повторно.
+        """
+        while True:
+            await asyncio.sleep(NOTIFIER_FLUSH_INTERVAL)
+            try:
+                await self._flush(sent_ids, deleted_ids)
+                if renew_lease is not None:
+                    await renew_lease()
+            except Exception as e:
+                logger.error(f"Не удалось сохранить промежуточный результат отправки уведомлений: {e}")
+
+    async def dispatch(self, notifications, renew_lease: Callable[[], Awaitable] | None = None) -> dict:
+        """
+        Отправляет пачку уведомлений. Результат сохраняется по ходу отправки (раз в NOTIFIER_FLUSH_INTERVAL секунд)
+        и в конце пачки: отправленные помечаются одним UPDATE, уведомления удалённых чатов удаляются одним DELETE.
+        :param notifications: Список объектов Notification с подгруженным user.
+        :param renew_lease: Корутина-функция, продлевающая захват ещё не отправленных уведомлений пачки.
+        :return: Снимок счётчиков диспетчера.
+        """
+        started = time.monotonic()
+        sent_before = self.stats.sent
+
+        by_chat = defaultdict(list)
+        for notification in notifications:
+            if not notification.user.telegram_id:  # Убедимся, что у пользователя есть Telegram ID
+                logger.error(f"У пользователя {notification.user.id} отсутствует Telegram ID.")
+                continue
+            by_chat[notification.user.telegram_id].append(notification)
+
+        queue = asyncio.Queue()
+        for chat_notifications in by_chat.values():
+            queue.put_nowait(chat_notifications)
+
+        sent_ids: list[int] = []
+        deleted_ids: list[int] = []
+        workers_count = min(self.workers, queue.qsize())
+        flusher = asyncio.create_task(self._flush_periodically(sent_ids, deleted_ids, renew_lease))
+        try:
+            await asyncio.gather(*(self._worker(queue, sent_ids, deleted_ids) for _ in range(workers_count)))
+        finally:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+        await self._flush(sent_ids, deleted_ids)
+
+        self._prune_chat_buckets()
+        self.stats.batches += 1
+        self.stats.busy_time += time.monotonic() - started
+
+        snapshot = self.stats.snapshot()
+        logger.info(
+            f"Пачка уведомлений обработана: отправлено {self.stats.sent - sent_before} из {len(notifications)} "
+            f"за {time.monotonic() - started:.2f} сек. Статистика: {snapshot}"
+        )
+        return snapshot
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+
+import psycopg
+from django.db import DEFAULT_DB_ALIAS, connections
+from psycopg import sql
+
+from .main_logger import logger
+
+# Канал PostgreSQL, в который триггер (миграция 0007) отправляет NOTIFY после вставки уведомлений
+NOTIFICATION_CHANNEL = 'telegram_bot_notification'
+
+
+class NotificationListener:
+    """
+    Держит отдельное соединение с PostgreSQL в режиме LISTEN и будит отправку уведомлений
+    сразу после коммита транзакции, создавшей новые уведомления.
+    Если LISTEN недоступен (ошибка соединения, цикл событий без поддержки асинхронного psycopg),
+    wait() просто ждёт таймаут, и отправка работает в режиме периодического опроса.
+    """
+
+    def __init__(self, channel: str = NOTIFICATION_CHANNEL):
+        """
+        :param channel: Имя канала LISTEN/NOTIFY.
+        """
+        self.channel = channel
+        self.event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _connection_params() -> dict:
+        # Параметры соединений Django (в том числе OPTIONS: sslmode и т.п.). Соединение не берётся из пула:
+        # оно занято LISTEN всё время работы бота. Курсоры и адаптеры Django для синхронных соединений не нужны
+        params = connections[DEFAULT_DB_ALIAS].get_connection_params()
+        params.pop('cursor_factory', None)
+        params.pop('context', None)
+        return params
+
+    async def start(self) -> bool:
+        """
+        Открывает LISTEN-соединение и запускает задачу, которая читает из него NOTIFY.
+        :return: True, если слушатель запущен.
+        """
+        if self._task is not None and not self._task.done():
+            return True
+
+        try:
+            connection = await psycopg.AsyncConnection.connect(**self._connection_params(), autocommit=True)
+        except Exception as e:
+            logger.error(f"Не удалось открыть LISTEN-соединение для уведомлений: {e}")
+            return False
+
+        try:
+            await connection.execute(sql.SQL('LISTEN {}').format(sql.Identifier(self.channel)))
+        except Exception as e:
+            logger.error(f"Не удалось подписаться на канал уведомлений '{self.channel}': {e}")
+            await connection.close()
+            return False
+
+        self._task = asyncio.create_task(self._listen(connection))
+        logger.info(f"Слушатель уведомлений подписан на канал '{self.channel}'.")
+        return True
+
+    async def _listen(self, connection: psycopg.AsyncConnection):
+        try:
+            async for _ in connection.notifies():
+                self.event.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"LISTEN-соединение уведомлений разорвано: {e}")
+            # Будим отправку, чтобы не пропустить уведомления, пришедшие во время сбоя
+            self.event.set()
+        finally:
+            await connection.close()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Ожидает NOTIFY не дольше timeout секунд. При необходимости переподключается.
+        :param timeout: Максимальное время ожидания (интервал резервного опроса).
+        :return: True, если пробуждение вызвано NOTIFY, False — по таймауту.
+        """
+        await self.start()
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+
+    def close(self):
+        """
+        Останавливает задачу чтения NOTIFY; соединение закрывается при её завершении.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,50 @@
+def build_appeal_status_message(appeal) -> str:
+    """
+    Формирует текст уведомления об изменении статуса обращения.
+    Включает подробную информацию: ID, комиссию, дату подачи, статус.
+    :param appeal: Объект Appeal с уже установленным новым статусом (commission должна быть подгружена).
+    :return: Текст уведомления.
+    """
+    # Форматируем даты в удобочитаемый формат
+    created_date = appeal.created_at.strftime("%d.%m.%Y %H:%M")
+    updated_date = appeal.updated_at.strftime("%d.%m.%Y %H:%M")
+
+    commission_name = appeal.commission.name if appeal.commission else "Общее обращение"
+    status_display = appeal.get_status_display()
+
+    # Определяем иконку статуса
+    status_icon = "🔄"
+    if appeal.status == 'processed':
+        status_icon = "✅"
+    elif appeal.status == 'rejected':
+        status_icon = "❌"
+
+    message = (
+        f"{status_icon} Статус вашего обращения #{appeal.pk} обновлён\n\n"
+        f"📌 Комиссия: {commission_name}\n"
+        f"📅 Дата подачи: {created_date}\n"
+        f"🔄 Дата обновления: {updated_date}\n"
+        f"📋 Новый статус: {status_display}\n\n"
+    )
+
+    # Добавляем дополнительную информацию в зависимости от статуса
+    if appeal.status == 'processed':
+        message += (
+            "Ваше обращение было успешно обработано. "
+            "Спасибо за ваше участие!\n\n"
+            "Если у вас остались вопросы, вы можете создать новое обращение."
+        )
+    elif appeal.status == 'rejected':
+        message += (
+            "К сожалению, ваше обращение было отклонено. "
+            "Вы можете уточнить детали или подать новое обращение.\n\n"
+            "Для уточнения причин решения комиссии, пожалуйста, "
+            "обратитесь к администрации платформы."
+        )
+    else:
+        message += (
+            "Ваше обращение находится в работе. "
+            "Мы уведомим вас о дальнейших изменениях статуса."
+        )
+
+    return message
@@ -1,65 +1,141 @@
 import asyncio
+import os
+import socket
+import uuid
+from datetime import timedelta
+from functools import partial
+
 from asgiref.sync import sync_to_async
-from aiogram.exceptions import TelegramBadRequest
+from decouple import config
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
 
 from ..models import Notification
+from .db_pool import database_scope
 from .main_logger import logger
+from .notification_dispatcher import NOTIFIER_GLOBAL_RATE, NotificationDispatcher
+from .notification_listener import NotificationListener
+
+NOTIFIER_BATCH_SIZE = int(config('NOTIFIER_BATCH_SIZE', default=500))  # Размер пачки уведомлений за один проход
+# Интервал резервного опроса (в секундах): основная доставка идёт по LISTEN/NOTIFY
+NOTIFIER_POLL_INTERVAL = int(config('NOTIFIER_POLL_INTERVAL', default=300))
+NOTIFIER_USE_LISTEN = config('NOTIFIER_USE_LISTEN', default=True, cast=bool)  # Пробуждение по PostgreSQL NOTIFY
+# Время захвата пачки (в секундах): по истечении уведомления упавшего процесса заберёт другой процесс
+NOTIFIER_LEASE_SECONDS = int(config('NOTIFIER_LEASE_SECONDS', default=300))
+# Пачка ограничена так, чтобы при глобальном лимите Telegram она отправлялась за половину времени захвата
+NOTIFIER_CLAIM_LIMIT = max(1, min(NOTIFIER_BATCH_SIZE, int(NOTIFIER_GLOBAL_RATE * NOTIFIER_LEASE_SECONDS / 2)))
+
+
+def generate_worker_id() -> str:
+    """
+    Генерирует уникальный идентификатор процесса бота для захвата уведомлений.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@sync_to_async
+def claim_pending_notifications(worker_id: str, limit: int, lease_seconds: int) -> list[Notification]:
+    """
+    Атомарно захватывает пачку непосланных уведомлений для текущего процесса.
+    Строки, заблокированные другими процессами, пропускаются (SELECT ... FOR UPDATE SKIP LOCKED),
+    а уведомления с истёкшим захватом (например, после падения процесса) забираются повторно.
+    :param worker_id: Идентификатор процесса, захватывающего уведомления.
+    :param limit: Максимальный размер пачки.
+    :param lease_seconds: Длительность захвата в секундах.
+    :return: Список захваченных уведомлений с подгруженным пользователем.
+    """
+    current_time = now()
+
+    with transaction.atomic():
+        notification_ids = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=current_time), sent=False)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not notification_ids:
+            return []
+
+        Notification.objects.filter(id__in=notification_ids).update(
+            locked_by=worker_id,
+            locked_until=current_time + timedelta(seconds=lease_seconds)
+        )
+
+        # Чтение в той же транзакции идёт на основную БД: отстающая реплика ещё не видит захват
+        return list(
+            Notification.objects.filter(id__in=notification_ids, locked_by=worker_id)
+            .select_related('user')
+            .only('id', 'message', 'created_at', 'user__id', 'user__telegram_id')
+            .order_by('created_at', 'id')
+        )
+
+
+@sync_to_async
+def renew_notifications_lease(worker_id: str, notification_ids: list[int], lease_seconds: int) -> int:
+    """
+    Продлевает захват ещё не отправленных уведомлений пачки (UPDATE ... WHERE locked_by=<worker_id>).
+    Уведомления, которые уже захватил другой процесс, не затрагиваются.
+    :return: Количество уведомлений с продлённым захватом.
+    """
+    return Notification.objects.filter(id__in=notification_ids, locked_by=worker_id, sent=False).update(
+        locked_until=now() + timedelta(seconds=lease_seconds)
+    )
 
 
 async def send_pending_notifications(bot):
     """
     Проверяет наличие непосланных уведомлений и отправляет их пользователям.
-    Если чат не найден (chat not found), уведомление удаляется.
+    Отправка выполняется пачками через NotificationDispatcher с учётом лимитов Telegram.
+    Проверка запускается сразу после NOTIFY о новых уведомлениях, а раз в NOTIFIER_POLL_INTERVAL
+    секунд выполняется резервный опрос.
+    Уведомления захватываются пачками с арендой (locked_by/locked_until), поэтому
+    несколько процессов бота могут работать параллельно без повторной отправки. Во время отправки
+    пачки отправленные уведомления помечаются по ходу, а захват остальных продлевается.
+    Если чат не найден (chat not found), уведомление удаляется. Уведомления, которые не удалось
+    отправить, остаются захваченными до истечения аренды и затем отправляются повторно.
     :param bot: Экземпляр бота (aiogram.Bot).
     """
+    dispatcher = NotificationDispatcher(bot)
+    listener = NotificationListener() if NOTIFIER_USE_LISTEN else None
+    worker_id = generate_worker_id()
+    logger.info(f"Процесс отправки уведомлений зарегистрирован как '{worker_id}'.")
+
     while True:
         try:
-            # Получаем все непосланные уведомления (sent=False)
-            pending_notifications = await sync_to_async(list)(
-                Notification.objects.filter(sent=False).select_related('user')
-            )
-
-            for notification in pending_notifications:
-                user = notification.user
-                telegram_id = user.telegram_id
-
-                if telegram_id:  # Убедимся, что у пользователя есть Telegram ID
-                    try:
-                        # Отправляем сообщение пользователю
-                        await bot.send_message(telegram_id, notification.message)
-
-                        # Обновляем статус уведомления на "отправлено"
-                        notification.sent = True
-                        await sync_to_async(notification.save)()
-                        logger.info(
-                            f"Уведомление отправлено пользователю {user.id} (Telegram ID: {telegram_id})"
-                        )
-
-                    except TelegramBadRequest as e:
-                        # Проверяем, является ли ошибка "chat not found"
-                        if "chat not found" in str(e):
-                            logger.error(
-                                f"Чат не найден для пользователя {user.id} (Telegram ID: {telegram_id}). Удаляем уведомление."
-                            )
-                            # Удаляем уведомление
-                            await sync_to_async(notification.delete)()
-                        else:
-                            # Логируем другие ошибки Telegram API
-                            logger.error(
-                                f"Не удалось отправить уведомление пользователю {user.id}: {e}"
-                            )
-
-                    except Exception as e:
-                        # Логируем остальные ошибки
-                        logger.error(
-                            f"Произошла ошибка при отправке уведомления пользователю {user.id}: {e}"
-                        )
-
-                else:
-                    logger.error(f"У пользователя {user.id} отсутствует Telegram ID.")
-
-            # Ждем некоторое время перед следующей проверкой
-            await asyncio.sleep(60)  # Проверяем каждые 60 секунд
+            # Захватываем и отправляем непосланные уведомления пачками, пока они не закончатся
+            while True:
+                # Соединение с БД берётся на пачку и возвращается в пул перед следующей
+                async with database_scope():
+                    pending_notifications = await claim_pending_notifications(
+                        worker_id, NOTIFIER_CLAIM_LIMIT, NOTIFIER_LEASE_SECONDS
+                    )
+                    if not pending_notifications:
+                        break
+
+                    await dispatcher.dispatch(
+                        pending_notifications,
+                        renew_lease=partial(
+                            renew_notifications_lease,
+                            worker_id,
+                            [notification.id for notification in pending_notifications],
+                            NOTIFIER_LEASE_SECONDS,
+                        ),
+                    )
+
+                if len(pending_notifications) < NOTIFIER_CLAIM_LIMIT:
+                    break
+
+            # Ждем NOTIFY о новых уведомлениях или истечения интервала резервного опроса
+            if listener:
+                await listener.wait(NOTIFIER_POLL_INTERVAL)
+            else:
+                await asyncio.sleep(NOTIFIER_POLL_INTERVAL)
+
+        except asyncio.CancelledError:
+            if listener:
+                listener.close()
+            raise
 
         except Exception as e:
             # Логируем ошибку, если произошла проблема в основном цикле
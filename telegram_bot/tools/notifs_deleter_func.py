@@ -1,20 +1,61 @@
 import asyncio
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from asgiref.sync import sync_to_async
 from decouple import config
+from django.db import connection
 from django.utils.timezone import now
 
+from .db_pool import database_scope
 from .main_logger import logger
 from ..models import Notification
 
+# Размер пачки удаления и бюджет нагрузки на БД (строк в секунду, 0 — без ограничения)
+NOTIFICATION_CLEANUP_CHUNK_SIZE = int(config('NOTIFICATION_CLEANUP_CHUNK_SIZE', default=1000))
+NOTIFICATION_CLEANUP_ROWS_PER_SECOND = int(config('NOTIFICATION_CLEANUP_ROWS_PER_SECOND', default=5000))
 
-async def delete_old_notifications(days: int = 7, hours: int = 0, minutes: int = 0):
+# Удаление пачки по ключу (created_at, id): каждая пачка — отдельная короткая транзакция.
+# Уведомления не имеют зависимых объектов и сигналов удаления, поэтому каскад Django не нужен.
+DELETE_CHUNK_SQL = f"""
+DELETE FROM {Notification._meta.db_table}
+WHERE id IN (
+    SELECT id FROM {Notification._meta.db_table}
+    WHERE sent = true AND created_at < %s AND (created_at, id) > (%s, %s)
+    ORDER BY created_at, id
+    LIMIT %s
+)
+RETURNING created_at, id
+"""
+
+
+@sync_to_async
+def delete_notifications_chunk(cutoff_date, last_key: tuple, chunk_size: int) -> list[tuple]:
+    """
+    Удаляет одну пачку отправленных уведомлений старше cutoff_date, следующих за ключом last_key.
+    :return: Список ключей (created_at, id) удалённых строк.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DELETE_CHUNK_SQL, [cutoff_date, *last_key, chunk_size])
+        return cursor.fetchall()
+
+
+async def delete_old_notifications(
+        days: int = 7,
+        hours: int = 0,
+        minutes: int = 0,
+        chunk_size: int = NOTIFICATION_CLEANUP_CHUNK_SIZE,
+        rows_per_second: int = NOTIFICATION_CLEANUP_ROWS_PER_SECOND,
+):
     """
     Удаляет старые отправленные уведомления на основе указанного интервала.
+    Удаление выполняется пачками фиксированного размера с паузами, чтобы не превышать бюджет нагрузки.
     :param days: Количество дней для интервала (по умолчанию 7).
     :param hours: Количество часов для интервала (по умолчанию 0).
     :param minutes: Количество минут для интервала (по умолчанию 0).
+    :param chunk_size: Количество строк, удаляемых за одну пачку.
+    :param rows_per_second: Максимальная скорость удаления (строк в секунду, 0 — без ограничения).
+    :return: Статистика прохода (удалено строк, пачек, время, скорость) или None при ошибке.
     """
     try:
         # Проверяем, что хотя бы один из параметров больше нуля
@@ -24,12 +65,42 @@ async def delete_old_notifications(days: int = 7, hours: int = 0, minutes: int =
         # Определяем дату, после которой уведомления считаются "старыми"
         cutoff_date = now() - timedelta(days=days, hours=hours, minutes=minutes)
 
-        # Получаем и удаляем старые отправленные уведомления
-        deleted_count = await sync_to_async(Notification.objects.filter(
-            sent=True, created_at__lt=cutoff_date
-        ).delete)()
+        started = time.monotonic()
+        deleted_count = 0
+        chunks = 0
+        last_key = (datetime.min.replace(tzinfo=dt_timezone.utc), 0)  # Ключ, предшествующий любой строке
+
+        while True:
+            chunk_started = time.monotonic()
+            deleted_keys = await delete_notifications_chunk(cutoff_date, last_key, chunk_size)
+            if not deleted_keys:
+                break
+
+            deleted_count += len(deleted_keys)
+            chunks += 1
+            last_key = max(deleted_keys)
+
+            if len(deleted_keys) < chunk_size:
+                break
+
+            # Выдерживаем паузу, чтобы средняя скорость не превышала rows_per_second
+            if rows_per_second > 0:
+                pause = len(deleted_keys) / rows_per_second - (time.monotonic() - chunk_started)
+                if pause > 0:
+                    await asyncio.sleep(pause)
 
-        logger.info(f"Удалено {deleted_count[0]} старых отправленных уведомлений.")
+        elapsed = time.monotonic() - started
+        stats = {
+            'deleted': deleted_count,
+            'chunks': chunks,
+            'elapsed': round(elapsed, 3),
+            'rows_per_second': round(deleted_count / elapsed, 1) if elapsed else 0.0,
+        }
+        logger.info(
+            f"Удалено {deleted_count} старых отправленных уведомлений ({chunks} пачек) "
+            f"за {stats['elapsed']} сек., скорость {stats['rows_per_second']} строк/сек."
+        )
+        return stats
     except Exception as e:
         logger.error(f"Ошибка при удалении старых уведомлений: {e}")
 
@@ -52,7 +123,8 @@ async def start_notification_cleanup_task():
 
     while True:
         try:
-            await delete_old_notifications(days=days, hours=hours, minutes=minutes)
+            async with database_scope():
+                await delete_old_notifications(days=days, hours=hours, minutes=minutes)
         except Exception as e:
             logger.error(f"Ошибка при выполнении очистки уведомлений: {e}")
 
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.asyncio import Redis
+
+_async_redis: Redis | None = None
+
+
+def cache_key(*parts) -> str:
+    """
+    Строит ключ Redis с префиксом приложения из settings.CACHES (например, telegram_bot:user:123).
+    """
+    prefix = settings.CACHES['default'].get('KEY_PREFIX', 'telegram_bot')
+    return ':'.join(str(part) for part in (prefix, *parts))
+
+
+def get_sync_redis():
+    """
+    Возвращает синхронный клиент Redis из пула django-redis (для сигналов и представлений).
+    """
+    return get_redis_connection('default')
+
+
+def get_async_redis() -> Redis:
+    """
+    Возвращает асинхронный клиент Redis (для бота), подключённый к тому же Redis, что и кеш Django.
+    Клиент создаётся один раз на процесс.
+    """
+    global _async_redis
+    if _async_redis is None:
+        cache = settings.CACHES['default']
+        _async_redis = Redis.from_url(
+            cache['LOCATION'],
+            socket_connect_timeout=cache['OPTIONS'].get('SOCKET_CONNECT_TIMEOUT'),
+            socket_timeout=cache['OPTIONS'].get('SOCKET_TIMEOUT'),
+        )
+    return _async_redis
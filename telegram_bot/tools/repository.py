@@ -0,0 +1,169 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from ..models import AdminRequest, Appeal, CommissionInfo, StatusChoices, User
+from .main_logger import logger
+
+# Общий слой доступа к данным для обработчиков бота на асинхронном ORM Django (aget, afirst, async for).
+# Каждая функция — один переход в поток ORM; связанные объекты загружаются тем же запросом (select_related),
+# чтобы обработчики не обращались к БД при чтении атрибутов.
+
+
+# ===================== ПОЛЬЗОВАТЕЛИ =====================
+
+async def register_user(telegram_id: int, username: str, first_name: str, last_name: str) -> User:
+    """
+    Создаёт пользователя или обновляет его данные из Telegram (команда /start).
+    Запись выполняется всегда, без сверки с кешем пользователей: снимок в кеше может пережить удаление
+    пользователя в другом процессе, и /start тогда не восстановил бы регистрацию.
+    """
+    defaults = {'username': username, 'first_name': first_name, 'last_name': last_name}
+    user, _ = await User.objects.aupdate_or_create(telegram_id=telegram_id, defaults=defaults)
+    return user
+
+
+async def get_user(user_id: int) -> User | None:
+    """
+    :param user_id: Первичный ключ (ID) пользователя.
+    :return: Пользователь или None, если не найден.
+    """
+    return await User.objects.filter(id=user_id).afirst()
+
+
+async def user_exists(user_id: int) -> bool:
+    """
+    Проверка по основной БД: вызывается после ошибки записи, реплика может отставать.
+    """
+    return await User.objects.using(DEFAULT_DB_ALIAS).filter(id=user_id).aexists()
+
+
+async def delete_user(user_id: int) -> bool:
+    """
+    Удаляет пользователя вместе с его обращениями и заявками (сигналы удаления срабатывают).
+    :return: False, если пользователь не найден.
+    """
+    deleted, _ = await User.objects.filter(id=user_id).adelete()
+    return deleted > 0
+
+
+# ===================== ОБРАЩЕНИЯ =====================
+
+async def get_appeal(appeal_id: int, *related: str) -> Appeal:
+    """
+    :param related: Связанные объекты, загружаемые тем же запросом ('user', 'commission').
+    :raises Appeal.DoesNotExist: Обращение не найдено.
+    """
+    queryset = Appeal.objects.all()
+    if related:
+        queryset = queryset.select_related(*related)
+    return await queryset.aget(id=appeal_id)
+
+
+async def list_user_appeals(user: User) -> list[Appeal]:
+    """
+    Обращения пользователя с комиссиями, сначала новые.
+    """
+    return [
+        appeal async for appeal in Appeal.objects.filter(user=user).select_related('commission').order_by('-id')
+    ]
+
+
+async def create_appeal(
+        user_id: int,
+        commission_id: int,
+        appeal_text: str,
+        contact_info: str | None = None,
+        file_name: str | None = None,
+        original_file_name: str | None = None,
+) -> Appeal:
+    """
+    Сохраняет новое обращение одним запросом INSERT.
+    :param file_name: Имя уже сохранённого в хранилище файла вложения.
+    :param original_file_name: Исходное имя файла вложения.
+    """
+    appeal = Appeal(
+        user_id=user_id,
+        commission_id=commission_id,
+        appeal_text=appeal_text,
+        contact_info=contact_info,
+        status=StatusChoices.NEW
+    )
+    # Файл уже записан в хранилище, привязываем его к обращению
+    if file_name:
+        appeal.file_path.name = file_name
+        appeal.file_name = original_file_name or ''
+    await appeal.asave()
+    return appeal
+
+
+async def delete_appeal(appeal_id: int) -> bool:
+    """
+    Удаляет обращение (файл освобождается сигналом post_delete).
+    :return: False, если обращение не найдено.
+    """
+    deleted, _ = await Appeal.objects.filter(id=appeal_id).adelete()
+    return deleted > 0
+
+
+async def save_appeal_file_id(appeal_id: int, file_id: str):
+    # update() вместо save(): не меняет updated_at и не вызывает сигналы обращения
+    await Appeal.objects.filter(id=appeal_id).aupdate(telegram_file_id=file_id)
+
+
+# ===================== КОМИССИИ =====================
+
+async def commission_name_exists(name: str) -> bool:
+    return await CommissionInfo.objects.filter(name=name).aexists()
+
+
+async def commission_exists(commission_id: int) -> bool:
+    """
+    Проверка по основной БД: вызывается после ошибки записи, реплика может отставать.
+    """
+    return await CommissionInfo.objects.using(DEFAULT_DB_ALIAS).filter(id=commission_id).aexists()
+
+
+async def create_commission(name: str, description: str) -> CommissionInfo:
+    """
+    :raises IntegrityError: Комиссия с таким названием уже существует.
+    """
+    return await CommissionInfo.objects.acreate(name=name, description=description)
+
+
+async def delete_commission(commission_id: int) -> bool:
+    """
+    Удаляет комиссию (кеш каталога сбрасывается сигналом post_delete).
+    :return: False, если комиссия не найдена.
+    """
+    deleted, _ = await CommissionInfo.objects.filter(id=commission_id).adelete()
+    return deleted > 0
+
+
+# ===================== ЗАЯВКИ НА АДМИНИСТРАТОРА =====================
+
+async def list_admin_requests(status: str) -> list[AdminRequest]:
+    """
+    Заявки с указанным статусом вместе с пользователями (один запрос вместо запроса на каждую заявку).
+    """
+    return [request async for request in AdminRequest.objects.filter(status=status).select_related('user')]
+
+
+async def get_admin_request(request_id: int) -> AdminRequest:
+    """
+    Заявка вместе с пользователем: он нужен обработчикам и сигналам заявки.
+    :raises AdminRequest.DoesNotExist: Заявка не найдена.
+    """
+    return await AdminRequest.objects.select_related('user').aget(id=request_id)
+
+
+async def get_user_admin_request(user: User) -> AdminRequest | None:
+    return await AdminRequest.objects.filter(user=user).afirst()
+
+
+async def submit_admin_request(user: User, admin_position: str) -> AdminRequest:
+    """
+    Создаёт заявку на администратора, предварительно удалив отклонённые заявки пользователя.
+    """
+    deleted, _ = await AdminRequest.objects.filter(user=user, status=StatusChoices.REJECTED).adelete()
+    if deleted:
+        logger.info("Старые отклонённые заявки пользователя были удалены.")
+    return await AdminRequest.objects.acreate(user=user, admin_position=admin_position)
@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+
+from aiogram import Bot
+from aiogram.types import Update
+from decouple import config
+
+from .main_logger import logger
+from .redis_client import cache_key, get_async_redis
+
+UPDATE_CHECKPOINT_INTERVAL = float(config('UPDATE_CHECKPOINT_INTERVAL', default=1))  # Период сохранения контрольной точки (сек.)
+UPDATE_PROCESSED_HISTORY = int(config('UPDATE_PROCESSED_HISTORY', default=10000))  # Сколько id обработанных апдейтов помнить
+
+
+class UpdateCheckpoint:
+    """
+    Контрольная точка приёма апдейтов в Redis.
+
+    - offset: следующий update_id, который нужно запросить у Telegram (getUpdates);
+    - pending: журнал принятых, но ещё не обработанных апдейтов (update_id -> JSON). Апдейт пишется
+      в журнал до того, как Telegram получит подтверждение следующим getUpdates, поэтому при падении
+      или перезапуске бота он не теряется и обрабатывается повторно после старта;
+    - processed: id последних обработанных апдейтов — защита от повторной обработки
+      (повторная доставка вебхука, повтор из журнала после перезапуска).
+
+    Обработанные апдейты сохраняются пачкой раз в UPDATE_CHECKPOINT_INTERVAL секунд, поэтому
+    при аварийном завершении повторно могут быть обработаны только апдейты последнего интервала.
+    """
+
+    def __init__(self, bot_id: int, history: int = UPDATE_PROCESSED_HISTORY):
+        """
+        :param bot_id: ID бота (ключи Redis раздельны для разных ботов).
+        :param history: Сколько id обработанных апдейтов хранить для защиты от повторов.
+        """
+        self.offset_key = cache_key('updates', bot_id, 'offset')
+        self.pending_key = cache_key('updates', bot_id, 'pending')
+        self.processed_key = cache_key('updates', bot_id, 'processed')
+        self.history = history
+        self.offset: int | None = None
+        self.in_flight: set[int] = set()
+        self.processed: set[int] = set()
+        self._finished: list[int] = []  # Обработаны, но ещё не сохранены в Redis
+
+    async def load(self, bot: Bot) -> list[Update]:
+        """
+        Загружает контрольную точку.
+        :return: Необработанные апдейты из журнала (по возрастанию update_id) для повторной обработки.
+        """
+        try:
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                pipe.get(self.offset_key)
+                pipe.zrange(self.processed_key, 0, -1)
+                pipe.hgetall(self.pending_key)
+                offset, processed, pending = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Не удалось загрузить контрольную точку апдейтов, начинаем без неё: {e}")
+            return []
+
+        self.offset = int(offset) if offset else None
+        self.processed = {int(update_id) for update_id in processed}
+
+        updates = []
+        for update_id, raw in sorted(pending.items(), key=lambda item: int(item[0])):
+            if int(update_id) not in self.processed:
+                updates.append(Update.model_validate_json(raw, context={'bot': bot}))
+        self.in_flight = {update.update_id for update in updates}
+
+        logger.info(
+            f"Контрольная точка апдейтов загружена: offset={self.offset}, "
+            f"в журнале необработанных: {len(updates)}, обработанных в истории: {len(self.processed)}."
+        )
+        return updates
+
+    def is_duplicate(self, update_id: int) -> bool:
+        return update_id in self.in_flight or update_id in self.processed
+
+    async def accept(self, updates: list[Update], offset: int | None = None) -> list[Update]:
+        """
+        Отбрасывает уже принятые апдейты и записывает новые в журнал (вместе с новым offset).
+        :param updates: Полученные апдейты.
+        :param offset: Новый offset для getUpdates (в режиме вебхука не передаётся).
+        :return: Апдейты, которые нужно обработать.
+        """
+        accepted = [update for update in updates if not self.is_duplicate(update.update_id)]
+        skipped = len(updates) - len(accepted)
+        if skipped:
+            logger.info(f"Пропущено {skipped} уже обработанных апдейтов.")
+
+        try:
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                if accepted:
+                    pipe.hset(self.pending_key, mapping={
+                        update.update_id: update.model_dump_json(exclude_unset=True) for update in accepted
+                    })
+                if offset is not None:
+                    pipe.set(self.offset_key, offset)
+                await pipe.execute()
+        except Exception as e:
+            # Без журнала бот продолжает работать, но апдейты в обработке могут потеряться при перезапуске
+            logger.error(f"Не удалось записать апдейты в журнал: {e}")
+
+        if offset is not None:
+            self.offset = offset
+        self.in_flight.update(update.update_id for update in accepted)
+        return accepted
+
+    def finish(self, update_id: int):
+        """
+        Отмечает апдейт обработанным (сохраняется в Redis при следующем flush()).
+        """
+        self.in_flight.discard(update_id)
+        self.processed.add(update_id)
+        self._finished.append(update_id)
+
+    async def flush(self):
+        """
+        Сохраняет обработанные апдейты: удаляет их из журнала и добавляет в историю.
+        """
+        if not self._finished:
+            return
+        finished, self._finished = self._finished, []
+
+        try:
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                pipe.hdel(self.pending_key, *finished)
+                pipe.zadd(self.processed_key, {update_id: update_id for update_id in finished})
+                pipe.zremrangebyrank(self.processed_key, 0, -self.history - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Не удалось сохранить контрольную точку апдейтов: {e}")
+            self._finished = finished + self._finished
+
+        if len(self.processed) > self.history * 2:
+            self.processed = set(heapq.nlargest(self.history, self.processed))
+
+    async def run(self, interval: float = UPDATE_CHECKPOINT_INTERVAL):
+        """
+        Фоновая задача: периодически сохраняет контрольную точку.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
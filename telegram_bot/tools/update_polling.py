@@ -0,0 +1,91 @@
+import asyncio
+import signal
+from contextlib import suppress
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.dispatcher import DEFAULT_BACKOFF_CONFIG
+from aiogram.utils.backoff import Backoff
+from decouple import config
+
+from .main_logger import logger
+from .update_offset import UpdateCheckpoint
+from .webhook_server import UpdateWorkerPool
+
+POLLING_TIMEOUT = int(config('POLLING_TIMEOUT', default=10))  # Время ожидания long polling (сек.)
+
+
+async def poll_updates(bot: Bot, dp: Dispatcher, pool: UpdateWorkerPool, checkpoint: UpdateCheckpoint):
+    """
+    Получает апдейты через getUpdates, начиная с сохранённого offset, и передаёт их в пул воркеров.
+    Каждая пачка записывается в журнал до следующего getUpdates, который подтверждает её в Telegram.
+    """
+    backoff = Backoff(config=DEFAULT_BACKOFF_CONFIG)
+    allowed_updates = dp.resolve_used_update_types()
+    # Таймаут запроса должен быть больше времени long polling
+    request_timeout = int(bot.session.timeout + POLLING_TIMEOUT)
+
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=checkpoint.offset,
+                timeout=POLLING_TIMEOUT,
+                allowed_updates=allowed_updates,
+                request_timeout=request_timeout,
+            )
+        except Exception as e:
+            logger.error(f"Не удалось получить апдейты: {e}. Повтор через {backoff.next_delay:.1f} сек.")
+            await backoff.asleep()
+            continue
+        backoff.reset()
+
+        if not updates:
+            continue
+
+        for update in await checkpoint.accept(updates, offset=updates[-1].update_id + 1):
+            await pool.submit(update)
+
+
+async def run_polling(bot: Bot, dp: Dispatcher):
+    """
+    Запускает long polling с продолжением с сохранённого offset и работает до SIGTERM/SIGINT.
+    Апдейты, пришедшие, пока бот был выключен, не отбрасываются, а обрабатываются пулом воркеров
+    с ограниченной очередью (без всплеска нагрузки при старте).
+    """
+    checkpoint = UpdateCheckpoint(bot.id)
+    pool = UpdateWorkerPool(dp, bot, checkpoint=checkpoint)
+
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    pool.start()
+    checkpoint_task = asyncio.create_task(checkpoint.run())
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    with suppress(NotImplementedError):  # Windows не поддерживает add_signal_handler
+        loop.add_signal_handler(signal.SIGTERM, stop_event.set)
+        loop.add_signal_handler(signal.SIGINT, stop_event.set)
+
+    polling_task = None
+    try:
+        # Сначала дорабатываем апдейты, принятые до перезапуска
+        for update in await checkpoint.load(bot):
+            await pool.submit(update)
+
+        logger.info(f"Запуск polling с offset={checkpoint.offset}.")
+        polling_task = asyncio.create_task(poll_updates(bot, dp, pool, checkpoint))
+        stop_task = asyncio.create_task(stop_event.wait())
+        done, _ = await asyncio.wait([polling_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+        stop_task.cancel()
+        if polling_task in done:
+            polling_task.result()  # Пробрасываем исключение, если polling завершился с ошибкой
+    finally:
+        if polling_task is not None:
+            polling_task.cancel()
+            await asyncio.gather(polling_task, return_exceptions=True)
+        await pool.stop()
+        checkpoint_task.cancel()
+        await checkpoint.flush()
+        logger.info(f"Polling остановлен. Обработано апдейтов: {pool.processed}, ошибок: {pool.failed}.")
+
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await dp.storage.close()
+        await bot.session.close()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from decouple import config
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from ..models import User
+from .main_logger import logger
+from .redis_client import cache_key, get_async_redis, get_sync_redis
+
+USER_CACHE_ENABLED = bool(int(config('USER_CACHE_ENABLED', default=1)))
+USER_CACHE_SIZE = int(config('USER_CACHE_SIZE', default=10000))  # Размер LRU в памяти процесса (записей)
+USER_CACHE_LOCAL_TTL = int(config('USER_CACHE_LOCAL_TTL', default=30))  # TTL записи в памяти процесса (сек.)
+USER_CACHE_REDIS_TTL = int(config('USER_CACHE_REDIS_TTL', default=600))  # TTL записи в Redis (сек.)
+USER_CACHE_STATS_INTERVAL = int(config('USER_CACHE_STATS_INTERVAL', default=1000))  # Логировать статистику каждые N запросов
+
+# Поля пользователя, которые хранятся в кеше (остальные загружаются из БД при обращении)
+USER_SNAPSHOT_FIELDS = ('id', 'telegram_id', 'username', 'first_name', 'last_name', 'is_admin')
+
+# Канал Redis, через который процессы сообщают друг другу об изменении пользователя
+USER_CACHE_INVALIDATION_CHANNEL = cache_key('user', 'invalidate')
+
+
+class LocalTTLCache:
+    """
+    LRU-кеш в памяти процесса с ограничением времени жизни записей.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        :param maxsize: Максимальное количество записей.
+        :param ttl: Время жизни записи в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        """
+        Возвращает значение или None, если записи нет или она устарела.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        # pop/try вместо del: запись может быть удалена сигналом из другого потока
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            pass
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UserCacheStats:
+    """
+    Счётчики попаданий и промахов кеша пользователей.
+    """
+
+    def __init__(self):
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+        self.invalidations = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.local_hits + self.redis_hits + self.misses
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает текущие значения счётчиков.
+        """
+        lookups = self.lookups
+        return {
+            'lookups': lookups,
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.local_hits + self.redis_hits) / lookups, 3) if lookups else 0.0,
+            'redis_errors': self.redis_errors,
+            'invalidations': self.invalidations,
+        }
+
+
+def user_snapshot(user: User) -> dict:
+    """
+    Возвращает облегчённый снимок пользователя для хранения в кеше.
+    """
+    return {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+
+
+def user_from_snapshot(snapshot: dict) -> User:
+    """
+    Восстанавливает объект User из снимка без запроса к БД.
+    Поля, которых нет в снимке, остаются отложенными и загрузятся из БД при первом обращении.
+    """
+    return User.from_db(DEFAULT_DB_ALIAS, list(USER_SNAPSHOT_FIELDS), [snapshot[field] for field in USER_SNAPSHOT_FIELDS])
+
+
+async def fetch_user_snapshot(telegram_id: int) -> dict | None:
+    """
+    Загружает снимок пользователя из БД.
+    """
+    return await User.objects.filter(telegram_id=telegram_id).values(*USER_SNAPSHOT_FIELDS).afirst()
+
+
+class UserCache:
+    """
+    Двухуровневый кеш пользователей по telegram_id: LRU в памяти процесса поверх Redis.
+    Записи сбрасываются сигналами User post_save/post_delete; остальные процессы узнают
+    об изменении через канал Redis (pub/sub).
+    """
+
+    def __init__(self):
+        self.local = LocalTTLCache(USER_CACHE_SIZE, USER_CACHE_LOCAL_TTL)
+        self.stats = UserCacheStats()
+
+    @staticmethod
+    def redis_key(telegram_id: int) -> str:
+        return cache_key('user', telegram_id)
+
+    def _record_lookup(self):
+        if USER_CACHE_STATS_INTERVAL and self.stats.lookups % USER_CACHE_STATS_INTERVAL == 0:
+            logger.info(f"Статистика кеша пользователей: {self.stats.snapshot()}, записей в памяти: {len(self.local)}")
+
+    async def get(self, telegram_id: int) -> User | None:
+        """
+        Возвращает пользователя по telegram_id: из памяти процесса, из Redis или из БД.
+        :return: Объект User или None, если пользователь не зарегистрирован.
+        """
+        if not USER_CACHE_ENABLED:
+            return await User.objects.filter(telegram_id=telegram_id).afirst()
+
+        snapshot = self.local.get(telegram_id)
+        if snapshot is not None:
+            self.stats.local_hits += 1
+            self._record_lookup()
+            return user_from_snapshot(snapshot)
+
+        redis = get_async_redis()
+        try:
+            cached = await redis.get(self.redis_key(telegram_id))
+        except Exception as e:
+            logger.warning(f"Кеш пользователей в Redis недоступен: {e}")
+            self.stats.redis_errors += 1
+            cached = None
+
+        if cached is not None:
+            self.stats.redis_hits += 1
+            snapshot = json.loads(cached)
+        else:
+            self.stats.misses += 1
+            snapshot = await fetch_user_snapshot(telegram_id)
+            if snapshot is None:
+                # Незарегистрированных пользователей не кешируем: после /start они должны сразу пройти проверку
+                self._record_lookup()
+                return None
+            try:
+                await redis.set(
+                    self.redis_key(telegram_id),
+                    json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')),
+                    ex=USER_CACHE_REDIS_TTL,
+                )
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить пользователя {telegram_id} в Redis: {e}")
+                self.stats.redis_errors += 1
+
+        self.local.set(telegram_id, snapshot)
+        self._record_lookup()
+        return user_from_snapshot(snapshot)
+
+    def invalidate(self, telegram_id: int):
+        """
+        Сбрасывает запись пользователя в памяти процесса и в Redis и оповещает остальные процессы.
+        Синхронный метод: вызывается из сигналов.
+        """
+        self.local.delete(telegram_id)
+        self.stats.invalidations += 1
+        try:
+            redis = get_sync_redis()
+            redis.delete(self.redis_key(telegram_id))
+            redis.publish(USER_CACHE_INVALIDATION_CHANNEL, telegram_id)
+        except Exception as e:
+            logger.error(f"Не удалось сбросить кеш пользователя {telegram_id} в Redis: {e}")
+
+    def invalidate_on_commit(self, telegram_id: int):
+        """
+        Сбрасывает кеш после коммита текущей транзакции (сразу, если транзакции нет),
+        чтобы параллельный запрос не закешировал старые данные повторно.
+        """
+        transaction.on_commit(lambda: self.invalidate(telegram_id))
+
+    async def listen_invalidations(self):
+        """
+        Фоновая задача: удаляет из памяти процесса пользователей, изменённых в других процессах.
+        """
+        while True:
+            pubsub = get_async_redis().pubsub()
+            try:
+                await pubsub.subscribe(USER_CACHE_INVALIDATION_CHANNEL)
+                logger.info("Подписка на сброс кеша пользователей запущена.")
+                while True:
+                    # Не listen(): общий клиент читает с таймаутом SOCKET_TIMEOUT, и канал без сообщений
+                    # считался бы ошибкой. get_message() с меньшим таймаутом при простое возвращает None
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self.local.delete(int(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Пока подписка не работает, пропущенные сбросы могли устареть: очищаем память процесса
+                logger.error(f"Ошибка подписки на сброс кеша пользователей: {e}")
+                self.local.clear()
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+user_cache = UserCache()
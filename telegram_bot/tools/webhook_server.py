@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import hmac
+import signal
+import time
+from collections import deque
+from contextlib import suppress
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+from aiohttp import web
+from decouple import config
+from django.conf import settings
+
+from .main_logger import logger
+from .update_offset import UpdateCheckpoint
+
+WEBHOOK_BASE_URL = config('TELEGRAM_WEBHOOK_BASE_URL', default='')  # Публичный HTTPS-адрес, на который Telegram шлёт апдейты
+WEBHOOK_PATH = config('TELEGRAM_WEBHOOK_PATH', default='/telegram/webhook')
+WEBHOOK_LISTEN_HOST = config('TELEGRAM_WEBHOOK_LISTEN_HOST', default='0.0.0.0')
+WEBHOOK_LISTEN_PORT = int(config('TELEGRAM_WEBHOOK_LISTEN_PORT', default=8081))
+WEBHOOK_SECRET = config('TELEGRAM_WEBHOOK_SECRET', default='')  # По умолчанию выводится из SECRET_KEY и токена бота
+UPDATE_WORKERS = int(config('UPDATE_WORKERS', default=100))  # Количество одновременно обрабатываемых чатов
+UPDATE_QUEUE_SIZE = int(config('UPDATE_QUEUE_SIZE', default=1000))  # Максимум принятых, но не обработанных апдейтов
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def get_webhook_secret() -> str:
+    """
+    Возвращает секрет для заголовка X-Telegram-Bot-Api-Secret-Token.
+    Если TELEGRAM_WEBHOOK_SECRET не задан, секрет детерминированно выводится из SECRET_KEY и токена бота,
+    чтобы все процессы получили одинаковое значение.
+    """
+    if WEBHOOK_SECRET:
+        return WEBHOOK_SECRET
+    return hmac.new(
+        settings.SECRET_KEY.encode(), settings.TELEGRAM_API_TOKEN.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def get_update_chat_id(update: Update) -> int:
+    """
+    Возвращает ключ упорядочивания апдейта: id чата (или пользователя), к которому он относится.
+    """
+    try:
+        event = update.event
+    except LookupError:
+        return update.update_id
+
+    chat = getattr(event, 'chat', None) or getattr(getattr(event, 'message', None), 'chat', None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, 'from_user', None)
+    return user.id if user is not None else update.update_id
+
+
+class UpdateWorkerPool:
+    """
+    Ограниченный пул воркеров обработки апдейтов с сохранением порядка внутри чата.
+
+    Апдейты складываются в очередь своего чата; чат, в котором появились апдейты, берёт
+    первый свободный воркер и обрабатывает их строго последовательно. Поэтому апдейты одного
+    пользователя не обгоняют друг друга, а разные пользователи обрабатываются параллельно.
+    Общее количество принятых, но не обработанных апдейтов ограничено: при переполнении
+    submit() ждёт, и Telegram получает ответ позже (обратное давление вместо роста памяти).
+    """
+
+    def __init__(
+            self,
+            dp: Dispatcher,
+            bot: Bot,
+            workers: int = UPDATE_WORKERS,
+            queue_size: int = UPDATE_QUEUE_SIZE,
+            checkpoint: UpdateCheckpoint | None = None,
+    ):
+        """
+        :param dp: Диспетчер aiogram.
+        :param bot: Экземпляр бота.
+        :param workers: Количество воркеров (одновременно обрабатываемых чатов).
+        :param queue_size: Максимальное количество принятых, но не обработанных апдейтов.
+        :param checkpoint: Контрольная точка, в которой отмечаются обработанные апдейты.
+        """
+        self.dp = dp
+        self.bot = bot
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.chats: dict[int, deque] = {}  # Очереди апдейтов по чатам
+        self.ready_chats = asyncio.Queue()  # Чаты, ожидающие свободного воркера
+        self.capacity = asyncio.Semaphore(queue_size)
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.pending = 0
+        self.tasks: list[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, update: Update):
+        """
+        Ставит апдейт в очередь его чата.
+        """
+        await self.capacity.acquire()
+        self.pending += 1
+        self.idle.clear()
+
+        chat_id = get_update_chat_id(update)
+        chat_updates = self.chats.get(chat_id)
+        if chat_updates is None:
+            self.chats[chat_id] = deque([update])
+            self.ready_chats.put_nowait(chat_id)
+        else:
+            chat_updates.append(update)
+
+    async def _process(self, update: Update):
+        try:
+            response = await self.dp.feed_update(self.bot, update, dispatcher=self.dp)
+            if isinstance(response, TelegramMethod):
+                await self.dp.silent_call_request(bot=self.bot, result=response)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Ошибка при обработке апдейта {update.update_id}: {e}")
+        finally:
+            # Апдейт с ошибкой тоже считается обработанным, иначе он повторялся бы после каждого перезапуска
+            if self.checkpoint is not None:
+                self.checkpoint.finish(update.update_id)
+
+    async def _worker(self):
+        while True:
+            chat_id = await self.ready_chats.get()
+            chat_updates = self.chats[chat_id]
+            # Очередь чата остаётся в словаре, пока воркер её обрабатывает: новые апдейты этого чата
+            # дописываются в конец и обрабатываются этим же воркером по порядку
+            while chat_updates:
+                await self._process(chat_updates[0])
+                chat_updates.popleft()
+                self.capacity.release()
+                self.pending -= 1
+            del self.chats[chat_id]
+            if not self.pending:
+                self.idle.set()
+
+    async def stop(self, timeout: float = 30):
+        """
+        Дожидается обработки уже принятых апдейтов (не дольше timeout) и останавливает воркеров.
+        """
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Не дождались обработки {self.pending} апдейтов при остановке.")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+def create_webhook_app(pool: UpdateWorkerPool, secret: str, path: str = WEBHOOK_PATH) -> web.Application:
+    """
+    Создаёт aiohttp-приложение, принимающее апдейты Telegram.
+    Апдейт принимается только с верным секретом и сразу передаётся в пул воркеров.
+    """
+
+    async def handle_update(request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_TOKEN_HEADER, ''), secret):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={'bot': pool.bot})
+        except Exception as e:
+            logger.error(f"Некорректный апдейт от Telegram: {e}")
+            return web.Response(status=400)
+
+        if pool.checkpoint is not None and not await pool.checkpoint.accept([update]):
+            return web.Response()  # Повторная доставка уже принятого апдейта
+
+        await pool.submit(update)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle_update)
+    return app
+
+
+async def run_webhook(
+        bot: Bot,
+        dp: Dispatcher,
+        host: str = WEBHOOK_LISTEN_HOST,
+        port: int = WEBHOOK_LISTEN_PORT,
+        base_url: str = WEBHOOK_BASE_URL,
+        set_webhook: bool = True,
+):
+    """
+    Запускает приём апдейтов через вебхук и работает до отмены задачи.
+    :param host: Адрес, на котором слушает aiohttp.
+    :param port: Порт aiohttp.
+    :param base_url: Публичный адрес для setWebhook (без пути).
+    :param set_webhook: Регистрировать ли вебхук в Telegram при запуске.
+    """
+    secret = get_webhook_secret()
+    checkpoint = UpdateCheckpoint(bot.id)
+    pool = UpdateWorkerPool(dp, bot, checkpoint=checkpoint)
+    runner = web.AppRunner(create_webhook_app(pool, secret))
+
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    pool.start()
+    checkpoint_task = asyncio.create_task(checkpoint.run())
+    # Дорабатываем апдейты, принятые до перезапуска
+    for update in await checkpoint.load(bot):
+        await pool.submit(update)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Вебхук слушает {host}:{port}{WEBHOOK_PATH}, воркеров: {pool.workers}.")
+
+    # Останавливаемся по SIGTERM/SIGINT (supervisord, Ctrl+C), как и start_polling
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    with suppress(NotImplementedError):  # Windows не поддерживает add_signal_handler
+        loop.add_signal_handler(signal.SIGTERM, stop_event.set)
+        loop.add_signal_handler(signal.SIGINT, stop_event.set)
+
+    started = time.monotonic()
+    try:
+        if set_webhook:
+            if not base_url:
+                raise ValueError("TELEGRAM_WEBHOOK_BASE_URL is required in webhook mode.")
+            await bot.set_webhook(
+                f"{base_url.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=secret,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=100,
+            )
+            logger.info(f"Вебхук зарегистрирован: {base_url.rstrip('/')}{WEBHOOK_PATH}")
+
+        await stop_event.wait()
+    finally:
+        # Сначала перестаём принимать запросы, затем дорабатываем принятые апдейты.
+        # Вебхук не удаляется: пока бот выключен, Telegram копит апдейты и доставит их после запуска.
+        await runner.cleanup()
+        await pool.stop()
+        checkpoint_task.cancel()
+        await checkpoint.flush()
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Вебхук остановлен. Обработано апдейтов: {pool.processed}, ошибок: {pool.failed}, "
+            f"в среднем {pool.processed / elapsed if elapsed else 0:.1f} апдейтов/сек."
+        )
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await dp.storage.close()
+        await bot.session.close()
@@ -5,13 +5,13 @@ from telegram_bot.api_views.admin.admin_requests.get_update_delete_admin_request
     UpdateAdminRequestStatusView, DeleteAdminRequestView
 from telegram_bot.api_views.admin.appeals.get_update_delete_appeal import AppealListForAdminView, \
     DeleteAppealForAdminView, \
-    UpdateAppealStatusView
+    UpdateAppealStatusView, BulkUpdateAppealStatusView
 from telegram_bot.api_views.admin.commissions.create_commission import CreateCommissionView
 from telegram_bot.api_views.admin.commissions.delete_commission import DeleteCommissionView
 from telegram_bot.api_views.admin.commissions.get_commissions import CommissionListView
 from telegram_bot.api_views.admin.commissions.get_update_commission import CommissionDetailView, UpdateCommissionView
 from telegram_bot.api_views.admin.users.delete_user import DeleteUserView
-from telegram_bot.api_views.service.file_downloader import DownloadFileView
+from telegram_bot.api_views.service.file_downloader import SignedDownloadFileView
 from telegram_bot.api_views.service.get_user_data import UserDataView
 from telegram_bot.api_views.user.admin_requests.get_admin_requests import CheckPendingRejectedAcceptedRequest
 from telegram_bot.api_views.user.admin_requests.sent_admin_request import SentAdminRequest
@@ -24,7 +24,7 @@ urlpatterns = [
     path('api/v1/service/get_user_data/', UserDataView.as_view(), name='user_data'),
 
     # api для сервисного взаимодействия с фронтендом
-    path('api/v1/service/download/<int:appeal_id>/', DownloadFileView.as_view(), name='download_file'),
+    path('api/v1/service/download/signed/<str:token>/', SignedDownloadFileView.as_view(), name='download_file_signed'),
 
     # api для взаимодействия с пользователем (для администратора)
     path('api/v1/admin/delete_user/<int:user_id>/', DeleteUserView.as_view(), name='delete_user'),
@@ -41,6 +41,7 @@ urlpatterns = [
     # api обращений (для администратора)
     path('api/v1/admin/appeals/', AppealListForAdminView.as_view(), name='admin-appeal-list'),
     path('api/v1/admin/update_appeal_status/<int:appeal_id>/', UpdateAppealStatusView.as_view(), name='admin-update-appeal-status'),
+    path('api/v1/admin/bulk_update_appeal_status/', BulkUpdateAppealStatusView.as_view(), name='admin-bulk-update-appeal-status'),
     path('api/v1/admin/delete_appeal/<int:appeal_id>/', DeleteAppealForAdminView.as_view(), name='admin-delete-appeal'),
 
     # api комиссий